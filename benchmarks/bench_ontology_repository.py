@@ -0,0 +1,228 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, ROOT)
+
+from data.generate_synthetic_dataset import generate_dataset, import_quadstore
+from infrastructure.catalog_index import SORT_FIELDS
+from infrastructure.ontology_repository import OntologyRepository
+from infrastructure.rule_engine import INFERRED_ONTOLOGY_IRI
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+SCHEMA_FILE = os.path.join(ROOT, 'data', 'data.rdf')
+
+# O custo é dominado pela materialização de RecommendedMusic (usuários x músicas),
+# então os tamanhos ficam pequenos o bastante para rodar em minutos
+SIZES = {
+    'small': dict(users=20, musics=200, ratings=500, genres=10),
+    'medium': dict(users=100, musics=1000, ratings=3000, genres=20),
+    'large': dict(users=200, musics=2000, ratings=6000, genres=40),
+}
+SEARCH = "love"
+# Notas alteradas antes de cada save: sem escritas pendentes o save não mede nada
+WRITES_PER_SAVE = 20
+# Abaixo disso a diferença é ruído de medição
+MIN_DELTA_MS = 1.0
+
+
+def measure(operation, repeat, setup=None, teardown=None):
+    """Run operation `repeat` times and return its timings in milliseconds."""
+    timings = []
+    for i in range(repeat):
+        if setup:
+            setup(i)
+        start = time.perf_counter()
+        operation(i)
+        timings.append((time.perf_counter() - start) * 1000)
+        if teardown:
+            teardown(i)
+    return {'median_ms': statistics.median(timings), 'min_ms': min(timings), 'runs': repeat}
+
+
+def close_repository(repo):
+    if repo.backend == 'sqlite':
+        # Cada carga abre o quadstore num World próprio; fechar libera o lock do SQLite
+        repo.world.close()
+    else:
+        # O RDF/XML carrega no default_world: sem destruir, a próxima carga viria do cache
+        repo.world.get_ontology(INFERRED_ONTOLOGY_IRI).destroy()
+        repo.onto.destroy()
+
+
+def touch_ratings(repo, ratings, rng):
+    """Change stars directly in the ontology, leaving the writes for the next save."""
+    for rating in rng.sample(ratings, min(WRITES_PER_SAVE, len(ratings))):
+        rating.stars = [rating.stars[0] % 5 + 1 if rating.stars else 1]
+
+
+def bench_backends(rdf_path, db_path, repeat, reasoner, rng):
+    """Time load, and save after real writes, on both backends."""
+    results = {}
+    for backend in OntologyRepository.BACKENDS:
+        loaded = []
+
+        def load(i):
+            loaded.append(OntologyRepository(rdf_path, backend=backend, db_path=db_path, reasoner=reasoner))
+            loaded[-1].load()
+        results[f'load[{backend}]'] = measure(load, repeat, teardown=lambda i: close_repository(loaded.pop()))
+
+        repo = OntologyRepository(rdf_path, backend=backend, db_path=db_path, reasoner=reasoner)
+        repo.load()
+        ratings = list(repo.onto.Rating.instances())
+        results[f'save[{backend}]'] = measure(lambda i: repo.save(), repeat,
+                                              setup=lambda i: touch_ratings(repo, ratings, rng))
+        close_repository(repo)
+    return results
+
+
+def bench_size(size, spec, workdir, repeat=3, reasoner='incremental', seed=0):
+    """Time every OntologyRepository operation on a generated ontology of the given size."""
+    rdf_path = os.path.join(workdir, f'{size}.rdf')
+    db_path = os.path.join(workdir, f'{size}.sqlite3')
+    generate_dataset(rdf_path, schema_path=SCHEMA_FILE, seed=seed, **spec)
+    import_quadstore(rdf_path, db_path)
+
+    rng = random.Random(seed)
+    results = bench_backends(rdf_path, db_path, repeat, reasoner, rng)
+    repo = OntologyRepository(rdf_path, backend='sqlite', db_path=db_path, reasoner=reasoner)
+    repo.load()
+
+    users = [user.userName[0] for user in repo.onto.User.instances()]
+    musics = list(repo.catalog_index)
+    ratings = list(repo.onto.Rating.instances())
+    genre = musics[0].hasGenre[0].genreName[0]
+    singer = musics[0].hasSinger[0].singerName[0]
+
+    results['export_rdf'] = measure(lambda i: repo.export_rdf(os.path.join(workdir, f'{size}-export.rdf')), repeat)
+    results['add_user'] = measure(lambda i: repo.add_user(f"bench user {i}", 1990, f"bench{i}@example.com"), repeat)
+    results['add_music'] = measure(lambda i: repo.add_music(f"bench song {i}", "2000", singer, genre), repeat)
+    results['add_rating'] = measure(
+        lambda i: repo.add_rating(rng.choice(users), rng.choice(musics).title[0], genre, rng.randint(1, 5)), repeat)
+
+    def get_rating(i):
+        rating = ratings[i % len(ratings)]
+        repo.get_user_rating(rating.givenBy[0].userName[0], rating.ratesSong[0].title[0])
+    results['get_user_rating'] = measure(get_rating, repeat)
+
+    user_name = users[0]
+    for order_by in SORT_FIELDS:
+        for label, kwargs in (('', {}), ('search', {'search': SEARCH}), ('user', {'user_name': user_name}),
+                              ('search_user', {'search': SEARCH, 'user_name': user_name})):
+            name = f"list_musics[{order_by}{',' + label if label else ''}]"
+            results[name] = measure(lambda i: repo.list_musics(10, order_by=order_by, **kwargs), repeat)
+
+    # Frio: sem a lista materializada em cache; quente: servida do cache
+    results['list_recommended_musics[cold]'] = measure(
+        lambda i: repo.list_recommended_musics(user_name, 10), repeat, setup=lambda i: repo.recommendations.clear())
+    results['list_recommended_musics[warm]'] = measure(lambda i: repo.list_recommended_musics(user_name, 10), repeat)
+    results['list_recommended_musics[search]'] = measure(
+        lambda i: repo.list_recommended_musics(user_name, 10, search=SEARCH), repeat)
+    repo.world.close()
+    return results
+
+
+def run(sizes=('small', 'medium'), repeat=3, reasoner='incremental', seed=0):
+    workdir = tempfile.mkdtemp(prefix='bench-ontology-')
+    try:
+        report = {
+            'meta': {'python': platform.python_version(), 'machine': platform.machine(),
+                     'reasoner': reasoner, 'repeat': repeat, 'seed': seed,
+                     'sizes': {size: SIZES[size] for size in sizes}},
+            'results': {},
+        }
+        for size in sizes:
+            print(f"Benchmarking {size} {SIZES[size]}...")
+            report['results'][size] = bench_size(size, SIZES[size], workdir, repeat=repeat, reasoner=reasoner, seed=seed)
+        return report
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(report, baseline, tolerance=2.0):
+    """Operations slower than `tolerance` times the baseline, either in absolute
+    time for a size or in how they grow from the smallest to the largest size."""
+    regressions = []
+    current, previous = report['results'], baseline['results']
+    sizes = [size for size in current if size in previous]
+    for size in sizes:
+        for op, timing in current[size].items():
+            old = previous[size].get(op)
+            if not old:
+                continue
+            new_ms, old_ms = timing['median_ms'], old['median_ms']
+            if new_ms > old_ms * tolerance and new_ms - old_ms > MIN_DELTA_MS:
+                regressions.append({'size': size, 'operation': op, 'kind': 'time',
+                                    'baseline_ms': old_ms, 'current_ms': new_ms})
+
+    if len(sizes) >= 2:
+        first, last = sizes[0], sizes[-1]
+        for op, timing in current[last].items():
+            if op not in current[first] or op not in previous[first] or op not in previous[last]:
+                continue
+            if timing['median_ms'] - current[first][op]['median_ms'] <= MIN_DELTA_MS:
+                continue
+            new_growth = timing['median_ms'] / max(current[first][op]['median_ms'], 1e-6)
+            old_growth = previous[last][op]['median_ms'] / max(previous[first][op]['median_ms'], 1e-6)
+            if new_growth > old_growth * tolerance:
+                regressions.append({'size': f"{first}->{last}", 'operation': op, 'kind': 'scaling',
+                                    'baseline_growth': old_growth, 'current_growth': new_growth})
+    return regressions
+
+
+def print_report(report):
+    for size, results in report['results'].items():
+        print(f"\n{size}:")
+        for op, timing in results.items():
+            print(f"  {op:45s} {timing['median_ms']:10.3f} ms (min {timing['min_ms']:.3f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OntologyRepository operations across ontology sizes.")
+    parser.add_argument('--sizes', nargs='+', default=['small', 'medium'], choices=list(SIZES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--reasoner', default='incremental', choices=['pellet', 'native', 'incremental', 'matrix'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the results as JSON")
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--tolerance', type=float, default=2.0, help="allowed slowdown factor over the baseline")
+    parser.add_argument('--update-baseline', action='store_true', help="store these results as the new baseline")
+    args = parser.parse_args()
+
+    report = run(args.sizes, repeat=args.repeat, reasoner=args.reasoner, seed=args.seed)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to create one")
+        return
+
+    with open(args.baseline) as f:
+        regressions = compare(report, json.load(f), tolerance=args.tolerance)
+    if not regressions:
+        print("\nNo regressions against the baseline")
+        return
+    print("\nRegressions against the baseline:")
+    for regression in regressions:
+        print(f"  {regression}")
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,71 +1,148 @@
-import re
+import argparse
+import random
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape, quoteattr
 
 INPUT_FILE = "data/data.rdf"
 OUTPUT_FILE = "data/data-test.rdf"
 N_ENTITIES = 10
 
-# Tags que representam entidades/classes/indivíduos RDF
-ENTITY_TAGS = [
-    "owl:Class",
-    "owl:ObjectProperty",
-    "owl:DatatypeProperty",
-    "owl:AnnotationProperty",
-    "owl:NamedIndividual",
-    "rdf:Description",
-]
+RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+OWL = "http://www.w3.org/2002/07/owl#"
+XML = "http://www.w3.org/XML/1998/namespace"
 
-# Regex para encontrar início de entidade
-ENTITY_START_RE = re.compile(r"<(?P<tag>{})[ >]".format("|".join(ENTITY_TAGS)))
-ENTITY_END_RE = re.compile(r"</(?P<tag>{})>".format("|".join(ENTITY_TAGS)))
+# Declarações de esquema (classes, propriedades, regras SWRL) vêm destes namespaces
+SCHEMA_NAMESPACES = (OWL, "http://www.w3.org/2000/01/rdf-schema#", "http://www.w3.org/2003/11/swrl#")
+
+
+def _split(tag):
+    if tag.startswith("{"):
+        uri, local = tag[1:].split("}", 1)
+        return uri, local
+    return "", tag
+
+
+def _local_name(iri):
+    return iri.rsplit("#", 1)[-1].rsplit("/", 1)[-1]
+
+
+def entity_classes(elem):
+    """Class names of a top-level element, or None if it is a schema declaration."""
+    uri, local = _split(elem.tag)
+    if elem.tag not in (f"{{{OWL}}}NamedIndividual", f"{{{RDF}}}Description"):
+        return None if uri in SCHEMA_NAMESPACES else {local}
+    types = [child.get(f"{{{RDF}}}resource", "") for child in elem if child.tag == f"{{{RDF}}}type"]
+    if elem.tag == f"{{{RDF}}}Description" and types and all(t.startswith(SCHEMA_NAMESPACES) for t in types):
+        return None
+    return {_local_name(t) for t in types}
+
+
+def _qname(tag, prefixes):
+    uri, local = _split(tag)
+    if not uri:
+        return local
+    prefix = prefixes[uri]
+    return f"{prefix}:{local}" if prefix else local
+
+
+def serialize(elem, prefixes, indent=""):
+    name = _qname(elem.tag, prefixes)
+    attrs = "".join(f" {_qname(k, prefixes)}={quoteattr(v)}" for k, v in elem.attrib.items())
+    children = list(elem)
+    if children:
+        inner = "".join(serialize(child, prefixes, indent + "  ") for child in children)
+        return f"{indent}<{name}{attrs}>\n{inner}{indent}</{name}>\n"
+    if elem.text and elem.text.strip():
+        return f"{indent}<{name}{attrs}>{escape(elem.text)}</{name}>\n"
+    return f"{indent}<{name}{attrs}/>\n"
+
+
+def extract_entities(input_path, output_path, n_entities=None, sample=None, classes=None, seed=None, extra=()):
+    """Stream an RDF/XML file and write a smaller ontology with every schema
+    declaration plus the first n_entities individuals, or a uniform random
+    sample of `sample` individuals, optionally restricted to `classes`.
+    `extra` is an iterable of already serialized elements appended at the end.
+
+    Only one top-level element is held at a time (plus the sample reservoir),
+    so memory does not grow with the size of the input file.
+    Returns the number of individuals written.
+    """
+    classes = set(classes) if classes else None
+    rng = random.Random(seed)
+    prefixes = {XML: "xml"}
+    reservoir = []
+    seen = written = 0
+    root = None
+    depth = 0
+
+    with open(output_path, "w", encoding="utf-8") as fout:
+        for event, elem in ET.iterparse(input_path, events=("start-ns", "start", "end")):
+            if event == "start-ns":
+                prefix, uri = elem
+                prefixes.setdefault(uri, prefix)
+                continue
+            if event == "start":
+                if root is None:
+                    root = elem
+                    declarations = "".join(
+                        f"\n         xmlns{':' + p if p else ''}={quoteattr(u)}" for u, p in prefixes.items() if u != XML
+                    )
+                    attrs = "".join(f"\n         {_qname(k, prefixes)}={quoteattr(v)}" for k, v in elem.attrib.items())
+                    fout.write(f'<?xml version="1.0"?>\n<{_qname(elem.tag, prefixes)}{declarations}{attrs}>\n\n')
+                depth += 1
+                continue
+
+            depth -= 1
+            if depth != 1:
+                continue
+
+            found = entity_classes(elem)
+            if found is None:
+                fout.write(serialize(elem, prefixes) + "\n")
+            elif classes is None or found & classes:
+                if sample is not None:
+                    # Amostragem por reservatório: cada entidade tem a mesma chance de ficar
+                    if len(reservoir) < sample:
+                        reservoir.append((seen, serialize(elem, prefixes)))
+                    else:
+                        j = rng.randint(0, seen)
+                        if j < sample:
+                            reservoir[j] = (seen, serialize(elem, prefixes))
+                    seen += 1
+                elif n_entities is None or written < n_entities:
+                    fout.write(serialize(elem, prefixes) + "\n")
+                    written += 1
+            root.clear()
+
+        for _, text in sorted(reservoir):
+            fout.write(text + "\n")
+            written += 1
+        for text in extra:
+            fout.write(text + "\n")
+        fout.write(f"</{_qname(root.tag, prefixes)}>\n")
+    return written
 
 
 def extract_first_n_entities(input_path, output_path, n_entities):
-    with open(input_path, "r") as fin:
-        lines = fin.readlines()
-
-    # Encontrar cabeçalho (antes da primeira entidade)
-    header = []
-    i = 0
-    while i < len(lines):
-        if ENTITY_START_RE.search(lines[i]):
-            break
-        header.append(lines[i])
-        i += 1
-
-    # Extrair entidades
-    entities = []
-    count = 0
-    while i < len(lines) and count < n_entities:
-        start_match = ENTITY_START_RE.search(lines[i])
-        if start_match:
-            entity_lines = [lines[i]]
-            tag = start_match.group("tag")
-            # Procurar fechamento
-            depth = 1 if not lines[i].strip().endswith("/>") else 0
-            i += 1
-            while i < len(lines) and depth > 0:
-                entity_lines.append(lines[i])
-                if ENTITY_START_RE.search(lines[i]):
-                    depth += 1
-                if ENTITY_END_RE.search(lines[i]):
-                    depth -= 1
-                i += 1
-            entities.extend(entity_lines)
-            count += 1
-        else:
-            i += 1
-
-    # Encontrar rodapé (após a última entidade)
-    footer = []
-    while i < len(lines):
-        footer.append(lines[i])
-        i += 1
-
-    # Escrever arquivo de saída
-    with open(output_path, "w") as fout:
-        fout.writelines(header)
-        fout.writelines(entities)
-        fout.writelines(footer)
+    return extract_entities(input_path, output_path, n_entities=n_entities)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract a smaller ontology from a (possibly huge) RDF/XML file.")
+    parser.add_argument("--input", default=INPUT_FILE)
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("-n", "--entities", type=int, default=N_ENTITIES, help="keep the first N individuals")
+    group.add_argument("--sample", type=int, help="keep a random sample of N individuals")
+    parser.add_argument("--seed", type=int, help="random seed for --sample")
+    parser.add_argument("--classes", nargs="+", help="only keep individuals of these classes (e.g. Music Rating)")
+    args = parser.parse_args()
+
+    count = extract_entities(args.input, args.output,
+                             n_entities=None if args.sample is not None else args.entities,
+                             sample=args.sample, classes=args.classes, seed=args.seed)
+    print(f"Wrote {count} entities to {args.output}")
+
 
 if __name__ == "__main__":
-    extract_first_n_entities(INPUT_FILE, OUTPUT_FILE, N_ENTITIES)
+    main()
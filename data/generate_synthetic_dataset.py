@@ -0,0 +1,195 @@
+import argparse
+import random
+import re
+from itertools import accumulate
+from xml.sax.saxutils import escape
+
+try:
+    from extract_first_n_rdf_entities import extract_entities
+except ImportError:  # importado como data.generate_synthetic_dataset
+    from data.extract_first_n_rdf_entities import extract_entities
+
+SCHEMA_FILE = "data/data.rdf"
+OUTPUT_FILE = "data/synthetic.rdf"
+
+XSD = "http://www.w3.org/2001/XMLSchema#"
+# Distribuição das notas: avaliações altas são mais comuns, como em catálogos reais
+STAR_WEIGHTS = (0.1, 0.1, 0.2, 0.3, 0.3)
+YEARS = (1950, 2024)
+WORDS = (
+    "love", "night", "heart", "dance", "blue", "fire", "rain", "dream", "road", "home",
+    "summer", "light", "river", "moon", "star", "city", "wild", "gold", "time", "song",
+    "baby", "girl", "sky", "soul", "world", "shadow", "thunder", "ocean", "angel", "memory",
+)
+
+
+def _safe_name(name):
+    return re.sub(r'\W+', '_', name.strip())
+
+
+def zipf_cum_weights(n, exponent):
+    """Cumulative weights of ranks 1..n under a Zipf law, for random.choices."""
+    return list(accumulate(1.0 / rank ** exponent for rank in range(1, n + 1)))
+
+
+def individual(name, class_name, literals=(), resources=()):
+    """One owl:NamedIndividual in the same layout as data/data.rdf."""
+    lines = [f'<owl:NamedIndividual rdf:about="#{name}">', f'  <rdf:type rdf:resource="#{class_name}"/>']
+    for prop, target in resources:
+        lines.append(f'  <{prop} rdf:resource="#{target}"/>')
+    for prop, datatype, value in literals:
+        lines.append(f'  <{prop} rdf:datatype="{XSD}{datatype}">{escape(str(value))}</{prop}>')
+    lines.append('</owl:NamedIndividual>')
+    return "\n".join(lines) + "\n"
+
+
+class SyntheticDataset:
+    """Seeded generator of Users, Music, Genre, Singer and Rating individuals.
+
+    Song popularity, user activity and genre sizes follow a Zipf law, so a
+    few songs collect most of the ratings, as in a real catalog. Every
+    (user, song) pair is rated at most once, and ratesGenre is always the
+    genre of the rated song.
+    """
+
+    def __init__(self, users=1000, musics=10000, ratings=100000, genres=20, singers=None,
+                 exponent=1.0, seed=0):
+        if min(users, musics, genres) <= 0 or ratings < 0:
+            raise ValueError("users, musics and genres must be positive and ratings non-negative")
+        if ratings > users * musics:
+            raise ValueError("ratings cannot exceed users * musics")
+        self.users = users
+        self.musics = musics
+        self.ratings = ratings
+        self.genres = genres
+        self.singers = singers or max(1, musics // 10)
+        self.exponent = exponent
+        self.seed = seed
+        self.counts = {'users': 0, 'musics': 0, 'ratings': 0, 'genres': 0, 'singers': 0}
+
+    def genre_name(self, i):
+        return f"genre {i + 1}"
+
+    def singer_name(self, i):
+        return f"singer {i + 1}"
+
+    def user_name(self, i):
+        return f"user{i + 1}"
+
+    def music_title(self, i, rng):
+        # O índice no fim garante títulos únicos (add_rating busca a música pelo título)
+        return f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i + 1}"
+
+    def individuals(self):
+        """Yield the serialized individuals one at a time."""
+        rng = random.Random(self.seed)
+
+        for i in range(self.genres):
+            name = self.genre_name(i)
+            self.counts['genres'] += 1
+            yield individual(f"Genre_{_safe_name(name)}", "Genre", [("genreName", "string", name)])
+
+        for i in range(self.singers):
+            name = self.singer_name(i)
+            self.counts['singers'] += 1
+            yield individual(f"Singer_{_safe_name(name)}", "Singer", [("singerName", "string", name)])
+
+        genre_weights = zipf_cum_weights(self.genres, self.exponent)
+        music_genres = rng.choices(range(self.genres), cum_weights=genre_weights, k=self.musics)
+        music_names = []
+        for i in range(self.musics):
+            title = self.music_title(i, rng)
+            name = f"Music_{_safe_name(title)}"
+            music_names.append(name)
+            self.counts['musics'] += 1
+            yield individual(name, "Music",
+                             [("title", "string", title), ("hasYear", "string", rng.randint(*YEARS))],
+                             [("hasSinger", f"Singer_{_safe_name(self.singer_name(rng.randrange(self.singers)))}"),
+                              ("hasGenre", f"Genre_{_safe_name(self.genre_name(music_genres[i]))}")])
+
+        user_names = []
+        for i in range(self.users):
+            name = self.user_name(i)
+            user_names.append(name)
+            self.counts['users'] += 1
+            yield individual(_safe_name(name), "User",
+                             [("userName", "string", name),
+                              ("birthYear", "integer", rng.randint(1950, 2010)),
+                              ("email", "string", f"{name}@example.com")])
+
+        # O posto de popularidade é sorteado, para que as músicas populares não sejam só as primeiras
+        music_ranks = list(range(self.musics))
+        user_ranks = list(range(self.users))
+        rng.shuffle(music_ranks)
+        rng.shuffle(user_ranks)
+        music_weights = zipf_cum_weights(self.musics, self.exponent)
+        user_weights = zipf_cum_weights(self.users, self.exponent)
+
+        seen = set()
+        while len(seen) < self.ratings:
+            batch = min(self.ratings - len(seen), 10000)
+            users = rng.choices(user_ranks, cum_weights=user_weights, k=batch)
+            musics = rng.choices(music_ranks, cum_weights=music_weights, k=batch)
+            stars = rng.choices(range(1, 6), weights=STAR_WEIGHTS, k=batch)
+            for user, music, star in zip(users, musics, stars):
+                pair = user * self.musics + music
+                if pair in seen:
+                    continue
+                seen.add(pair)
+                user_name = user_names[user]
+                title_name = music_names[music][len("Music_"):]
+                self.counts['ratings'] += 1
+                yield individual(_safe_name(f"{user_name}_{title_name}_rating"), "Rating",
+                                 [("stars", "integer", star)],
+                                 [("givenBy", _safe_name(user_name)),
+                                  ("ratesSong", music_names[music]),
+                                  ("ratesGenre", f"Genre_{_safe_name(self.genre_name(music_genres[music]))}")])
+
+
+def generate_dataset(output_path, schema_path=SCHEMA_FILE, **sizes):
+    """Write the schema of schema_path plus a synthetic dataset to output_path.
+
+    Returns the number of individuals written per class.
+    """
+    dataset = SyntheticDataset(**sizes)
+    extract_entities(schema_path, output_path, n_entities=0, extra=dataset.individuals())
+    return dataset.counts
+
+
+def import_quadstore(rdf_path, db_path):
+    """Load a generated RDF/XML file into an owlready2 SQLite quadstore,
+    in the layout OntologyRepository(backend='sqlite') expects."""
+    from owlready2 import World
+
+    world = World()
+    world.set_backend(filename=db_path, exclusive=False)
+    world.get_ontology(rdf_path).load()
+    world.save()
+    world.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic music ontology of configurable size.")
+    parser.add_argument("--schema", default=SCHEMA_FILE, help="RDF/XML file whose schema (classes, properties, rules) is copied")
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--sqlite", help="also import the generated file into this quadstore")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--musics", type=int, default=10000)
+    parser.add_argument("--ratings", type=int, default=100000)
+    parser.add_argument("--genres", type=int, default=20)
+    parser.add_argument("--singers", type=int, help="defaults to one singer per 10 songs")
+    parser.add_argument("--zipf", type=float, default=1.0, help="Zipf exponent of song popularity and user activity")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    counts = generate_dataset(args.output, schema_path=args.schema,
+                              users=args.users, musics=args.musics, ratings=args.ratings,
+                              genres=args.genres, singers=args.singers, exponent=args.zipf, seed=args.seed)
+    print(f"Wrote {counts} to {args.output}")
+    if args.sqlite:
+        import_quadstore(args.output, args.sqlite)
+        print(f"Imported into {args.sqlite}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,100 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session
-from application.ontology_service import OntologyService
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, g, make_response
+from application.page_cache import PageCache
+from application.startup import Startup
+from infrastructure.metrics import metrics
+import atexit
+import hashlib
 import os
+import time
 from functools import wraps
 
 app = Flask(__name__)
 app.secret_key = 'supersecretkey'  
 
 ontology_path = os.path.join(os.path.dirname(__file__), '../data/data.rdf')
-service = OntologyService(ontology_path)
-service.load_ontology()
+service = None
+# Páginas renderizadas, chaveadas pelo ETag (que já inclui a versão dos dados)
+pages = PageCache(int(os.environ.get('PAGE_CACHE_SIZE', '512')))
+# Desligadas, as métricas custam só um teste de flag por chamada
+metrics.enabled = os.environ.get('ONTOLOGY_METRICS') == '1'
+# Com write-behind, /rate espera no máximo isso por espaço na fila
+RATE_TIMEOUT = float(os.environ.get('RATE_TIMEOUT', '2'))
+
+def boot(startup):
+    global service
+    # owlready2 só é importado aqui, fora do import do app
+    with startup.phase('import'):
+        from application.ontology_service import OntologyService
+    with startup.phase('init'):
+        service = OntologyService(ontology_path,
+                                  backend=os.environ.get('ONTOLOGY_BACKEND', 'rdfxml'),
+                                  reasoner=os.environ.get('ONTOLOGY_REASONER', 'pellet'),
+                                  recommender=os.environ.get('ONTOLOGY_RECOMMENDER', 'rules'),
+                                  profile_rules=os.environ.get('ONTOLOGY_PROFILE_RULES') == '1')
+    opened = False
+    if os.environ.get('ONTOLOGY_SNAPSHOT') == '1':
+        with startup.phase('snapshot'):
+            opened = service.enable_snapshot()
+    if not opened:
+        # Sem snapshot válido o owlready2 carrega tudo já na inicialização
+        with startup.phase('load'):
+            service.load_ontology()
+    atexit.register(service.close)
+    metrics.gauge('ontology_entities', service.repo.stats, label='kind')
+    if os.environ.get('ONTOLOGY_BACKGROUND_REASONING') == '1':
+        # Inferência num processo separado; as rotas servem a última inferência concluída
+        with startup.phase('background_reasoning'):
+            service.enable_background_reasoning()
+    if os.environ.get('ONTOLOGY_WRITE_BEHIND') == '1':
+        # /rate responde na hora; as notas são aplicadas em lotes por uma thread
+        with startup.phase('write_behind'):
+            service.enable_write_behind(journal_path=os.environ.get('ONTOLOGY_JOURNAL'))
+    return service
+
+# Só o entry point sobe o serviço: importar o app não carrega a ontologia
+startup = Startup()
+
+def create_app():
+    """Start the boot in the background and return the WSGI app, e.g. gunicorn 'app:create_app()'."""
+    global startup
+    # A ontologia carrega numa thread: /healthz responde enquanto isso
+    startup = Startup().start(boot)
+    return app
+
+metrics.gauge('app_startup_phase_seconds', lambda: startup.phases, label='phase')
+
+@app.before_request
+def start_timer():
+    if metrics.enabled:
+        g.request_start = time.perf_counter()
+
+@app.before_request
+def require_ready():
+    if request.endpoint in ('healthz', 'readyz', 'metrics_endpoint', 'static') or startup.ready():
+        return None
+    return jsonify(startup.status()), 503, {'Retry-After': '1'}
+
+@app.after_request
+def observe_request(response):
+    if metrics.enabled and 'request_start' in g:
+        metrics.observe('http_request_seconds', time.perf_counter() - g.request_start,
+                        endpoint=request.endpoint or 'unknown', method=request.method, status=response.status_code)
+    return response
+
+@app.route('/healthz')
+def healthz():
+    return jsonify({'status': 'ok'})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    if not metrics.enabled:
+        return 'Metrics are disabled.', 404
+    return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@app.route('/readyz')
+def readyz():
+    status = startup.status()
+    return jsonify(status), 200 if status['status'] == 'ready' else 503
 
 def login_required(f):
     @wraps(f)
@@ -18,6 +104,35 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def cached_page(f):
+    # GET condicional: a versão dos dados decide, sem tocar na ontologia
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if session.get('_flashes'):
+            # Mensagens pendentes fazem parte da página: renderiza de novo
+            return f(*args, **kwargs)
+        version = service.view_version(session['user'])
+        key = '\0'.join((session['user'], request.full_path, version))
+        etag = hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+        if request.if_none_match.contains_weak(etag):
+            metrics.inc('http_page_cache_total', result='not_modified')
+            response = make_response('', 304)
+        else:
+            page = pages.get(etag)
+            metrics.inc('http_page_cache_total', result='miss' if page is None else 'hit')
+            if page is None:
+                page = f(*args, **kwargs)
+                if g.get('uncacheable'):
+                    # Sem ETag: um 304 esconderia a mensagem de erro da página
+                    return page
+                pages.put(etag, page)
+            response = make_response(page)
+        response.set_etag(etag, weak=True)
+        # O navegador guarda, mas sempre revalida com If-None-Match
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return decorated_function
+
 @app.route('/')
 def index():
     return redirect(url_for('login'))
@@ -59,6 +174,7 @@ def musics():
 
 @app.route('/list_musics')
 @login_required
+@cached_page
 def list_musics():
     search = request.args.get('search', '')
     order_by = request.args.get('order_by', 'title')
@@ -70,13 +186,23 @@ def list_musics():
     except ValueError:
         limit = 10
     
-    musics = service.list_musics(limit=limit, search=search, order_by=order_by, order_dir=order_dir, user_name=session['user'])
+    cursor = request.args.get('cursor') or None
     
-    for music in musics:
-        user_rating = service.get_user_rating(session['user'], music['title'])
-        music['user_rating'] = user_rating
+    # already_rated e user_rating já vêm na mesma consulta
+    try:
+        musics = service.list_musics(limit=limit, search=search, order_by=order_by, order_dir=order_dir,
+                                     user_name=session['user'], cursor=cursor)
+    except ValueError as e:
+        flash(str(e), 'error')
+        g.uncacheable = True
+        cursor = None
+        musics = service.list_musics(limit=limit, search=search, order_by=order_by, order_dir=order_dir,
+                                     user_name=session['user'])
     
-    return render_template('rate_music.html', musics=musics, user=session['user'])
+    # Página cheia: a próxima começa depois da última linha
+    next_cursor = musics[-1]['cursor'] if musics and len(musics) == limit else None
+    return render_template('rate_music.html', musics=musics, user=session['user'],
+                           cursor=cursor, next_cursor=next_cursor)
 
 @app.route('/rate', methods=['POST'])
 @login_required
@@ -110,7 +236,7 @@ def rate_music():
         return redirect(url_for('list_musics'))
     
     try:
-        service.add_rating(session['user'], music_title, genre, stars)
+        service.add_rating(session['user'], music_title, genre, stars, timeout=RATE_TIMEOUT)
         flash(f'Rating added for {music_title}!', 'success')
     except Exception as e:
         flash(str(e), 'error')
@@ -119,29 +245,39 @@ def rate_music():
 
 @app.route('/recommendations')
 @login_required
+@cached_page
 def recommendations():
     limit = request.args.get('limit', '10')
+    offset = request.args.get('offset', '0')
     search = request.args.get('search', '')
     try:
         limit = int(limit)
     except ValueError:
         limit = 10
+    try:
+        offset = int(offset)
+    except ValueError:
+        offset = 0
+    cursor = request.args.get('cursor') or None
     
-    recommended_musics = service.list_recommended_musics(session['user'], 1000)
-    if search:
-        filtered_musics = []
-        for music in recommended_musics:
-            if search.lower() in music['title'].lower():
-                filtered_musics.append(music)
-        recommended_musics = filtered_musics
-
-    recommended_musics = recommended_musics[:limit]
+    try:
+        recommended_musics = service.list_recommended_musics(session['user'], limit, search=search, offset=offset,
+                                                             cursor=cursor)
+    except ValueError as e:
+        flash(str(e), 'error')
+        g.uncacheable = True
+        cursor = None
+        recommended_musics = service.list_recommended_musics(session['user'], limit, search=search, offset=offset)
     
+    next_cursor = recommended_musics[-1]['cursor'] if recommended_musics and len(recommended_musics) == limit else None
     return render_template('recommended.html', 
                          musics=recommended_musics, 
                          user=session['user'], 
                          limit=limit,
-                         search=search)
+                         search=search,
+                         cursor=cursor,
+                         next_cursor=next_cursor,
+                         staleness=service.reasoning_staleness())
 
 @app.route('/add_music', methods=['GET', 'POST'])
 @login_required
@@ -168,4 +304,7 @@ def logout():
     return redirect(url_for('login'))
 
 if __name__ == '__main__':
+    # Com o reloader do modo debug, só o processo filho serve as requisições
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        create_app()
     app.run(debug=True)
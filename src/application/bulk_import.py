@@ -0,0 +1,26 @@
+import csv
+import json
+import os
+
+FORMATS = ('.csv', '.jsonl', '.ndjson')
+
+
+def read_records(path: str):
+    """Stream records from a CSV (with header) or JSON Lines file, one dict per row."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported file format: {path}")
+    return _read_csv(path) if extension == '.csv' else _read_jsonl(path)
+
+
+def _read_csv(path: str):
+    with open(path, newline='', encoding='utf-8') as f:
+        yield from csv.DictReader(f)
+
+
+def _read_jsonl(path: str):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
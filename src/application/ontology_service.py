@@ -1,33 +1,139 @@
+import time
+from application.bulk_import import read_records
 from infrastructure.ontology_repository import OntologyRepository
+from infrastructure.reasoning_scheduler import ReasoningScheduler
+from infrastructure.write_behind import WriteBehindQueue
 
 class OntologyService:
-    def __init__(self, ontology_path: str):
-        self.repo = OntologyRepository(ontology_path)
+    def __init__(self, ontology_path: str, backend: str = 'rdfxml', db_path: str = None, reasoner: str = 'pellet',
+                 recommender: str = 'rules', profile_rules: bool = False):
+        self.repo = OntologyRepository(ontology_path, backend=backend, db_path=db_path, reasoner=reasoner,
+                                       recommender=recommender, profile_rules=profile_rules)
         self.ontology = None
+        self.writes = None
+        self.scheduler = None
+        self.snapshots = False
 
     def load_ontology(self):
         self.ontology = self.repo.load()
         return self.ontology
 
+    def enable_snapshot(self):
+        """Serve reads from the snapshot written by the last close(), if it is
+        still current, and write a new one on close. True if it was opened."""
+        self.snapshots = True
+        return self.repo.open_snapshot()
+
+    def save_snapshot(self):
+        return self.repo.write_snapshot()
+
+    def enable_write_behind(self, max_pending: int = 1000, batch_size: int = 200, journal_path: str = None):
+        """Acknowledge ratings right away and apply them in background batches."""
+        self.writes = WriteBehindQueue(self.repo, max_pending=max_pending, batch_size=batch_size,
+                                       journal_path=journal_path).start()
+        return self.writes
+
+    def enable_background_reasoning(self, debounce: float = 0.5, max_delay: float = 5.0):
+        """Run inference in a worker process instead of inside the requests."""
+        self.scheduler = ReasoningScheduler(self.repo, debounce=debounce, max_delay=max_delay).start()
+        self.repo.scheduler = self.scheduler
+        if self.repo.onto is not None:
+            # Primeira inferência sobre o estado carregado (a do snapshot já está pronta)
+            self.scheduler.notify()
+        return self.scheduler
+
+    def profile_reasoning(self):
+        return self.repo.profile_reasoning()
+
+    def view_version(self, user_name: str = None):
+        """Changes whenever the pages of user_name could change, pending ratings included."""
+        version = self.repo.view_version(user_name)
+        if self.writes is not None and user_name:
+            version += f".{self.writes.version(user_name)}"
+        return version
+
+    def reasoning_staleness(self):
+        return self.scheduler.staleness() if self.scheduler else None
+
+    def close(self):
+        if self.writes is not None:
+            self.writes.stop()
+            self.writes = None
+        if self.scheduler:
+            self.repo.scheduler = None
+            self.scheduler.stop()
+            self.scheduler = None
+        if self.snapshots:
+            try:
+                self.save_snapshot()
+            except Exception as e:
+                print("Error writing snapshot:", e)
+
+    def import_ontology(self, rdf_path: str = None):
+        self.ontology = self.repo.import_rdf(rdf_path)
+        return self.ontology
+
+    def export_ontology(self, rdf_path: str = None):
+        return self.repo.export_rdf(rdf_path)
+
     def register_user(self, userName: str, birthYear: str, email: str):
         return self.repo.add_user(userName, int(birthYear), email)
 
     def add_music(self, title: str, year: str, singer: str, genre: str):
         return self.repo.add_music(title, year, singer, genre)
 
+    def bulk_import(self, users_path: str = None, musics_path: str = None, ratings_path: str = None):
+        start = time.perf_counter()
+        counts = self.repo.bulk_load(
+            users=read_records(users_path) if users_path else (),
+            musics=read_records(musics_path) if musics_path else (),
+            ratings=read_records(ratings_path) if ratings_path else (),
+        )
+        elapsed = time.perf_counter() - start
+        rows = counts['users'] + counts['musics'] + counts['ratings']
+        counts['seconds'] = elapsed
+        counts['rows_per_second'] = rows / elapsed if elapsed else 0.0
+        return counts
+
     def get_user(self, userName: str, email: str):
         return self.repo.get_user(userName, email)
 
-    def list_musics(self, limit=10, search='', order_by='title', order_dir='asc', user_name=None):
-        return self.repo.list_musics(limit=limit, search=search, order_by=order_by, order_dir=order_dir, user_name=user_name)
+    def list_musics(self, limit=10, search='', order_by='title', order_dir='asc', user_name=None, cursor=None):
+        musics = self.repo.list_musics(limit=limit, search=search, order_by=order_by, order_dir=order_dir,
+                                       user_name=user_name, cursor=cursor)
+        if user_name and self.writes is not None:
+            # Notas ainda na fila aparecem para quem as deu
+            pending = self.writes.pending_ratings(user_name)
+            for music in musics:
+                if music['title'] in pending:
+                    music['already_rated'] = True
+                    music['user_rating'] = pending[music['title']]
+        return musics
 
-    def add_rating(self, userName: str, music_title: str, genre_name: str, stars: int):
+    def add_rating(self, userName: str, music_title: str, genre_name: str, stars: int, timeout: float = None):
+        if self.writes is not None:
+            # timeout: quanto esperar por espaço na fila antes de recusar a nota
+            return self.writes.submit(userName, music_title, stars, timeout=timeout)
         return self.repo.add_rating(userName, music_title, genre_name, stars)
 
     def get_user_rating(self, userName: str, music_title: str):
+        if self.writes is not None:
+            stars = self.writes.pending_rating(userName, music_title)
+            if stars is not None:
+                return stars
         return self.repo.get_user_rating(userName, music_title)
 
-    def list_recommended_musics(self, user_name, limit=10):
-        return self.repo.list_recommended_musics(user_name, limit)
+    def get_user_ratings(self, userName: str, music_titles):
+        ratings = self.repo.get_user_ratings(userName, music_titles)
+        if self.writes is not None:
+            pending = self.writes.pending_ratings(userName)
+            ratings.update({title: pending[title] for title in ratings if title in pending})
+        return ratings
+
+    def list_recommended_musics(self, user_name, limit=10, search='', offset=0, cursor=None):
+        return self.repo.list_recommended_musics(user_name, limit, search=search, offset=offset, cursor=cursor)
+
+    def iter_recommended_musics(self, user_name, search='', offset=0, cursor=None):
+        return self.repo.iter_recommended_musics(user_name, search=search, offset=offset, cursor=cursor)
 
 
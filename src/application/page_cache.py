@@ -0,0 +1,43 @@
+import threading
+from collections import OrderedDict
+
+
+class PageCache:
+    """Rendered pages keyed by their ETag, bounded with LRU eviction.
+
+    The ETag already carries the data version, so entries are never
+    invalidated: a write changes the key, and stale pages age out.
+    """
+
+    def __init__(self, max_pages: int = 512):
+        self.max_pages = max_pages
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._pages)
+
+    def get(self, etag):
+        with self._lock:
+            page = self._pages.get(etag)
+            if page is None:
+                self.misses += 1
+                return None
+            self._pages.move_to_end(etag)
+            self.hits += 1
+            return page
+
+    def put(self, etag, page):
+        if self.max_pages <= 0:
+            return
+        with self._lock:
+            self._pages[etag] = page
+            self._pages.move_to_end(etag)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
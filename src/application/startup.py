@@ -0,0 +1,72 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Startup:
+    """Runs the application boot in a background thread.
+
+    The process answers liveness checks right away; it is ready once the boot
+    function returns. Each phase() is timed, so status() shows where the
+    cold-start time went, and a failed boot keeps its error.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.result = None
+        self.error = None
+        self.started = None
+        self.finished = None
+        self._ready = threading.Event()
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self, boot):
+        """Call boot(startup) in a daemon thread; its return value becomes result."""
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, args=(boot,), name='startup', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self, boot):
+        try:
+            self.result = boot(self)
+            self._ready.set()
+        except Exception as e:
+            self.error = e
+            print("Error starting:", e)
+        finally:
+            self.finished = time.perf_counter()
+            self._done.set()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+            print(f"Startup {name}: {self.phases[name]:.3f}s")
+
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout: float = None):
+        """Block until the boot finishes; True if it succeeded."""
+        self._done.wait(timeout)
+        return self.ready()
+
+    def status(self):
+        if self.ready():
+            state = 'ready'
+        elif self.error is not None:
+            state = 'failed'
+        else:
+            state = 'starting'
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return {
+            'status': state,
+            'elapsed_seconds': end - self.started if self.started is not None else 0.0,
+            'phases': dict(self.phases),
+            'error': str(self.error) if self.error is not None else None,
+        }
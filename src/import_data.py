@@ -0,0 +1,25 @@
+import argparse
+import os
+from application.ontology_service import OntologyService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import users, songs and ratings from CSV or JSON Lines files.")
+    parser.add_argument('--ontology', default=os.path.join(os.path.dirname(__file__), '../data/data.rdf'))
+    parser.add_argument('--backend', default='rdfxml', choices=['rdfxml', 'sqlite'])
+    parser.add_argument('--reasoner', default='pellet', choices=['pellet', 'native', 'incremental', 'matrix'])
+    parser.add_argument('--users', help="userName,birthYear,email")
+    parser.add_argument('--musics', help="title,year,singer,genre")
+    parser.add_argument('--ratings', help="userName,title,stars")
+    args = parser.parse_args()
+
+    service = OntologyService(args.ontology, backend=args.backend, reasoner=args.reasoner)
+    service.load_ontology()
+    report = service.bulk_import(users_path=args.users, musics_path=args.musics, ratings_path=args.ratings)
+    print(f"Imported {report['users']} users, {report['musics']} songs and {report['ratings']} ratings "
+          f"({report['skipped']} skipped) in {report['seconds']:.2f}s "
+          f"({report['rows_per_second']:.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+
+SORT_FIELDS = ('title', 'year', 'singer')
+
+
+def music_sort_key(music, order_by):
+    if order_by == 'title':
+        return music.title[0] if hasattr(music, 'title') and music.title else ""
+    elif order_by == 'year':
+        return music.hasYear[0] if hasattr(music, 'hasYear') and music.hasYear else ""
+    elif order_by == 'singer':
+        return (music.hasSinger[0].singerName[0]
+                if hasattr(music, 'hasSinger') and music.hasSinger and hasattr(music.hasSinger[0], 'singerName') and music.hasSinger[0].singerName else "")
+    return ""
+
+
+class CatalogIndex:
+    """Songs kept sorted by every supported order_by, so a page is read from
+    the front (or the back, for 'desc') of a list instead of sorting the catalog.
+
+    Entries are (sort key, storid); the storid breaks ties between equal keys,
+    so an entry is also a stable cursor: the page after it starts at a
+    binary search. Unsupported order_by values fall back to catalog
+    (insertion) order, resumed by storid.
+    """
+
+    def __init__(self):
+        self._musics = {}                                   # storid -> music, em ordem de inserção
+        self._entries = {field: [] for field in SORT_FIELDS}
+        self._keys = {}                                     # storid -> {field: entry}
+
+    def __len__(self):
+        return len(self._musics)
+
+    def __iter__(self):
+        return iter(self._musics.values())
+
+    def rebuild(self, musics):
+        self._musics.clear()
+        self._keys.clear()
+        for music in musics:
+            self._musics[music.storid] = music
+            self._keys[music.storid] = {field: (music_sort_key(music, field), music.storid) for field in SORT_FIELDS}
+        for field in SORT_FIELDS:
+            self._entries[field] = sorted(keys[field] for keys in self._keys.values())
+
+    def add(self, music):
+        """Insert a new song or re-position an updated one."""
+        old_keys = self._keys.get(music.storid)
+        new_keys = {field: (music_sort_key(music, field), music.storid) for field in SORT_FIELDS}
+        self._musics[music.storid] = music
+        self._keys[music.storid] = new_keys
+        for field in SORT_FIELDS:
+            entries = self._entries[field]
+            if old_keys:
+                if old_keys[field] == new_keys[field]:
+                    continue
+                i = bisect_left(entries, old_keys[field])
+                if i < len(entries) and entries[i] == old_keys[field]:
+                    del entries[i]
+            insort(entries, new_keys[field])
+
+    def sort_key(self, music, order_by):
+        keys = self._keys.get(music.storid)
+        if keys and order_by in keys:
+            return keys[order_by]
+        return ("", music.storid)
+
+    def iter_sorted(self, order_by='title', descending=False, after=None):
+        """Songs in order, starting right after the `after` (sort key, storid) entry."""
+        if order_by not in self._entries:
+            musics = iter(self._musics.values())
+            return (music for music in musics if music.storid > after[1]) if after else musics
+        entries = self._entries[order_by]
+        if descending:
+            end = bisect_left(entries, tuple(after)) if after else len(entries)
+            positions = range(end - 1, -1, -1)
+        else:
+            positions = range(bisect_right(entries, tuple(after)) if after else 0, len(entries))
+        return (self._musics[entries[i][1]] for i in positions)
+
+    def first(self, order_by='title', limit=10, descending=False, after=None):
+        """A page of the whole catalog: O(log n + limit), wherever it starts."""
+        return list(islice(self.iter_sorted(order_by, descending, after), max(limit, 0)))
+
+    def is_after(self, music, order_by, after, descending=False):
+        if order_by not in self._entries:
+            descending = False
+        key = self.sort_key(music, order_by)
+        return key < tuple(after) if descending else key > tuple(after)
+
+    def top_k(self, candidates, order_by='title', limit=10, descending=False, after=None):
+        """A page of a filtered subset: O(n log k) with a bounded heap."""
+        if after:
+            candidates = [music for music in candidates if self.is_after(music, order_by, after, descending)]
+        if order_by not in self._entries:
+            return heapq.nsmallest(max(limit, 0), candidates, key=lambda music: music.storid)
+        select = heapq.nlargest if descending else heapq.nsmallest
+        return select(max(limit, 0), candidates, key=lambda music: self.sort_key(music, order_by))
@@ -0,0 +1,141 @@
+import heapq
+from collections import defaultdict
+from math import sqrt
+
+from infrastructure.rule_engine import MIN_LIKED_STARS
+
+SIMILARITIES = ('cosine', 'jaccard')
+
+
+class NeighborIndex:
+    """Top-K most similar users of every user, over their rating vectors.
+
+    Similarities are only computed against co-raters (users who rated at least
+    one song in common), found through the per-song rater lists. update()
+    refreshes the rater's neighbors and offers the new similarity to each
+    co-rater, so a rating never triggers a full rebuild.
+
+    recommend() ranks the songs liked (4-5 stars) by the K neighbors and not
+    yet rated by the user, by the sum of similarity x stars: its cost is
+    O(K x neighbor ratings), independent of how many users share a genre.
+    """
+
+    def __init__(self, k: int = 20, similarity: str = 'cosine'):
+        if similarity not in SIMILARITIES:
+            raise ValueError(f"Unknown similarity: {similarity}")
+        self.k = k
+        self.similarity = similarity
+        self.vectors = defaultdict(dict)  # user -> {music: stars}
+        self.raters = defaultdict(dict)   # music -> {user: stars}
+        self.norms = {}                   # user -> norma do vetor de notas
+        self.neighbors = {}               # user -> [(similarity, other)], mais similar primeiro
+        self.reverse = defaultdict(set)   # other -> users que o têm entre os vizinhos
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def rebuild(self, ratings):
+        self.vectors.clear()
+        self.raters.clear()
+        self.norms.clear()
+        self.neighbors.clear()
+        self.reverse.clear()
+        for rating in ratings:
+            self._set(rating)
+        for user in list(self.vectors):
+            self._refresh(user)
+
+    def update(self, rating):
+        """Apply an inserted or updated Rating.
+
+        Returns the users whose recommendations may have changed: the rater,
+        whoever has the rater among their neighbors, and every co-rater whose
+        neighbor list changed.
+        """
+        affected = set()
+        for user in self._set(rating):
+            affected.add(user)
+            affected.update(self.reverse[user])
+            scores = self._similarities(user)
+            self._refresh(user, scores)
+            for other, score in scores.items():
+                if self._offer(other, user, score):
+                    affected.add(other)
+        return affected
+
+    def _set(self, rating):
+        users = set()
+        stars = getattr(rating, 'stars', None)
+        if not stars:
+            return users
+        for user in getattr(rating, 'givenBy', []):
+            for music in getattr(rating, 'ratesSong', []):
+                self.vectors[user][music] = stars[0]
+                self.raters[music][user] = stars[0]
+                users.add(user)
+        for user in users:
+            self.norms[user] = sqrt(sum(value * value for value in self.vectors[user].values()))
+        return users
+
+    def _similarities(self, user):
+        vector = self.vectors.get(user, {})
+        dots = defaultdict(float)
+        overlap = defaultdict(int)
+        for music, stars in vector.items():
+            for other, other_stars in self.raters[music].items():
+                if other != user:
+                    dots[other] += stars * other_stars
+                    overlap[other] += 1
+        if self.similarity == 'jaccard':
+            return {other: common / (len(vector) + len(self.vectors[other]) - common)
+                    for other, common in overlap.items()}
+        norm = self.norms.get(user, 0.0)
+        return {other: dot / (norm * self.norms[other])
+                for other, dot in dots.items() if norm and self.norms[other]}
+
+    def _refresh(self, user, scores=None):
+        if scores is None:
+            scores = self._similarities(user)
+        for _, other in self.neighbors.get(user, ()):
+            self.reverse[other].discard(user)
+        top = heapq.nlargest(self.k, ((score, other) for other, score in scores.items() if score > 0),
+                             key=lambda entry: entry[0])
+        self.neighbors[user] = top
+        for _, other in top:
+            self.reverse[other].add(user)
+
+    def _offer(self, user, candidate, score):
+        """Update `candidate` in the neighbor list of `user`; True if the list changed."""
+        current = self.neighbors.setdefault(user, [])
+        position = next((i for i, (_, other) in enumerate(current) if other == candidate), None)
+        if position is not None:
+            old_score = current[position][0]
+            if old_score == score:
+                return False
+            if score < old_score and len(current) >= self.k:
+                # Caiu de posição com a lista cheia: alguém de fora pode passar à frente
+                self._refresh(user)
+                return True
+            current[position] = (score, candidate)
+        elif score > 0 and (len(current) < self.k or score > current[-1][0]):
+            current.append((score, candidate))
+            self.reverse[candidate].add(user)
+        else:
+            return False
+        current.sort(key=lambda entry: entry[0], reverse=True)
+        for _, dropped in current[self.k:]:
+            self.reverse[dropped].discard(user)
+        del current[self.k:]
+        return True
+
+    def recommend(self, user, limit=None):
+        """Songs liked by the neighbors of user and not rated by them, best first."""
+        rated = self.vectors.get(user, {})
+        scores = defaultdict(float)
+        for score, other in self.neighbors.get(user, ()):
+            for music, stars in self.vectors[other].items():
+                if stars >= MIN_LIKED_STARS and music not in rated:
+                    scores[music] += score * stars
+        if limit is None:
+            return sorted(scores, key=scores.get, reverse=True)
+        return heapq.nlargest(limit, scores, key=scores.get)
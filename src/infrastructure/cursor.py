@@ -0,0 +1,46 @@
+import base64
+import json
+
+
+def encode_cursor(position: dict):
+    """Opaque, URL-safe token for a page position (base64 of its JSON)."""
+    data = json.dumps(position, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        position = json.loads(data.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor.")
+    if not isinstance(position, dict) or not isinstance(position.get('i'), int):
+        raise ValueError("Invalid cursor.")
+    return position
+
+
+def catalog_cursor(order_by: str, order_dir: str, sort_key):
+    """Cursor after a catalog row: its (sort key, storid) under the active order."""
+    key, storid = sort_key
+    return encode_cursor({'o': order_by, 'd': order_dir, 'k': key, 'i': storid})
+
+
+def decode_catalog_cursor(cursor: str, order_by: str, order_dir: str):
+    """The (sort key, storid) a catalog page resumes after."""
+    position = decode_cursor(cursor)
+    if position.get('o') != order_by or position.get('d') != order_dir or not isinstance(position.get('k'), str):
+        # Cursor de outra ordenação: a posição não faz sentido nesta
+        raise ValueError("Invalid cursor.")
+    return position['k'], position['i']
+
+
+def list_cursor(position: int, storid: int):
+    """Cursor after the row at `position` - 1 of a ranked list, holding its storid."""
+    return encode_cursor({'p': position, 'i': storid})
+
+
+def decode_list_cursor(cursor: str):
+    position = decode_cursor(cursor)
+    if not isinstance(position.get('p'), int) or position['p'] < 0:
+        raise ValueError("Invalid cursor.")
+    return position['p'], position['i']
@@ -0,0 +1,106 @@
+from collections import defaultdict
+
+from infrastructure.rule_engine import MIN_LIKED_STARS, RuleEngine
+
+
+def _import_sparse():
+    # numpy/scipy são opcionais: só o reasoner 'matrix' precisa deles
+    try:
+        import numpy
+        from scipy import sparse
+    except ImportError as e:
+        raise ImportError("The matrix reasoner requires numpy and scipy (pip install numpy scipy)") from e
+    return numpy, sparse
+
+
+class MatrixEngine(RuleEngine):
+    """Batched evaluation of the same SWRL rules as RuleEngine, as sparse
+    matrix products over every user at once.
+
+    stars:       users x songs, highest star value given to each song
+    song_genres: songs x genres, hasGenre incidence
+    preferences: users x genres, ratings of 4-5 stars by ratesGenre     (rule1)
+    recommended: preferences @ (song_genres.T + preferences.T @ liked)  (rule2 + rule3)
+
+    where liked is stars >= 4. Grouping rule3 through the genres keeps the
+    intermediate result genres x songs instead of users x users.
+    """
+
+    def run(self):
+        numpy, sparse = _import_sparse()
+        self.load_facts()
+
+        users, musics, genres = set(self.users), set(self.music_genres), set()
+        for facts in self.ratings.values():
+            for user, music, genre, _ in facts:
+                users.add(user)
+                if music is not None:
+                    musics.add(music)
+                if genre is not None:
+                    genres.add(genre)
+        for music_genres in self.music_genres.values():
+            genres.update(music_genres)
+
+        # Ordem estável (storid) para que as linhas e colunas sejam reproduzíveis
+        self.user_index = sorted(users, key=lambda entity: entity.storid)
+        self.music_index = sorted(musics, key=lambda entity: entity.storid)
+        self.genre_index = sorted(genres, key=lambda entity: entity.storid)
+        user_pos = {user: i for i, user in enumerate(self.user_index)}
+        music_pos = {music: i for i, music in enumerate(self.music_index)}
+        genre_pos = {genre: i for i, genre in enumerate(self.genre_index)}
+        shape_ug = (len(self.user_index), len(self.genre_index))
+
+        stars = {}
+        liked_genres = set()
+        for facts in self.ratings.values():
+            for user, music, genre, value in facts:
+                if music is not None:
+                    key = (user_pos[user], music_pos[music])
+                    stars[key] = max(stars.get(key, 0), value)
+                if genre is not None and value >= MIN_LIKED_STARS:
+                    liked_genres.add((user_pos[user], genre_pos[genre]))
+
+        self.stars = self._matrix(sparse, numpy, stars.keys(), (len(self.user_index), len(self.music_index)),
+                                  values=list(stars.values()))
+        self.song_genres = self._matrix(sparse, numpy, ((music_pos[music], genre_pos[genre])
+                                                        for music, music_genres in self.music_genres.items()
+                                                        for genre in music_genres),
+                                        (len(self.music_index), len(self.genre_index)))
+        self.preference_matrix = self._matrix(sparse, numpy, liked_genres, shape_ug)
+
+        liked = self.stars.copy()
+        liked.data = (liked.data >= MIN_LIKED_STARS).astype(numpy.int32)
+        liked.eliminate_zeros()
+        self.recommendation_matrix = (self.preference_matrix @ (
+            self.song_genres.T + self.preference_matrix.T @ liked)).tocsr()
+        self.recommendation_matrix.eliminate_zeros()
+
+        self._read_back()
+        return self
+
+    @staticmethod
+    def _matrix(sparse, numpy, cells, shape, values=None):
+        cells = list(cells)
+        rows = numpy.fromiter((row for row, _ in cells), dtype=numpy.int64, count=len(cells))
+        cols = numpy.fromiter((col for _, col in cells), dtype=numpy.int64, count=len(cells))
+        data = numpy.ones(len(cells), dtype=numpy.int32) if values is None else numpy.asarray(values, dtype=numpy.int32)
+        matrix = sparse.csr_matrix((data, (rows, cols)), shape=shape)
+        if values is None:
+            # Incidência: fatos repetidos somam, mas só importa a presença
+            matrix.data[:] = 1
+        return matrix
+
+    def _read_back(self):
+        self.preferences = defaultdict(set)
+        self.genre_users = defaultdict(set)
+        self.recommendations = defaultdict(set)
+        preferences = self.preference_matrix.tocsr()
+        for i, user in enumerate(self.user_index):
+            for j in preferences.indices[preferences.indptr[i]:preferences.indptr[i + 1]]:
+                genre = self.genre_index[j]
+                self.preferences[user].add(genre)
+                self.genre_users[genre].add(user)
+            row = self.recommendation_matrix.indices[
+                self.recommendation_matrix.indptr[i]:self.recommendation_matrix.indptr[i + 1]]
+            if len(row):
+                self.recommendations[user] = {self.music_index[j] for j in row}
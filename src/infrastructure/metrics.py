@@ -0,0 +1,138 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """Counters, latency histograms and gauges, rendered in the Prometheus
+    text exposition format.
+
+    Disabled by default: timed() then costs a single attribute check per
+    call, and inc()/observe() return immediately. Gauges are callables
+    evaluated only when the metrics are rendered.
+    """
+
+    def __init__(self, enabled: bool = False, buckets=BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters = {}     # name -> {labels: value}
+        self._histograms = {}   # name -> {labels: [contagem por bucket..., acima do último, soma, total]}
+        self._gauges = {}       # name -> (fn, label)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        if not self.enabled:
+            return
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            values = series.get(key)
+            if values is None:
+                values = series[key] = [0] * (len(self.buckets) + 3)
+            values[bisect_left(self.buckets, seconds)] += 1
+            values[-2] += seconds
+            values[-1] += 1
+
+    def timed(self, name: str, **labels):
+        """Decorator observing the duration of each call into histogram `name`."""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start, **labels)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Context manager form of timed()."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def gauge(self, name: str, fn, label: str = None):
+        """Register a gauge; fn() returns a number, or {label value: number} when `label` is given."""
+        with self._lock:
+            self._gauges[name] = (fn, label)
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._gauges.clear()
+
+    def render(self):
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: {key: list(values) for key, values in series.items()}
+                          for name, series in self._histograms.items()}
+            gauges = dict(self._gauges)
+
+        lines = []
+        for name, series in sorted(counters.items()):
+            lines.append(f'# TYPE {name} counter')
+            lines.extend(f'{name}{_format_labels(key)} {_format_value(value)}' for key, value in sorted(series.items()))
+        for name, series in sorted(histograms.items()):
+            lines.append(f'# TYPE {name} histogram')
+            for key, values in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, values):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_format_labels(key + (("le", repr(bound)),))} {cumulative}')
+                lines.append(f'{name}_bucket{_format_labels(key + (("le", "+Inf"),))} {values[-1]}')
+                lines.append(f'{name}_sum{_format_labels(key)} {_format_value(values[-2])}')
+                lines.append(f'{name}_count{_format_labels(key)} {values[-1]}')
+        for name, (fn, label) in sorted(gauges.items()):
+            try:
+                value = fn()
+            except Exception as e:
+                print("Error reading gauge:", name, e)
+                continue
+            lines.append(f'# TYPE {name} gauge')
+            if label is None:
+                lines.append(f'{name} {_format_value(value)}')
+            else:
+                lines.extend(f'{name}{_format_labels(((label, key),))} {_format_value(v)}'
+                             for key, v in sorted(value.items()))
+        return '\n'.join(lines) + '\n'
+
+
+# Registro do processo: o repositório, o agendador e as rotas publicam aqui
+metrics = Metrics()
@@ -1,28 +1,322 @@
+import os
 import re
+from contextlib import contextmanager
+from functools import wraps
+from itertools import islice
 from typing import Optional
 from owlready2 import *
+from infrastructure.catalog_index import CatalogIndex
+from infrastructure.collaborative_filtering import NeighborIndex
+from infrastructure.cursor import catalog_cursor, decode_catalog_cursor, decode_list_cursor, list_cursor
+from infrastructure.matrix_engine import MatrixEngine
+from infrastructure.metrics import metrics
+from infrastructure.rating_index import RatingIndex
+from infrastructure.recommendation_cache import RecommendationCache
+from infrastructure.rule_engine import MIN_LIKED_STARS, STAR_VALUES, RuleEngine
+from infrastructure.rule_profiler import RuleProfiler
+from infrastructure.rwlock import ReadWriteLock
+from infrastructure.snapshot import Snapshot, read_source, write_snapshot
+from infrastructure.title_index import TitleIndex
 
 def _safe_name(name: str):
     return re.sub(r'\W+', '_', name.strip())
 
+def _checked_stars(star_value):
+    if int(star_value) not in STAR_VALUES:
+        raise Exception("Rating must be between 1 and 5.")
+    return int(star_value)
+
+def _timed(method):
+    # O tempo medido inclui a espera pelo lock
+    return metrics.timed('ontology_repository_seconds', method=method.__name__)(method)
+
+def _writer(method):
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        with self.lock.write():
+            return method(self, *args, **kwargs)
+    return _timed(locked)
+
+def _reader(method):
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._reading():
+            return method(self, *args, **kwargs)
+    return _timed(locked)
+
 class OntologyRepository:
-    def __init__(self, path: str):
+    BACKENDS = ('rdfxml', 'sqlite')
+    REASONERS = ('pellet', 'native', 'incremental', 'matrix')
+    RECOMMENDERS = ('rules', 'collaborative')
+
+    def __init__(self, path: str, backend: str = 'rdfxml', db_path: Optional[str] = None,
+                 reasoner: str = 'pellet', recommendation_cache_size: int = 1024,
+                 recommender: str = 'rules', neighbors: int = 20, snapshot_path: Optional[str] = None,
+                 profile_rules: bool = False):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+        if reasoner not in self.REASONERS:
+            raise ValueError(f"Unknown reasoner: {reasoner}")
+        if recommender not in self.RECOMMENDERS:
+            raise ValueError(f"Unknown recommender: {recommender}")
         self.path = path
+        self.backend = backend
+        self.db_path = db_path or os.path.splitext(path)[0] + '.sqlite3'
+        # Carimbo dos commits no quadstore: só as escritas de dados o tocam
+        self.commit_path = self.db_path + '-commit'
+        self.snapshot_path = snapshot_path or os.path.splitext(path)[0] + '.snapshot'
+        self.world = default_world if backend == 'rdfxml' else None
+        self.reasoner = reasoner
+        self.recommender = recommender
+        self.rule_engine = None
+        # Com profile_rules, o motor nativo mede cada regra; o último relatório fica em rule_profile
+        self.profile_rules = profile_rules
+        self.rule_profile = None
+        self.recommendations = RecommendationCache(recommendation_cache_size)
+        self.rating_index = RatingIndex()
+        self.catalog_index = CatalogIndex()
+        self.title_index = TitleIndex()
+        # Usuários e títulos avaliáveis (com gênero), lidos sem lock por can_rate
+        self.user_names = set()
+        self.rateable_titles = set()
+        # Modo colaborativo: recomendações vêm dos K vizinhos mais similares, não das regras
+        self.neighbor_index = NeighborIndex(neighbors) if recommender == 'collaborative' else None
+        self._rows = {}
         self.onto = None
-
+        # Enquanto a ontologia não é carregada, as leituras vêm do snapshot mapeado em memória
+        self.snapshot = None
+        self._file_stamp = None
+        # Leitores concorrentes, escritores serializados (load/reload também escrevem)
+        self.lock = ReadWriteLock()
+        # Com um ReasoningScheduler a inferência sai do caminho da requisição
+        self.scheduler = None
+        # Versões dos dados, lidas sem lock para ETags: toda escrita incrementa version;
+        # catalog_version marca mudanças que valem para todos, user_versions as de cada usuário.
+        # Contam a partir do stamp dos dados carregados, não de um id do processo
+        self.version = 0
+        self.catalog_version = 0
+        self.user_versions = {}
+        self._base_stamp = None
+
+    @_writer
     def load(self):
         try:
-            self.onto = get_ontology(self.path).load()
-            self.ensure_classes()
+            if self.backend == 'sqlite':
+                self.onto = self._load_quadstore()
+            else:
+                self.onto = get_ontology(self.path).load()
+            self._prepare()
             print("Loaded!")
         except Exception as e:
             print("Error loading:", e)
-            self.onto = get_ontology(self.path)
+            self.onto = self.world.get_ontology(self.path)
+        return self.onto
+
+    def _prepare(self):
+        # Recria tudo o que é derivado da ontologia carregada
+        self.ensure_classes()
+        # Não fecha o snapshot: geradores em andamento ainda podem ler dele
+        self.snapshot = None
+        self._file_stamp = self._get_file_stamp()
+        self.recommendations.clear()
+        self._rebase(self._file_stamp)
+        self.rating_index.rebuild(self._instances('Rating'))
+        self.catalog_index.rebuild(self._instances('Music'))
+        self.title_index.rebuild(self._instances('Music'))
+        # Troca os conjuntos inteiros: quem lê sem lock nunca vê um conjunto pela metade
+        self.user_names = {u.userName[0] for u in self._instances('User') if u.userName}
+        self.rateable_titles = {m.title[0] for m in self._instances('Music') if m.title and m.hasGenre}
+        if self.neighbor_index is not None:
+            self.neighbor_index.rebuild(self._instances('Rating'))
+        self._rows.clear()
+        if self.reasoner == 'incremental':
+            self.reason()
+
+    def _load_quadstore(self):
+        if self.world is None:
+            self.world = World()
+            self.world.set_backend(filename=self.db_path, exclusive=False)
+            # Abrir o banco deixa uma transação aberta, que travaria os outros processos
+            self.world.save()
+        if not os.path.exists(self.commit_path):
+            self._mark_commit()
+        for iri, onto in self.world.ontologies.items():
+            if iri not in ('http://anonymous/', 'http://inferrences/'):
+                return onto
+        # Quadstore vazio: importa o data.rdf uma única vez
+        onto = self.world.get_ontology(self.path).load()
+        self.world.save()
+        self._mark_commit()
+        return onto
+
+    def _mark_commit(self):
+        # Abrir o banco também grava nele (o owlready roda ANALYZE): o mtime do banco não serve de carimbo
+        with open(self.commit_path, 'a'):
+            os.utime(self.commit_path)
+
+    @_writer
+    def reload(self):
+        try:
+            # No quadstore a fonte de verdade é o banco, não o data.rdf
+            if self.backend == 'sqlite':
+                # As entidades guardam os valores já lidos: reabre o World para ver os commits de outro processo
+                self.world.close()
+                self.world = None
+                self.onto = self._load_quadstore()
+            else:
+                self.onto = self.onto.load(reload=True)
+            self._prepare()
+            print("Reloaded!")
+        except Exception as e:
+            print("Error reloading:", e)
         return self.onto
 
+    @_writer
     def save(self):
-        if self.onto:
+        if not self.onto:
+            return
+        if self.backend == 'sqlite':
+            # Cada escrita vira um commit no quadstore, sem reescrever o RDF
+            self.world.save()
+            self._mark_commit()
+        else:
             self.onto.save(file=self.path)
+        # O commit muda o stamp: não é uma escrita de outro processo
+        self._file_stamp = self._get_file_stamp()
+
+    @_writer
+    def import_rdf(self, rdf_path: Optional[str] = None):
+        self._ensure_loaded()
+        with open(rdf_path or self.path, 'rb') as f:
+            self.onto.load(reload=True, fileobj=f)
+        self._prepare()
+        self.save()
+        return self.onto
+
+    @_writer
+    def export_rdf(self, rdf_path: Optional[str] = None):
+        self._ensure_loaded()
+        rdf_path = rdf_path or self.path
+        self.onto.save(file=rdf_path, format='rdfxml')
+        if rdf_path == self.path:
+            self._file_stamp = self._get_file_stamp()
+        return rdf_path
+
+    @_writer
+    def reason(self):
+        with metrics.timer('ontology_reasoning_seconds', reasoner=self.reasoner, scope='full'):
+            if self.reasoner == 'pellet':
+                sync_reasoner_pellet([self.onto], infer_property_values=True, infer_data_property_values=True)
+            elif self.reasoner == 'matrix':
+                self.rule_engine = MatrixEngine(self.onto).run().materialize()
+            elif self.profile_rules:
+                self.rule_engine = RuleProfiler(self.onto).run().materialize()
+                self._record_rule_profile(self.rule_engine.report())
+            else:
+                self.rule_engine = RuleEngine(self.onto).run().materialize()
+
+    @_writer
+    def profile_reasoning(self):
+        """Evaluate the SWRL rules one by one with the native engine and
+        return the per-rule report, without changing the inferred facts."""
+        self._ensure_loaded()
+        report = RuleProfiler(self.onto).run().report()
+        self._record_rule_profile(report)
+        return report
+
+    def _record_rule_profile(self, report):
+        self.rule_profile = report
+        for rule in report['rules']:
+            metrics.observe('ontology_rule_seconds', rule['seconds'], rule=rule['rule'])
+            metrics.inc('ontology_rule_matches_total', rule['matches'], rule=rule['rule'])
+            metrics.inc('ontology_rule_new_facts_total', rule['new_facts'], rule=rule['rule'])
+
+    def _reason_rating(self, rating):
+        if self.scheduler:
+            return self.scheduler.notify()
+        # No modo incremental só a vizinhança afetada pela nota é recalculada
+        if self.reasoner == 'incremental' and self.rule_engine:
+            with metrics.timer('ontology_reasoning_seconds', reasoner=self.reasoner, scope='rating'):
+                return self.rule_engine.update_rating(rating)
+        self.reason()
+
+    @_writer
+    def write_snapshot(self, path: Optional[str] = None):
+        """Write the loaded ontology and its current inference to a snapshot
+        that open_snapshot() can serve reads from on the next start."""
+        if self.onto is None:
+            # Nada foi carregado: o snapshot em uso continua valendo
+            return None
+        if not self.scheduler and self.neighbor_index is None and self.reasoner != 'incremental':
+            # Os fatos materializados podem estar atrás das últimas escritas
+            self.reason()
+            if self.backend == 'sqlite':
+                # Commit antes de carimbar: o snapshot vale para o banco como está agora
+                self.save()
+        recommend = self.neighbor_index.recommend if self.neighbor_index is not None else None
+        return write_snapshot(path or self.snapshot_path, self.catalog_index, self._instances('User'),
+                              self._instances('Rating'), catalog=self.catalog_index,
+                              source=self._source_stamp(), recommend=recommend)
+
+    @_writer
+    def open_snapshot(self, path: Optional[str] = None):
+        """Serve reads from a snapshot instead of loading the ontology.
+
+        Only accepted if it was written from the current data file (or quadstore);
+        the ontology is still loaded on the first write, or if the source changes.
+        """
+        path = path or self.snapshot_path
+        stamp = self._source_stamp()
+        try:
+            if stamp is None or read_source(path) != stamp:
+                return False
+            self.snapshot = Snapshot(path)
+        except (OSError, ValueError, KeyError) as e:
+            print("Error opening snapshot:", e)
+            return False
+        self._rebase(stamp)
+        print("Snapshot opened!")
+        return True
+
+    def _source_stamp(self):
+        try:
+            stat = os.stat(self.commit_path if self.backend == 'sqlite' else self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _served_snapshot(self):
+        return self.snapshot if self.onto is None else None
+
+    def _get_file_stamp(self):
+        # Um commit de outro processo muda o stamp do quadstore, como uma regravação muda o do data.rdf
+        return self._source_stamp()
+
+    def _is_stale(self):
+        if self.onto is None:
+            return self.snapshot is None or self.snapshot.source != self._source_stamp()
+        return (self._file_stamp is not None and self._get_file_stamp() != self._file_stamp)
+
+    def _ensure_loaded(self):
+        # Mantém a ontologia residente em memória; só relê o arquivo quando ele
+        # foi alterado em disco por outro processo.
+        if self.lock.reading():
+            # Leitores já passaram por _reading(), que recarrega com o lock de escrita
+            return self.onto
+        if self.onto is None:
+            return self.load()
+        if self._file_stamp is not None and self._get_file_stamp() != self._file_stamp:
+            return self.reload()
+        return self.onto
+
+    @contextmanager
+    def _reading(self):
+        # Um leitor não pode promover o lock: recarrega antes, com o lock de escrita
+        if not self.lock.reading() and self._is_stale():
+            with self.lock.write():
+                self._ensure_loaded()
+        with self.lock.read():
+            yield
 
     def _get_class(self, class_name):
         if not self.onto:
@@ -32,6 +326,10 @@ class OntologyRepository:
                 return cls
         return None
 
+    def _instances(self, class_name):
+        cls = self._get_class(class_name)
+        return cls.instances() if cls else []
+
     def ensure_classes(self):
         if not self.onto:
             return
@@ -136,8 +434,9 @@ class OntologyRepository:
             """)
 
 
+    @_writer
     def add_user(self, name: str, year: int, mail: str):
-        self.load()
+        self._ensure_loaded()
         user_class = self._get_class('User')
         user = self.onto.search_one(userName=name)
         if user:
@@ -149,11 +448,14 @@ class OntologyRepository:
                 user.userName = [name]
                 user.birthYear = [year]
                 user.email = [mail]
+        self.user_names.add(name)
+        self._bump([name])
         self.save()
         return user
 
+    @_writer
     def add_music(self, title: str, year: str, singer: str, genre: str):
-        self.load()
+        self._ensure_loaded()
         music_class = self._get_class('Music')
         singer_class = self._get_class('Singer')
         genre_class = self._get_class('Genre')
@@ -171,6 +473,7 @@ class OntologyRepository:
                 genre_ind.genreName = [genre]
 
         music = self.onto.search_one(title=title)
+        old_genres = set(music.hasGenre) if music else set()
         if music:
             music.hasYear = [year]
             music.hasSinger = [singer_ind]
@@ -182,139 +485,460 @@ class OntologyRepository:
                 music.hasYear = [year]
                 music.hasSinger = [singer_ind]
                 music.hasGenre = [genre_ind]
+        self.catalog_index.add(music)
+        self.title_index.add(music)
+        self.rateable_titles.add(title)
+        self._rows.pop(music.storid, None)
+        if self.scheduler:
+            self.scheduler.notify()
+        elif self.reasoner == 'incremental' and self.rule_engine:
+            self.rule_engine.update_music(music)
+        self._invalidate_recommendations(self._users_preferring(old_genres | {genre_ind}))
+        # Música nova ou alterada aparece no catálogo de todos
+        self._bump()
         self.save()
         return music
 
+    @_writer
     def add_rating(self, user_name: str, music_title: str, genre_name: str, star_value: int):
-        self.load()
-        rating_class = self._get_class('Rating')
+        self._ensure_loaded()
+        change = self._write_rating(*self._rating_target(user_name, music_title), _checked_stars(star_value))
+        self._reason_rating(change[0])
+        self._invalidate_recommendations(self._rating_affected(*change))
+        self.save()
+        return True
+
+    @_writer
+    def add_ratings(self, ratings):
+        """Create or update ratings from userName/title/stars records, with one save.
+
+        Each rating goes through the same path as add_rating, so only the users
+        it affects are invalidated; without incremental reasoning the batch
+        costs one reasoning pass. Nothing is written if a user or song is unknown
+        or a value is outside 1-5.
+        """
+        self._ensure_loaded()
+        records = [(self._rating_target(r['userName'], r['title']), _checked_stars(r['stars'])) for r in ratings]
+        changes = [self._write_rating(*target, stars) for target, stars in records]
+        if not changes:
+            return 0
+        if self.scheduler or (self.reasoner == 'incremental' and self.rule_engine):
+            for change in changes:
+                self._reason_rating(change[0])
+        else:
+            self.reason()
+        affected = set()
+        for change in changes:
+            affected |= self._rating_affected(*change)
+        self._invalidate_recommendations(affected)
+        self.save()
+        return len(changes)
+
+    def can_rate(self, user_name: str, music_title: str):
+        """Whether add_rating would find the user, the song and its genre.
+
+        Takes no lock, so it never waits behind a write in progress: it reads
+        the served snapshot or the name sets every writer keeps current.
+        """
+        snapshot = self._served_snapshot()
+        if snapshot:
+            user, song = snapshot.user_id(user_name), snapshot.song_id(music_title)
+            return user is not None and song is not None and snapshot.song_genre[song] >= 0
+        if self.onto is None:
+            # Nada carregado ainda: só a primeira chamada espera pela carga
+            with self.lock.write():
+                self._ensure_loaded()
+            return self.can_rate(user_name, music_title)
+        return user_name in self.user_names and music_title in self.rateable_titles
+
+    def _rating_target(self, user_name, music_title):
         user = self.onto.search_one(userName=user_name)
         music = self.onto.search_one(title=music_title)
         genre = music.hasGenre[0] if music and hasattr(music, 'hasGenre') and music.hasGenre else None
-
         if not user or not music or not genre:
             raise Exception("User, music, or genre not found.")
-
-        existing = None
-        for r in rating_class.instances():
-            if hasattr(r, 'givenBy') and hasattr(r, 'ratesSong'):
-                if (user in r.givenBy) and (music in r.ratesSong):
-                    existing = r
-                    break
-        if existing:
-            existing.stars = [star_value]
+        return user, music, genre
+
+    def _write_rating(self, user, music, genre, star_value):
+        rating = self.rating_index.get(user, music)
+        old_stars = list(rating.stars) if rating else []
+        old_preferences = set(user.hasPreference)
+        if rating:
+            rating.stars = [star_value]
         else:
             with self.onto:
-                rating = rating_class(_safe_name(f"{user_name}_{music_title}_rating"))
+                rating = self._get_class('Rating')(
+                    _safe_name(f"{user.userName[0]}_{music.title[0]}_rating"))
                 rating.givenBy = [user]
                 rating.ratesSong = [music]
                 rating.ratesGenre = [genre]
                 rating.stars = [star_value]
-        sync_reasoner_pellet([self.onto], infer_property_values=True, infer_data_property_values=True)
-        self.save()
-        return True
+            self.rating_index.add(rating)
+        return rating, user, genre, old_stars, old_preferences
+
+    def _rating_affected(self, rating, user, genre, old_stars, old_preferences):
+        # Só notas 4-5 (antes ou depois) mudam as recomendações de quem divide um gênero com o usuário
+        affected = {user}
+        if any(stars >= MIN_LIKED_STARS for stars in old_stars + list(rating.stars)):
+            affected |= self._users_preferring(old_preferences | set(user.hasPreference) | {genre})
+        if self.neighbor_index is not None:
+            affected |= self.neighbor_index.update(rating)
+        return affected
+
+    @_writer
+    def bulk_load(self, users=(), musics=(), ratings=()):
+        """Create users, songs and ratings from record iterables in a single
+        ontology block, followed by one reasoning pass and one save.
+
+        Records use the field names userName/birthYear/email, title/year/singer/genre
+        and userName/title/stars. Ratings whose user or song is unknown, or whose
+        stars are outside 1-5, are skipped.
+        """
+        self._ensure_loaded()
+        user_class = self._get_class('User')
+        music_class = self._get_class('Music')
+        singer_class = self._get_class('Singer')
+        genre_class = self._get_class('Genre')
+        rating_class = self._get_class('Rating')
 
-    def list_recommended_musics(self, user_name: str, limit: int = 10):
-        from owlready2 import sync_reasoner_pellet
-        self.load()
-        sync_reasoner_pellet([self.onto], infer_property_values=True, infer_data_property_values=True)
+        users_by_name = {u.userName[0]: u for u in self._instances('User') if u.userName}
+        singers_by_name = {s.singerName[0]: s for s in self._instances('Singer') if s.singerName}
+        genres_by_name = {g.genreName[0]: g for g in self._instances('Genre') if g.genreName}
+        musics_by_title = {m.title[0]: m for m in self.catalog_index if m.title}
 
+        counts = {'users': 0, 'musics': 0, 'ratings': 0, 'skipped': 0}
+        with self.onto:
+            for record in users:
+                name = record['userName']
+                user = users_by_name.get(name)
+                if not user:
+                    user = users_by_name[name] = user_class(_safe_name(name))
+                    user.userName = [name]
+                user.birthYear = [int(record['birthYear'])]
+                user.email = [record['email']]
+                self.user_names.add(name)
+                counts['users'] += 1
+
+            for record in musics:
+                singer = singers_by_name.get(record['singer'])
+                if not singer:
+                    singer = singers_by_name[record['singer']] = singer_class(_safe_name(record['singer']))
+                    singer.singerName = [record['singer']]
+                genre = genres_by_name.get(record['genre'])
+                if not genre:
+                    genre = genres_by_name[record['genre']] = genre_class(_safe_name(record['genre']))
+                    genre.genreName = [record['genre']]
+                title = record['title']
+                music = musics_by_title.get(title)
+                if not music:
+                    music = musics_by_title[title] = music_class(_safe_name(title))
+                    music.title = [title]
+                music.hasYear = [str(record['year'])]
+                music.hasSinger = [singer]
+                music.hasGenre = [genre]
+                self.catalog_index.add(music)
+                self.title_index.add(music)
+                self.rateable_titles.add(title)
+                self._rows.pop(music.storid, None)
+                counts['musics'] += 1
+
+            for record in ratings:
+                user = users_by_name.get(record['userName'])
+                music = musics_by_title.get(record['title'])
+                if not user or not music or not music.hasGenre or int(record['stars']) not in STAR_VALUES:
+                    counts['skipped'] += 1
+                    continue
+                rating = self.rating_index.get(user, music)
+                if not rating:
+                    rating = rating_class(_safe_name(f"{record['userName']}_{record['title']}_rating"))
+                    rating.givenBy = [user]
+                    rating.ratesSong = [music]
+                    rating.ratesGenre = [music.hasGenre[0]]
+                    self.rating_index.add(rating)
+                rating.stars = [int(record['stars'])]
+                counts['ratings'] += 1
+
+        self.recommendations.clear()
+        self._bump()
+        if self.neighbor_index is not None:
+            self.neighbor_index.rebuild(self._instances('Rating'))
+        if self.scheduler:
+            self.scheduler.notify()
+        else:
+            self.reason()
+        self.save()
+        return counts
+
+    def _users_preferring(self, genres):
+        users = set()
+        for genre in genres:
+            users.update(self.onto.search(hasPreference=genre))
+        return users
+
+    def _invalidate_recommendations(self, users):
+        names = [user.userName[0] for user in users if user.userName]
+        self.recommendations.invalidate(names)
+        self._bump(names)
+
+    def _rebase(self, stamp):
+        """Restart the versions from data loaded from disk; bump them if it is the same data."""
+        if stamp is not None and stamp != self._base_stamp:
+            self._base_stamp = stamp
+            self.version = self.catalog_version = 0
+            self.user_versions = {}
+        else:
+            self._bump()
+
+    def _bump(self, user_names=None):
+        """Record a write; without user_names it changes what every user sees."""
+        self.version += 1
+        if user_names is None:
+            self.catalog_version = self.version
+        else:
+            for name in user_names:
+                self.user_versions[name] = self.version
+
+    def view_version(self, user_name: Optional[str] = None):
+        """Version of the data behind a user's pages: changes whenever a write,
+        in this process or another one, could change what that user sees.
+
+        It counts from the stamp of the data loaded from disk, so processes
+        serving the same data give the same version. Costs one stat call.
+        """
+        if self._is_stale():
+            # Outro processo gravou: recarrega antes, senão o ETag validaria a página velha
+            with self._reading():
+                pass
+        base = '%x-%x' % self._base_stamp if self._base_stamp else '0'
+        return f"{base}.{self.catalog_version}.{self.user_versions.get(user_name, 0)}"
+
+    def _music_row(self, music):
+        row = self._rows.get(music.storid)
+        if row is None:
+            row = self._rows[music.storid] = self._build_music_row(music)
+        return dict(row)
+
+    def _build_music_row(self, music):
+        title = music.title[0] if hasattr(music, 'title') and music.title else ""
+        year = music.hasYear[0] if hasattr(music, 'hasYear') and music.hasYear else ""
+        genre = music.hasGenre[0].genreName[0] if hasattr(music, 'hasGenre') and music.hasGenre and hasattr(music.hasGenre[0], 'genreName') and music.hasGenre[0].genreName else ""
+        singer = music.hasSinger[0].singerName[0] if hasattr(music, 'hasSinger') and music.hasSinger and hasattr(music.hasSinger[0], 'singerName') and music.hasSinger[0].singerName else ""
+        return {
+            'title': title,
+            'year': year,
+            'genre': genre,
+            'singer': singer
+        }
+
+    @_timed
+    def list_recommended_musics(self, user_name: str, limit: int = 10, search: str = '', offset: int = 0,
+                                cursor: Optional[str] = None):
+        """A page of recommendations; each row's 'cursor' resumes the listing right after it."""
+        musics, snapshot = self._recommended_musics(user_name)
+        with self._reading():
+            return list(islice(self._iter_rows(musics, snapshot, search, offset, cursor), max(limit, 0)))
+
+    def iter_recommended_musics(self, user_name: str, search: str = '', offset: int = 0, cursor: Optional[str] = None):
+        """Recommended songs as a generator, hydrated as it is consumed.
+
+        Each row is read under the read lock: writes (and reloads) may run
+        between two rows, never while one is being read.
+        """
+        musics, snapshot = self._recommended_musics(user_name)
+        with self._reading():
+            rows = self._iter_rows(musics, snapshot, search=search, offset=offset, cursor=cursor)
+        return self._locked_rows(rows)
+
+    def _locked_rows(self, rows):
+        while True:
+            with self._reading():
+                row = next(rows, None)
+            if row is None:
+                return
+            yield row
+
+    def _iter_rows(self, musics, snapshot=None, search='', offset=0, cursor=None):
+        # Filtro e offset são aplicados sobre as entidades; só as linhas consumidas são hidratadas
+        storid = (lambda song: snapshot.song_storid[song]) if snapshot is not None else (lambda music: music.storid)
+        row = snapshot.song_row if snapshot is not None else self._music_row
+        # O cursor guarda a posição na lista inteira; o offset conta só as músicas filtradas
+        positions = range(self._resume_position(musics, storid, cursor) if cursor else 0, len(musics))
+        if search:
+            matches = snapshot.search(search) if snapshot is not None else self.title_index.matches(search)
+            key = (lambda song: song) if snapshot is not None else storid
+            positions = (i for i in positions if key(musics[i]) in matches)
+        if not cursor:
+            positions = islice(positions, max(offset, 0), None)
+        return (dict(row(musics[i]), cursor=list_cursor(i + 1, storid(musics[i]))) for i in positions)
+
+    @staticmethod
+    def _resume_position(musics, storid, cursor):
+        # A lista pode ter mudado desde a página anterior: confere a música na posição do cursor
+        position, last = decode_list_cursor(cursor)
+        if 0 < position <= len(musics) and storid(musics[position - 1]) == last:
+            return position
+        for i, music in enumerate(musics):
+            if storid(music) == last:
+                return i + 1
+        return min(position, len(musics))
+
+    def _recommended_musics(self, user_name: str):
+        # Devolve (músicas, snapshot); com snapshot, as músicas são índices dele
+        with self._reading():
+            snapshot = self._served_snapshot()
+            if snapshot:
+                user = snapshot.user_id(user_name)
+                return (snapshot.recommendations(user) if user is not None else []), snapshot
+            musics = self.recommendations.get(user_name)
+            if musics is not None:
+                return musics, None
+            if self.neighbor_index is not None or self.reasoner == 'incremental' or self.scheduler:
+                # Nada a inferir: basta ler os fatos já materializados
+                return self._cache_recommendations(user_name), None
+
+        # Pellet e o motor nativo reescrevem os fatos inferidos: precisa do lock de escrita
+        with self.lock.write():
+            self._ensure_loaded()
+            musics = self.recommendations.get(user_name)
+            if musics is None:
+                self.reason()
+                musics = self._cache_recommendations(user_name)
+            return musics, None
+
+    def _cache_recommendations(self, user_name: str):
         user = self.onto.search_one(userName=user_name)
-        if not user or not hasattr(user, 'RecommendedMusic'):
+        if self.neighbor_index is not None:
+            musics = self.neighbor_index.recommend(user) if user else []
+        elif not user or not hasattr(user, 'RecommendedMusic'):
             return []
-
-        musics = list(user.RecommendedMusic)
-        recommendations = []
-        for music in musics[:limit]:
-            title = music.title[0] if hasattr(music, 'title') and music.title else ""
-            year = music.hasYear[0] if hasattr(music, 'hasYear') and music.hasYear else ""
-            genre = music.hasGenre[0].genreName[0] if hasattr(music, 'hasGenre') and music.hasGenre and hasattr(music.hasGenre[0], 'genreName') else ""
-            singer = music.hasSinger[0].singerName[0] if hasattr(music, 'hasSinger') and music.hasSinger and hasattr(music.hasSinger[0], 'singerName') else ""
-            recommendations.append({
-                "title": title,
-                "year": year,
-                "genre": genre,
-                "singer": singer
-            })
-        return recommendations
-
+        else:
+            musics = list(user.RecommendedMusic)
+        self.recommendations.put(user_name, musics)
+        return musics
+
+    @_reader
+    def stats(self):
+        """Counts of users, songs, ratings and inferred facts."""
+        self._ensure_loaded()
+        snapshot = self._served_snapshot()
+        if snapshot:
+            return {'users': len(snapshot.user_name), 'songs': snapshot.song_count,
+                    'ratings': len(snapshot.rating_values), 'preferences': len(snapshot.pref_values),
+                    'recommendations': len(snapshot.rec_values)}
+        users = list(self._instances('User'))
+        return {
+            'users': len(users),
+            'songs': len(self.catalog_index),
+            'ratings': len(self.rating_index),
+            'preferences': sum(len(user.hasPreference) for user in users),
+            'recommendations': sum(len(user.RecommendedMusic) for user in users),
+        }
+
+    @_reader
     def get_user(self, name: str, email: Optional[str] = None):
-        self.load()
-        user = self.onto.search_one(userName=name)
+        self._ensure_loaded()
+        snapshot = self._served_snapshot()
+        if snapshot:
+            index = snapshot.user_id(name)
+            user = snapshot.user(index) if index is not None else None
+        else:
+            user = self.onto.search_one(userName=name)
         if user:
             if email is None or (hasattr(user, 'email') and email in user.email):
                 return user
         return None
 
+    @_reader
     def get_user_rating(self, user_name: str, music_title: str):
-        self.load()
-        rating_class = self._get_class('Rating')
+        self._ensure_loaded()
+        snapshot = self._served_snapshot()
+        if snapshot:
+            user, song = snapshot.user_id(user_name), snapshot.song_id(music_title)
+            return snapshot.rating(user, song) if user is not None and song is not None else None
         user = self.onto.search_one(userName=user_name)
         music = self.onto.search_one(title=music_title)
         if not user or not music:
             return None
-        for rating in rating_class.instances():
-            if hasattr(rating, 'givenBy') and hasattr(rating, 'ratesSong'):
-                if (user in rating.givenBy) and (music in rating.ratesSong):
-                    if hasattr(rating, 'stars') and rating.stars:
-                        return rating.stars[0]
+        return self._rating_stars(self.rating_index.get(user, music))
+
+    @_reader
+    def get_user_ratings(self, user_name: str, music_titles):
+        self._ensure_loaded()
+        snapshot = self._served_snapshot()
+        if snapshot:
+            user = snapshot.user_id(user_name)
+            songs = {title: snapshot.song_id(title) if user is not None else None for title in music_titles}
+            return {title: snapshot.rating(user, song) if song is not None else None for title, song in songs.items()}
+        user = self.onto.search_one(userName=user_name)
+        ratings = {}
+        for music_title in music_titles:
+            music = self.onto.search_one(title=music_title) if user else None
+            ratings[music_title] = self._rating_stars(self.rating_index.get(user, music)) if music else None
+        return ratings
+
+    @staticmethod
+    def _rating_stars(rating):
+        if rating and hasattr(rating, 'stars') and rating.stars:
+            return rating.stars[0]
         return None
-    
+
+    @_reader
     def get_user_preferences(self, user_name: str):
-        self.load()
+        self._ensure_loaded()
+        snapshot = self._served_snapshot()
+        if snapshot:
+            user = snapshot.user_id(user_name)
+            return snapshot.preferences(user) if user is not None else []
         user = self.onto.search_one(userName=user_name)
         if not user or not hasattr(user, 'hasPreference'):
             return []
         return [g.genreName[0] for g in user.hasPreference if hasattr(g, 'genreName') and g.genreName]
 
 
-    def list_musics(self, limit=10, search='', order_by='title', order_dir='asc', user_name=None):
-        self.load()
-        music_class = self._get_class('Music')
-        musics = list(music_class.instances())
+    @_reader
+    def list_musics(self, limit=10, search='', order_by='title', order_dir='asc', user_name=None, cursor=None):
+        """A page of the catalog. Each row's 'cursor' holds its (sort key, storid);
+        passing it back starts the next page right after that row, at the cost
+        of the first page."""
+        self._ensure_loaded()
+        descending = order_dir == 'desc'
+        after = decode_catalog_cursor(cursor, order_by, order_dir) if cursor else None
+        snapshot = self._served_snapshot()
+        if snapshot:
+            return self._list_snapshot_musics(snapshot, limit, search, order_by, order_dir, user_name, after)
 
         if search:
-            musics = [
-                m for m in musics
-                if hasattr(m, 'title') and m.title and search.lower() in m.title[0].lower()
-            ]
-
-        def sort_key(music):
-            if order_by == 'title':
-                return music.title[0] if hasattr(music, 'title') and music.title else ""
-            elif order_by == 'year':
-                return music.hasYear[0] if hasattr(music, 'hasYear') and music.hasYear else ""
-            elif order_by == 'singer':
-                return (music.hasSinger[0].singerName[0]
-                        if hasattr(music, 'hasSinger') and music.hasSinger and hasattr(music.hasSinger[0], 'singerName') and music.hasSinger[0].singerName else "")
-            return ""
-
-        musics.sort(key=sort_key, reverse=(order_dir == 'desc'))
+            candidates = self.title_index.search(search)
+            musics = self.catalog_index.top_k(candidates, order_by, limit, descending, after)
+        else:
+            musics = self.catalog_index.first(order_by, limit, descending, after)
 
+        user = self.onto.search_one(userName=user_name) if user_name else None
         result = []
-        for music in musics[:limit]:
-            title = music.title[0] if hasattr(music, 'title') and music.title else ""
-            year = music.hasYear[0] if hasattr(music, 'hasYear') and music.hasYear else ""
-            genre = music.hasGenre[0].genreName[0] if hasattr(music, 'hasGenre') and music.hasGenre and hasattr(music.hasGenre[0], 'genreName') and music.hasGenre[0].genreName else ""
-            singer = music.hasSinger[0].singerName[0] if hasattr(music, 'hasSinger') and music.hasSinger and hasattr(music.hasSinger[0], 'singerName') and music.hasSinger[0].singerName else ""
-
-            already_rated = False
-            if user_name:
-                rating_class = self._get_class('Rating')
-                user = self.onto.search_one(userName=user_name)
-                if rating_class and user:
-                    for rating in rating_class.instances():
-                        if hasattr(rating, 'givenBy') and hasattr(rating, 'ratesSong'):
-                            if (user in rating.givenBy) and (music in rating.ratesSong):
-                                already_rated = True
-                                break
-
-            result.append({
-                'title': title,
-                'year': year,
-                'genre': genre,
-                'singer': singer,
-                'already_rated': already_rated
-            })
+        for music in musics:
+            row = self._music_row(music)
+            rating = self.rating_index.get(user, music) if user else None
+            row['already_rated'] = rating is not None
+            row['user_rating'] = self._rating_stars(rating)
+            row['cursor'] = catalog_cursor(order_by, order_dir, self.catalog_index.sort_key(music, order_by))
+            result.append(row)
+
+        return result
 
+    @staticmethod
+    def _list_snapshot_musics(snapshot, limit, search, order_by, order_dir, user_name, after):
+        descending = order_dir == 'desc'
+        if search:
+            songs = snapshot.top_k(snapshot.search(search), order_by, limit, descending, after)
+        else:
+            songs = snapshot.first(order_by, limit, descending, after)
+        user = snapshot.user_id(user_name) if user_name else None
+        result = []
+        for song in songs:
+            row = snapshot.song_row(song)
+            stars = snapshot.rating(user, song) if user is not None else None
+            row['already_rated'] = stars is not None
+            row['user_rating'] = stars
+            row['cursor'] = catalog_cursor(order_by, order_dir, snapshot.sort_key(song, order_by))
+            result.append(row)
         return result
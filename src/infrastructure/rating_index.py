@@ -0,0 +1,37 @@
+from collections import defaultdict
+
+
+class RatingIndex:
+    """Index from (user, music) to Rating, with per-user and per-music adjacency.
+
+    Rebuilt from Rating.instances() on load and kept up to date by add_rating.
+    """
+
+    def __init__(self):
+        self.by_user = defaultdict(dict)   # user -> {music: rating}
+        self.by_music = defaultdict(dict)  # music -> {user: rating}
+
+    def __len__(self):
+        return sum(len(ratings) for ratings in self.by_user.values())
+
+    def rebuild(self, ratings):
+        self.by_user.clear()
+        self.by_music.clear()
+        for rating in ratings:
+            self.add(rating)
+
+    def add(self, rating):
+        for user in getattr(rating, 'givenBy', []):
+            for music in getattr(rating, 'ratesSong', []):
+                self.by_user[user][music] = rating
+                self.by_music[music][user] = rating
+
+    def get(self, user, music):
+        ratings = self.by_user.get(user)
+        return ratings.get(music) if ratings else None
+
+    def user_ratings(self, user):
+        return list(self.by_user.get(user, {}).values())
+
+    def music_ratings(self, music):
+        return list(self.by_music.get(music, {}).values())
@@ -0,0 +1,256 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from infrastructure.metrics import metrics
+from infrastructure.rule_engine import INFERRED_ONTOLOGY_IRI, RuleEngine
+
+
+def infer_snapshot(snapshot_path: str, reasoner: str = 'native'):
+    """Run the rules over an RDF/XML snapshot in a fresh World.
+
+    Runs in the worker process (see main()); returns the inferred facts as IRIs,
+    ({user: [genre]}, {user: [music]}), so they can cross the process boundary.
+    """
+    from owlready2 import World, sync_reasoner_pellet
+
+    world = World()
+    onto = world.get_ontology(snapshot_path).load()
+    try:
+        if reasoner == 'pellet':
+            sync_reasoner_pellet([onto], infer_property_values=True, infer_data_property_values=True)
+            user_class = next((cls for cls in onto.classes() if cls.name == 'User'), None)
+            users = list(user_class.instances()) if user_class else []
+            preferences = {user: set(user.hasPreference) for user in users}
+            recommendations = {user: set(user.RecommendedMusic) for user in users}
+        else:
+            if reasoner == 'matrix':
+                from infrastructure.matrix_engine import MatrixEngine
+                engine = MatrixEngine(onto).run()
+            else:
+                engine = RuleEngine(onto).run()
+            preferences, recommendations = engine.preferences, engine.recommendations
+        return ({user.iri: [genre.iri for genre in genres] for user, genres in preferences.items() if genres},
+                {user.iri: [music.iri for music in musics] for user, musics in recommendations.items() if musics})
+    finally:
+        world.close()
+
+
+def run_worker(snapshot_path: str, reasoner: str = 'native', timeout: float = None, started=None):
+    """Run infer_snapshot in a child interpreter and return its result.
+
+    The child runs this module, never the caller's __main__: a pool started
+    with spawn re-imports __main__ in the worker, and an entry point that boots
+    the service on import would boot another service (and scheduler) there.
+    """
+    fd, result_path = tempfile.mkstemp(prefix='ontology-inference-', suffix='.json')
+    os.close(fd)
+    src = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [src, os.environ.get('PYTHONPATH')])))
+    try:
+        process = subprocess.Popen([sys.executable, '-m', 'infrastructure.reasoning_scheduler',
+                                    snapshot_path, reasoner, result_path],
+                                   env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if started:
+            started(process)
+        _, stderr = process.communicate(timeout=timeout)
+        if process.returncode != 0:
+            raise Exception(f"Reasoning worker exited with {process.returncode}: "
+                            f"{stderr.decode(errors='replace').strip()[-500:]}")
+        with open(result_path) as f:
+            preferences, recommendations = json.load(f)
+        return preferences, recommendations
+    finally:
+        os.remove(result_path)
+
+
+class ReasoningScheduler:
+    """Keeps inference off the request path.
+
+    Writes call notify(). Once changes stop arriving for `debounce` seconds
+    (or `max_delay` after the first one, under a steady stream of writes),
+    the ontology is exported to a snapshot and reasoned in a worker process.
+    The inferred hasPreference/RecommendedMusic facts are then swapped in
+    under the repository's write lock, so readers see either the previous
+    or the new inference, never a partial one. staleness() reports how far
+    the served inference lags behind the writes.
+    """
+
+    def __init__(self, repo, debounce: float = 0.5, max_delay: float = 5.0, reasoner: str = None):
+        self.repo = repo
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.reasoner = reasoner or ('native' if repo.reasoner == 'incremental' else repo.reasoner)
+        self._cond = threading.Condition()
+        self._version = 0             # nº de mudanças notificadas
+        self._reasoned_version = 0    # mudanças cobertas pela última inferência aplicada
+        self._failed_version = None
+        self._first_change = None     # primeira mudança ainda não coberta
+        self._last_change = None
+        self._running = False
+        self._stopping = False
+        self._thread = None
+        self._process = None
+        self.runs = 0
+        self.last_completed = None
+        self.last_duration = None
+
+    def start(self):
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='reasoning-scheduler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            # Não espera a inferência em curso terminar
+            if self._process and self._process.poll() is None:
+                self._process.terminate()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def notify(self):
+        """Record that the asserted facts changed."""
+        with self._cond:
+            now = time.monotonic()
+            self._version += 1
+            self._last_change = now
+            if self._first_change is None:
+                self._first_change = now
+            self._cond.notify_all()
+
+    def staleness(self):
+        with self._cond:
+            return {
+                'pending_changes': self._version - self._reasoned_version,
+                'stale_seconds': time.monotonic() - self._first_change if self._first_change is not None else 0.0,
+                'running': self._running,
+                'runs': self.runs,
+                'last_completed': self.last_completed,
+                'last_duration': self.last_duration,
+            }
+
+    def wait_idle(self, timeout: float = None):
+        """Block until every notified change is covered by an applied inference."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._reasoned_version != self._version or self._running:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopping and (self._version == self._reasoned_version
+                                              or self._version == self._failed_version):
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                # Debounce: espera as escritas pararem, mas não além de max_delay
+                while not self._stopping:
+                    now = time.monotonic()
+                    wait = min(self._last_change + self.debounce, self._first_change + self.max_delay) - now
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                if self._stopping:
+                    return
+                version, first_change = self._version, self._first_change
+                self._running = True
+                self._first_change = None
+
+            start = time.perf_counter()
+            snapshot = None
+            try:
+                snapshot = self._snapshot()
+                preferences, recommendations = run_worker(snapshot, self.reasoner, started=self._started)
+                if self._worker_done():
+                    return
+                self._swap(preferences, recommendations)
+            except Exception as e:
+                if self._worker_done():
+                    return
+                print("Error reasoning in background:", e)
+                metrics.inc('ontology_background_reasoning_failures_total')
+                with self._cond:
+                    self._failed_version = version
+                    self._running = False
+                    # As mudanças continuam pendentes desde a primeira delas
+                    self._first_change = first_change
+                    self._cond.notify_all()
+                continue
+            finally:
+                if snapshot:
+                    os.remove(snapshot)
+
+            with self._cond:
+                self._reasoned_version = version
+                self._running = False
+                self.runs += 1
+                self.last_completed = time.time()
+                self.last_duration = time.perf_counter() - start
+                self._cond.notify_all()
+            metrics.observe('ontology_reasoning_seconds', self.last_duration, reasoner=self.reasoner, scope='background')
+
+    def _worker_done(self):
+        """Forget the worker; True if stop() interrupted it."""
+        with self._cond:
+            self._process = None
+            if self._stopping:
+                self._running = False
+                self._cond.notify_all()
+            return self._stopping
+
+    def _started(self, process):
+        with self._cond:
+            self._process = process
+            if self._stopping:
+                process.terminate()
+
+    def _snapshot(self):
+        fd, path = tempfile.mkstemp(prefix='ontology-snapshot-', suffix='.rdf')
+        os.close(fd)
+        # Só os fatos asseridos: a inferência anterior fica no ontology "inferrences"
+        with self.repo.lock.read():
+            self.repo.onto.save(file=path, format='rdfxml')
+        return path
+
+    def _swap(self, preferences, recommendations):
+        with self.repo.lock.write():
+            world = self.repo.onto.world
+            inferred = world.get_ontology(INFERRED_ONTOLOGY_IRI)
+            users = set(preferences) | set(recommendations)
+            users.update(user.iri for user in self.repo._instances('User'))
+            for iri in users:
+                user = world[iri]
+                if user is None:
+                    continue
+                RuleEngine._sync_values(inferred, user, 'hasPreference',
+                                        {world[g] for g in preferences.get(iri, ())} - {None})
+                RuleEngine._sync_values(inferred, user, 'RecommendedMusic',
+                                        {world[m] for m in recommendations.get(iri, ())} - {None})
+            self.repo.recommendations.clear()
+            self.repo._bump()
+            if self.repo.backend == 'sqlite':
+                # No RDF/XML os fatos inferidos não vão para o arquivo; no quadstore, um commit
+                self.repo.save()
+
+
+def main(argv=None):
+    snapshot_path, reasoner, result_path = (argv or sys.argv[1:])
+    with open(result_path, 'w') as f:
+        json.dump(infer_snapshot(snapshot_path, reasoner), f)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+import threading
+from collections import OrderedDict
+
+
+class RecommendationCache:
+    """Materialized recommendations per user name, bounded with LRU eviction.
+
+    The repository invalidates entries whenever a write can change a user's
+    RecommendedMusic set, so a hit never needs reasoning. Safe to share
+    between the concurrent readers of the repository.
+    """
+
+    def __init__(self, max_users: int = 1024):
+        self.max_users = max_users
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, user_name):
+        return user_name in self._entries
+
+    def get(self, user_name):
+        with self._lock:
+            entry = self._entries.get(user_name)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_name)
+            self.hits += 1
+            return entry
+
+    def put(self, user_name, recommendations):
+        if self.max_users <= 0:
+            return
+        with self._lock:
+            self._entries[user_name] = recommendations
+            self._entries.move_to_end(user_name)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_names):
+        with self._lock:
+            for user_name in user_names:
+                self._entries.pop(user_name, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
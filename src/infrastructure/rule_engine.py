@@ -0,0 +1,207 @@
+from collections import defaultdict
+
+INFERRED_ONTOLOGY_IRI = "http://inferrences/"
+MIN_LIKED_STARS = 4
+# As regras SWRL só disparam com stars 4 ou 5: notas fora de 1-5 fariam os reasoners divergirem
+STAR_VALUES = range(1, 6)
+
+
+class RuleEngine:
+    """Forward-chaining evaluation of the SWRL rules declared in
+    OntologyRepository.ensure_classes, without spawning Pellet.
+
+    rule1a/1b: Rating(?r), stars(?r, 4|5), givenBy(?r, ?u), ratesGenre(?r, ?g) -> hasPreference(?u, ?g)
+    rule2:     User(?u), hasPreference(?u, ?g), Music(?m), hasGenre(?m, ?g) -> RecommendedMusic(?u, ?m)
+    rule3a/3b: hasPreference(?u1, ?g), hasPreference(?u2, ?g), Rating(?r), givenBy(?r, ?u2),
+               stars(?r, 4|5), ratesSong(?r, ?m) -> RecommendedMusic(?u1, ?m)
+
+    hasPreference and RecommendedMusic are treated as purely derived properties:
+    materialize() makes the ontology hold exactly the computed closure.
+    """
+
+    def __init__(self, onto):
+        self.onto = onto
+        self.reset()
+
+    def reset(self):
+        # Fatos base indexados
+        self.users = set()
+        self.ratings = {}                                        # rating -> [(user, music, genre, stars)]
+        self.genre_musics = defaultdict(set)                     # hasGenre, indexado por gênero
+        self.music_genres = {}                                   # music -> genres
+        self.liked_genres = defaultdict(lambda: defaultdict(int))  # user -> genre -> nº de notas >= 4
+        self.liked_musics = defaultdict(lambda: defaultdict(int))  # user -> music -> nº de notas >= 4
+        # Fatos derivados
+        self.preferences = defaultdict(set)                      # user -> genres
+        self.genre_users = defaultdict(set)                      # genre -> users (hasPreference invertido)
+        self.recommendations = defaultdict(set)                  # user -> musics
+
+    def _class(self, name):
+        for cls in self.onto.classes():
+            if cls.name == name:
+                return cls
+        return None
+
+    @staticmethod
+    def _rating_facts(rating):
+        return [
+            (user, music, genre, stars)
+            for user in getattr(rating, 'givenBy', [])
+            for music in getattr(rating, 'ratesSong', None) or [None]
+            for genre in getattr(rating, 'ratesGenre', None) or [None]
+            for stars in getattr(rating, 'stars', [])
+        ]
+
+    def load_facts(self):
+        self.reset()
+        user_class = self._class('User')
+        music_class = self._class('Music')
+        rating_class = self._class('Rating')
+        if user_class:
+            self.users.update(user_class.instances())
+        if music_class:
+            for music in music_class.instances():
+                self.music_genres[music] = set(getattr(music, 'hasGenre', []))
+                for genre in self.music_genres[music]:
+                    self.genre_musics[genre].add(music)
+        if rating_class:
+            for rating in rating_class.instances():
+                facts = self._rating_facts(rating)
+                self.ratings[rating] = facts
+                for fact in facts:
+                    self._count_fact(fact, 1)
+        return self
+
+    def _count_fact(self, fact, sign):
+        user, music, genre, stars = fact
+        if stars < MIN_LIKED_STARS:
+            return
+        if genre is not None:
+            self.liked_genres[user][genre] += sign
+            if not self.liked_genres[user][genre]:
+                del self.liked_genres[user][genre]
+        if music is not None:
+            self.liked_musics[user][music] += sign
+            if not self.liked_musics[user][music]:
+                del self.liked_musics[user][music]
+
+    def run(self):
+        self.load_facts()
+        # Avaliação semi-ingênua: cada passada junta apenas os fatos novos (delta)
+        # com o conjunto já derivado, até não haver mais nada a inferir.
+        delta = self._rule1()
+        while delta:
+            self._add_preferences(delta)
+            self._rule2(delta)
+            self._rule3(delta)
+            delta = self._rule1()
+        return self
+
+    def _add_preferences(self, delta):
+        for user, genre in delta:
+            self.preferences[user].add(genre)
+            self.genre_users[genre].add(user)
+
+    def _rule1(self):
+        return {
+            (user, genre)
+            for user, genres in self.liked_genres.items()
+            for genre in genres
+            if genre not in self.preferences[user]
+        }
+
+    def _rule2(self, delta):
+        for user, genre in delta:
+            self.recommendations[user].update(self.genre_musics.get(genre, ()))
+
+    def _rule3(self, delta):
+        # hasPreference aparece duas vezes no corpo: o delta pode casar com ?u1 ou com ?u2
+        for user, genre in delta:
+            for other in self.genre_users[genre]:
+                self.recommendations[user].update(self.liked_musics.get(other, ()))
+                self.recommendations[other].update(self.liked_musics.get(user, ()))
+
+    def update_rating(self, rating):
+        """Apply an inserted or updated Rating and recompute only the affected facts.
+
+        Returns the set of users whose derived facts were recomputed.
+        """
+        old_facts = self.ratings.get(rating, [])
+        new_facts = self._rating_facts(rating)
+        raters = {fact[0] for fact in old_facts} | {fact[0] for fact in new_facts}
+        before = {user: self._liked_state(user) for user in raters}
+
+        for fact in old_facts:
+            self._count_fact(fact, -1)
+        for fact in new_facts:
+            self._count_fact(fact, 1)
+        self.ratings[rating] = new_facts
+
+        # Mudanças como 4 -> 5 ou 1 -> 2 não alteram nenhum fato derivado
+        changed = {user for user in raters if self._liked_state(user) != before[user]}
+        affected = set()
+        for user in changed:
+            old_genres = set(self.preferences[user])
+            new_genres = set(self.liked_genres.get(user, ()))
+            for genre in old_genres - new_genres:
+                self.preferences[user].discard(genre)
+                self.genre_users[genre].discard(user)
+            self._add_preferences((user, genre) for genre in new_genres - old_genres)
+            # rule2/rule3 só mudam para o próprio usuário e para quem divide um gênero com ele
+            affected.add(user)
+            for genre in old_genres | new_genres:
+                affected.update(self.genre_users[genre])
+        return self._refresh(affected)
+
+    def update_music(self, music):
+        """Apply an inserted or updated Music (its hasGenre may have changed)."""
+        old_genres = self.music_genres.get(music, set())
+        new_genres = set(getattr(music, 'hasGenre', []))
+        self.music_genres[music] = new_genres
+        for genre in old_genres - new_genres:
+            self.genre_musics[genre].discard(music)
+        for genre in new_genres - old_genres:
+            self.genre_musics[genre].add(music)
+
+        affected = set()
+        for genre in old_genres ^ new_genres:
+            affected.update(self.genre_users[genre])
+        return self._refresh(affected)
+
+    def _liked_state(self, user):
+        return set(self.liked_genres.get(user, ())), set(self.liked_musics.get(user, ()))
+
+    def _recommendations_for(self, user):
+        musics = set()
+        for genre in self.preferences.get(user, ()):
+            musics.update(self.genre_musics.get(genre, ()))
+            for other in self.genre_users[genre]:
+                musics.update(self.liked_musics.get(other, ()))
+        return musics
+
+    def _refresh(self, users):
+        for user in users:
+            self.recommendations[user] = self._recommendations_for(user)
+        self.materialize(users)
+        return users
+
+    def materialize(self, users=None):
+        inferred = self.onto.world.get_ontology(INFERRED_ONTOLOGY_IRI)
+        if users is None:
+            users = self.users | set(self.preferences) | set(self.recommendations)
+        for user in users:
+            self._sync_values(inferred, user, 'hasPreference', self.preferences.get(user, set()))
+            self._sync_values(inferred, user, 'RecommendedMusic', self.recommendations.get(user, set()))
+        return self
+
+    @staticmethod
+    def _sync_values(inferred, user, prop, target):
+        values = getattr(user, prop)
+        current = set(values)
+        if current == target:
+            return
+        with inferred:
+            for value in current - target:
+                values.remove(value)
+            for value in target - current:
+                values.append(value)
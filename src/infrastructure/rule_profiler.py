@@ -0,0 +1,143 @@
+import time
+from collections import defaultdict
+
+from infrastructure.rule_engine import RuleEngine
+
+# (regra, estrelas do corpo, propriedade inferida), na ordem de ensure_classes
+RULES = (
+    ('rule1a', 4, 'hasPreference'),
+    ('rule1b', 5, 'hasPreference'),
+    ('rule2', None, 'RecommendedMusic'),
+    ('rule3a', 4, 'RecommendedMusic'),
+    ('rule3b', 5, 'RecommendedMusic'),
+)
+
+
+class RuleProfiler(RuleEngine):
+    """RuleEngine that evaluates each SWRL rule on its own and records, per rule:
+
+    - seconds: evaluation time
+    - matches: complete bindings of the rule body
+    - firings: distinct head facts the rule derived
+    - new_facts: head facts no earlier rule had derived
+
+    rule1 only reads asserted facts and no body reads RecommendedMusic, so
+    one pass reaches the fixpoint and every binding is counted once. The
+    closure is the same as RuleEngine's; materialize() and the incremental
+    updates are inherited.
+    """
+
+    def reset(self):
+        super().reset()
+        self.stats = {rule: {'rule': rule, 'property': prop, 'seconds': 0.0, 'matches': 0, 'firings': 0,
+                             'new_facts': 0} for rule, _, prop in RULES}
+        self.load_seconds = 0.0
+        self.rated_musics = defaultdict(dict)   # user -> estrelas -> [music], uma entrada por nota
+
+    def load_facts(self):
+        super().load_facts()
+        for facts in self.ratings.values():
+            for user, music, _, stars in facts:
+                if music is not None:
+                    self.rated_musics[user].setdefault(stars, []).append(music)
+        return self
+
+    def run(self):
+        start = time.perf_counter()
+        self.load_facts()
+        self.load_seconds = time.perf_counter() - start
+        delta = self._rule1()
+        self._add_preferences(delta)
+        self._rule2(delta)
+        self._rule3(delta)
+        return self
+
+    def _rule1(self):
+        delta = set()
+        for rule, stars, _ in RULES[:2]:
+            stat = self.stats[rule]
+            start = time.perf_counter()
+            heads = set()
+            for facts in self.ratings.values():
+                for user, _, genre, value in facts:
+                    if value == stars and genre is not None:
+                        stat['matches'] += 1
+                        heads.add((user, genre))
+            new = {(user, genre) for user, genre in heads
+                   if genre not in self.preferences.get(user, ()) and (user, genre) not in delta}
+            delta |= new
+            stat['firings'] += len(heads)
+            stat['new_facts'] += len(new)
+            stat['seconds'] += time.perf_counter() - start
+        return delta
+
+    def _rule2(self, delta):
+        stat = self.stats['rule2']
+        start = time.perf_counter()
+        heads = set()
+        for user, genre in delta:
+            musics = self.genre_musics.get(genre, ())
+            stat['matches'] += len(musics)
+            heads.update((user, music) for music in musics)
+        stat['firings'] += len(heads)
+        stat['new_facts'] += self._recommend(heads)
+        stat['seconds'] += time.perf_counter() - start
+
+    def _rule3(self, delta):
+        # Bindings (?u1, ?u2) com ao menos um hasPreference novo, sem repetir pares
+        pairs = set()
+        for user, genre in delta:
+            for other in self.genre_users[genre]:
+                pairs.add((user, other))
+                pairs.add((other, user))
+        for rule, stars, _ in RULES[3:]:
+            stat = self.stats[rule]
+            start = time.perf_counter()
+            heads = set()
+            for u1, u2 in pairs:
+                musics = self.rated_musics[u2].get(stars, ())
+                if musics:
+                    # Cada gênero em comum é um binding distinto de ?g
+                    stat['matches'] += len(self.preferences[u1] & self.preferences[u2]) * len(musics)
+                    heads.update((u1, music) for music in musics)
+            stat['firings'] += len(heads)
+            stat['new_facts'] += self._recommend(heads)
+            stat['seconds'] += time.perf_counter() - start
+
+    def _recommend(self, heads):
+        new = 0
+        for user, music in heads:
+            if music not in self.recommendations[user]:
+                self.recommendations[user].add(music)
+                new += 1
+        return new
+
+    def report(self):
+        """The per-rule statistics plus totals, as plain data."""
+        rules = [dict(self.stats[rule]) for rule, _, _ in RULES]
+        return {
+            'rules': rules,
+            'load_seconds': self.load_seconds,
+            'total_seconds': self.load_seconds + sum(rule['seconds'] for rule in rules),
+            'facts': {
+                'users': len(self.users),
+                'musics': len(self.music_genres),
+                'ratings': len(self.ratings),
+                'hasPreference': sum(len(genres) for genres in self.preferences.values()),
+                'RecommendedMusic': sum(len(musics) for musics in self.recommendations.values()),
+            },
+        }
+
+
+def format_report(report):
+    """Render a report as a fixed-width table, slowest rule first."""
+    lines = [f"{'rule':<8} {'property':<17} {'seconds':>10} {'matches':>10} {'firings':>10} {'new facts':>10}"]
+    for rule in sorted(report['rules'], key=lambda rule: rule['seconds'], reverse=True):
+        lines.append(f"{rule['rule']:<8} {rule['property']:<17} {rule['seconds']:>10.4f} {rule['matches']:>10} "
+                     f"{rule['firings']:>10} {rule['new_facts']:>10}")
+    facts = report['facts']
+    lines.append(f"facts loaded in {report['load_seconds']:.4f}s: {facts['users']} users, {facts['musics']} songs, "
+                 f"{facts['ratings']} ratings")
+    lines.append(f"inferred {facts['hasPreference']} hasPreference and {facts['RecommendedMusic']} RecommendedMusic "
+                 f"in {report['total_seconds']:.4f}s")
+    return '\n'.join(lines)
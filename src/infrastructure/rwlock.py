@@ -0,0 +1,86 @@
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """Many concurrent readers or one writer.
+
+    Waiting writers block new readers, so a steady stream of reads cannot
+    starve a write. The writer may re-enter write() and read() freely; a
+    reader may re-enter read(), but cannot upgrade to write() (two readers
+    upgrading would deadlock), so it raises RuntimeError instead.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None          # thread que detém a escrita
+        self._write_depth = 0
+        self._writers_waiting = 0
+        self._local = threading.local()
+
+    def _read_depth(self):
+        return getattr(self._local, 'depth', 0)
+
+    def reading(self):
+        """True if the current thread holds the lock for reading only."""
+        return self._read_depth() > 0 and self._writer is not threading.current_thread()
+
+    def writing(self):
+        return self._writer is threading.current_thread()
+
+    @contextmanager
+    def read(self):
+        me = threading.current_thread()
+        if self._writer is me or self._read_depth():
+            # Reentrante: quem já lê (ou escreve) não espera de novo
+            self._local.depth = self._read_depth() + 1
+            try:
+                yield
+            finally:
+                self._local.depth -= 1
+            return
+
+        with self._cond:
+            while self._writer is not None or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        self._local.depth = 1
+        try:
+            yield
+        finally:
+            self._local.depth = 0
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        me = threading.current_thread()
+        if self._writer is me:
+            self._write_depth += 1
+            try:
+                yield
+            finally:
+                self._write_depth -= 1
+            return
+        if self._read_depth():
+            raise RuntimeError("Cannot upgrade a read lock to a write lock")
+
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._write_depth = 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = None
+                self._write_depth = 0
+                self._cond.notify_all()
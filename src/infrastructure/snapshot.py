@@ -0,0 +1,333 @@
+import heapq
+import json
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from types import SimpleNamespace
+
+from infrastructure.catalog_index import SORT_FIELDS
+from infrastructure.title_index import NGRAM_SIZE, ngrams, normalize_title
+
+MAGIC = b'MRSNAP01'
+VERSION = 2
+ALIGN = 8
+
+
+def _gram_key(gram):
+    # Um trigrama cabe num int64: 21 bits por code point
+    key = 0
+    for char in gram:
+        key = (key << 21) | ord(char)
+    return key
+
+
+def _first(entity, prop):
+    values = getattr(entity, prop, None)
+    return values[0] if values else None
+
+
+class _StringTable:
+    def __init__(self):
+        self.ids = {}
+        self.data = bytearray()
+        self.offsets = array('I', [0])
+
+    def intern(self, value):
+        if value is None:
+            return -1
+        value = str(value)
+        sid = self.ids.get(value)
+        if sid is None:
+            sid = self.ids[value] = len(self.offsets) - 1
+            self.data += value.encode('utf-8')
+            self.offsets.append(len(self.data))
+        return sid
+
+
+def write_snapshot(path, musics, users, ratings, catalog=None, source=None, recommend=None):
+    """Write songs, singers, genres, users, ratings and the inferred
+    preferences/recommendations as interned strings plus int32 arrays.
+
+    `musics` is taken in catalog order; `catalog` (a CatalogIndex) supplies
+    the pre-sorted orders read by list_musics; `recommend(user)` replaces the
+    RecommendedMusic facts (collaborative mode). The title trigram postings
+    used by search are stored too. The file is replaced atomically.
+    """
+    strings = _StringTable()
+    musics = list(musics)
+    users = list(users)
+    song_ids = {music: i for i, music in enumerate(musics)}
+    singer_ids, genre_ids = {}, {}
+    singers, genres = [], []
+
+    def entity_id(entity, ids, entities):
+        if entity is None:
+            return -1
+        if entity not in ids:
+            ids[entity] = len(entities)
+            entities.append(entity)
+        return ids[entity]
+
+    def song_id(music):
+        if music not in song_ids:
+            song_ids[music] = len(musics)
+            musics.append(music)
+        return song_ids[music]
+
+    user_ids = {user: i for i, user in enumerate(users)}
+    by_user = [[] for _ in users]
+    for rating in ratings:
+        user, music, stars = _first(rating, 'givenBy'), _first(rating, 'ratesSong'), _first(rating, 'stars')
+        if user in user_ids and music is not None and stars is not None:
+            by_user[user_ids[user]].append((song_id(music), stars))
+    preferences = [[entity_id(genre, genre_ids, genres) for genre in getattr(user, 'hasPreference', [])] for user in users]
+    recommend = recommend or (lambda user: getattr(user, 'RecommendedMusic', []))
+    recommendations = [[song_id(music) for music in recommend(user)] for user in users]
+
+    sections = {}
+    song_fields = ('song_iri', 'song_storid', 'song_title', 'song_year', 'song_singer', 'song_genre')
+    for name in song_fields:
+        sections[name] = array('i')
+    for music in musics:
+        sections['song_iri'].append(strings.intern(music.iri))
+        sections['song_storid'].append(music.storid)
+        sections['song_title'].append(strings.intern(_first(music, 'title') or ""))
+        sections['song_year'].append(strings.intern(_first(music, 'hasYear') or ""))
+        sections['song_singer'].append(entity_id(_first(music, 'hasSinger'), singer_ids, singers))
+        sections['song_genre'].append(entity_id(_first(music, 'hasGenre'), genre_ids, genres))
+    sections['singer_iri'] = array('i', (strings.intern(s.iri) for s in singers))
+    sections['singer_name'] = array('i', (strings.intern(_first(s, 'singerName') or "") for s in singers))
+    sections['genre_iri'] = array('i', (strings.intern(g.iri) for g in genres))
+    sections['genre_name'] = array('i', (strings.intern(_first(g, 'genreName') or "") for g in genres))
+    sections['user_iri'] = array('i', (strings.intern(u.iri) for u in users))
+    sections['user_name'] = array('i', (strings.intern(_first(u, 'userName')) for u in users))
+    sections['user_birth'] = array('i', (_first(u, 'birthYear') or 0 for u in users))
+    sections['user_email'] = array('i', (strings.intern(_first(u, 'email')) for u in users))
+
+    # Listas por usuário em formato CSR: ptr[u]..ptr[u+1] indexa o array de valores
+    for prefix, rows in (('rating', by_user), ('pref', preferences), ('rec', recommendations)):
+        ptr, values = array('i', [0]), array('i')
+        extra = array('i') if prefix == 'rating' else None
+        for row in rows:
+            if prefix == 'rating':
+                row = sorted(row)
+                values.extend(song for song, _ in row)
+                extra.extend(stars for _, stars in row)
+            else:
+                values.extend(row)
+            ptr.append(len(values))
+        sections[f'{prefix}_ptr'] = ptr
+        sections[f'{prefix}_values'] = values
+        if extra is not None:
+            sections['rating_stars'] = extra
+
+    for field in SORT_FIELDS:
+        order = array('i', (song_ids[music] for music in catalog.iter_sorted(field) if music in song_ids)
+                      if catalog is not None else range(len(musics)))
+        if len(order) < len(musics):
+            # Músicas fora do catálogo (só avaliadas ou recomendadas) vão para o fim
+            listed = set(order)
+            order.extend(i for i in range(len(musics)) if i not in listed)
+        rank = array('i', [0]) * len(musics)
+        for position, song in enumerate(order):
+            rank[song] = position
+        sections[f'order_{field}'] = order
+        sections[f'rank_{field}'] = rank
+
+    # Postings de trigramas como no TitleIndex: chaves ordenadas + CSR de músicas
+    postings = {}
+    for i, music in enumerate(musics):
+        for gram in ngrams(normalize_title(_first(music, 'title') or "")):
+            postings.setdefault(_gram_key(gram), []).append(i)
+    sections['gram_keys'] = array('q', sorted(postings))
+    sections['gram_ptr'], sections['gram_songs'] = array('i', [0]), array('i')
+    for key in sections['gram_keys']:
+        sections['gram_songs'].extend(postings[key])
+        sections['gram_ptr'].append(len(sections['gram_songs']))
+
+    sections['string_offsets'] = strings.offsets
+    blobs = {name: values.tobytes() for name, values in sections.items()}
+    blobs['strings'] = bytes(strings.data)
+
+    header = {'version': VERSION, 'source': source, 'sections': {}}
+    offset = 0
+    for name, blob in blobs.items():
+        header['sections'][name] = [offset, len(blob), 'B' if name == 'strings' else sections[name].typecode]
+        offset += len(blob) + (-len(blob)) % ALIGN
+    header_bytes = json.dumps(header).encode('utf-8')
+    header_bytes += b' ' * ((-len(header_bytes) - len(MAGIC) - 4) % ALIGN)
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes)
+        for blob in blobs.values():
+            f.write(blob + b'\0' * ((-len(blob)) % ALIGN))
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_source(path):
+    """The source stamp recorded in a snapshot, without mapping the whole file."""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return None
+        size, = struct.unpack('<I', f.read(4))
+        source = json.loads(f.read(size))['source']
+        return tuple(source) if isinstance(source, list) else source
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of a snapshot file.
+
+    Sections are memoryviews over the mapping, so opening costs a header
+    parse regardless of size; strings are decoded only when a row is read.
+    The name/title lookups are built on first use; search reads the stored
+    trigram postings.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = self._view = memoryview(self._mmap)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"Not a snapshot file: {path}")
+        size, = struct.unpack_from('<I', self._mmap, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(bytes(view[start:start + size]))
+        if header['version'] != VERSION:
+            raise ValueError(f"Unsupported snapshot version: {header['version']}")
+        self.source = tuple(header['source']) if isinstance(header['source'], list) else header['source']
+        base = start + size
+        self._views = {}
+        for name, (offset, length, typecode) in header['sections'].items():
+            section = view[base + offset:base + offset + length]
+            self._views[name] = section if typecode == 'B' else section.cast(typecode)
+        for name, section in self._views.items():
+            setattr(self, name, section)
+        self._user_ids = None
+        self._song_ids = None
+        self._lower_titles = None
+
+    def close(self):
+        for section in self._views.values():
+            section.release()
+        self._views.clear()
+        self._view.release()
+        self._mmap.close()
+
+    def string(self, sid):
+        if sid < 0:
+            return None
+        return bytes(self.strings[self.string_offsets[sid]:self.string_offsets[sid + 1]]).decode('utf-8')
+
+    @property
+    def song_count(self):
+        return len(self.song_title)
+
+    def user_id(self, name):
+        if self._user_ids is None:
+            self._user_ids = {self.string(sid): i for i, sid in enumerate(self.user_name)}
+        return self._user_ids.get(name)
+
+    def song_id(self, title):
+        if self._song_ids is None:
+            self._song_ids = {}
+            for i, sid in enumerate(self.song_title):
+                self._song_ids.setdefault(self.string(sid), i)
+        return self._song_ids.get(title)
+
+    def user(self, i):
+        """A stand-in with the list-valued attributes of the owlready2 User."""
+        email = self.string(self.user_email[i])
+        return SimpleNamespace(iri=self.string(self.user_iri[i]), userName=[self.string(self.user_name[i])],
+                               birthYear=[self.user_birth[i]], email=[email] if email is not None else [])
+
+    def song_row(self, i):
+        singer, genre = self.song_singer[i], self.song_genre[i]
+        return {
+            'title': self.string(self.song_title[i]),
+            'year': self.string(self.song_year[i]),
+            'genre': self.string(self.genre_name[genre]) if genre >= 0 else "",
+            'singer': self.string(self.singer_name[singer]) if singer >= 0 else "",
+        }
+
+    def rating(self, user, song):
+        start, end = self.rating_ptr[user], self.rating_ptr[user + 1]
+        i = bisect_left(self.rating_values, song, start, end)
+        if i < end and self.rating_values[i] == song:
+            return self.rating_stars[i]
+        return None
+
+    def preferences(self, user):
+        return [self.string(self.genre_name[g]) for g in self.pref_values[self.pref_ptr[user]:self.pref_ptr[user + 1]]]
+
+    def recommendations(self, user):
+        return list(self.rec_values[self.rec_ptr[user]:self.rec_ptr[user + 1]])
+
+    def search(self, query):
+        """Indexes of the songs whose title contains query, case-insensitively.
+
+        Intersects the stored postings of the query's trigrams, smallest
+        first, and decodes only the remaining candidates' titles.
+        """
+        query = normalize_title(query)
+        if len(query) < NGRAM_SIZE:
+            if self._lower_titles is None:
+                self._lower_titles = [normalize_title(self.string(sid)) for sid in self.song_title]
+            return {i for i, title in enumerate(self._lower_titles) if query in title}
+
+        postings = sorted((self._postings(gram) for gram in ngrams(query)), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(posting)
+        return {i for i in candidates if query in normalize_title(self.string(self.song_title[i]))}
+
+    def _postings(self, gram):
+        key = _gram_key(gram)
+        i = bisect_left(self.gram_keys, key)
+        if i == len(self.gram_keys) or self.gram_keys[i] != key:
+            return self.gram_songs[0:0]
+        return self.gram_songs[self.gram_ptr[i]:self.gram_ptr[i + 1]]
+
+    def sort_key(self, i, order_by):
+        """The CatalogIndex entry of song i: (sort key, storid)."""
+        if order_by == 'title':
+            key = self.string(self.song_title[i])
+        elif order_by == 'year':
+            key = self.string(self.song_year[i])
+        elif order_by == 'singer':
+            key = self.string(self.singer_name[self.song_singer[i]]) if self.song_singer[i] >= 0 else ""
+        else:
+            key = ""
+        return key, self.song_storid[i]
+
+    def first(self, order_by='title', limit=10, descending=False, after=None):
+        limit = max(limit, 0)
+        if order_by not in SORT_FIELDS:
+            songs = (i for i in range(self.song_count) if not after or self.song_storid[i] > after[1])
+            return list(islice(songs, limit))
+        order = self._views[f'order_{order_by}']
+        # As ordens seguem as entradas do CatalogIndex: a busca binária decodifica O(log n) chaves
+        key = lambda song: self.sort_key(song, order_by)
+        if descending:
+            end = bisect_left(order, tuple(after), key=key) if after else len(order)
+            return [order[i] for i in range(end - 1, max(end - 1 - limit, -1), -1)]
+        start = bisect_right(order, tuple(after), key=key) if after else 0
+        return list(order[start:start + limit])
+
+    def top_k(self, candidates, order_by='title', limit=10, descending=False, after=None):
+        if after:
+            after, backwards = tuple(after), descending and order_by in SORT_FIELDS
+            candidates = [i for i in candidates
+                          if (self.sort_key(i, order_by) < after if backwards else self.sort_key(i, order_by) > after)]
+        if order_by not in SORT_FIELDS:
+            return heapq.nsmallest(max(limit, 0), candidates, key=lambda i: self.song_storid[i])
+        rank = self._views[f'rank_{order_by}']
+        select = heapq.nlargest if descending else heapq.nsmallest
+        return select(max(limit, 0), candidates, key=lambda i: rank[i])
@@ -0,0 +1,70 @@
+from collections import defaultdict
+
+NGRAM_SIZE = 3
+
+
+def normalize_title(title):
+    return title.lower()
+
+
+def ngrams(text):
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+class TitleIndex:
+    """Inverted trigram index over lower-cased song titles.
+
+    A query matches the same songs as `query.lower() in title.lower()`: the
+    postings of its trigrams are intersected (smallest first) and the few
+    remaining candidates are verified against the stored normalized title.
+    Queries shorter than a trigram scan the stored titles.
+    """
+
+    def __init__(self):
+        self._titles = {}                  # storid -> título normalizado
+        self._musics = {}                  # storid -> music
+        self._postings = defaultdict(set)  # trigrama -> storids
+
+    def __len__(self):
+        return len(self._titles)
+
+    def rebuild(self, musics):
+        self._titles.clear()
+        self._musics.clear()
+        self._postings.clear()
+        for music in musics:
+            self.add(music)
+
+    def add(self, music):
+        old_title = self._titles.get(music.storid)
+        title = normalize_title(music.title[0]) if hasattr(music, 'title') and music.title else ""
+        self._musics[music.storid] = music
+        if old_title == title:
+            return
+        if old_title is not None:
+            for gram in ngrams(old_title):
+                postings = self._postings.get(gram)
+                if postings is not None:
+                    postings.discard(music.storid)
+                    if not postings:
+                        del self._postings[gram]
+        self._titles[music.storid] = title
+        for gram in ngrams(title):
+            self._postings[gram].add(music.storid)
+
+    def matches(self, query):
+        """Storids of the songs whose title contains query, case-insensitively."""
+        query = normalize_title(query)
+        if len(query) < NGRAM_SIZE:
+            return {storid for storid, title in self._titles.items() if query in title}
+
+        postings = sorted((self._postings.get(gram, set()) for gram in ngrams(query)), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates &= posting
+        return {storid for storid in candidates if query in self._titles[storid]}
+
+    def search(self, query):
+        return [self._musics[storid] for storid in self.matches(query)]
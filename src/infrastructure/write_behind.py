@@ -0,0 +1,217 @@
+import json
+import os
+import queue
+import threading
+
+from infrastructure.rule_engine import STAR_VALUES
+
+
+class RatingJournal:
+    """Append-only JSON Lines journal of submitted ratings.
+
+    Each submission is written (and fsync'd, when enabled) before it is
+    acknowledged; a {"applied": seq} line marks every entry up to seq as
+    committed to the ontology. On startup, entries after the last mark are
+    replayed.
+    """
+
+    def __init__(self, path: str, fsync: bool = True):
+        self.path = path
+        self.fsync = fsync
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _write(self, record):
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def append(self, entry):
+        self._write(entry)
+
+    def mark_applied(self, seq):
+        self._write({'applied': seq})
+
+    def pending(self):
+        entries, applied = [], 0
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Última linha cortada por uma queda no meio da escrita
+                    continue
+                if 'applied' in record:
+                    applied = max(applied, record['applied'])
+                else:
+                    entries.append(record)
+        return [entry for entry in entries if entry['seq'] > applied]
+
+    def compact(self):
+        # Tudo aplicado: o journal pode recomeçar vazio
+        self._file.close()
+        self._file = open(self.path, 'w', encoding='utf-8')
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class WriteBehindQueue:
+    """Ratings acknowledged on submit and applied by a background worker.
+
+    The worker drains whatever accumulated while the previous batch was being
+    applied and hands it to OntologyRepository.add_ratings, so a batch
+    invalidates only the users its ratings affect and costs one commit.
+    submit() rejects unknown users and songs up front; at most max_pending
+    ratings wait at a time, and submit() blocks up to `timeout` for a free
+    slot and then fails, pushing back on the caller. pending_rating() lets a
+    user read their own ratings before the batch holding them is committed.
+    A rating that still fails when retried alone is dropped and counted in
+    `failed`.
+    """
+
+    def __init__(self, repo, max_pending: int = 1000, batch_size: int = 200,
+                 journal_path: str = None, fsync: bool = True, poll_interval: float = 0.05):
+        self.repo = repo
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.journal = RatingJournal(journal_path, fsync=fsync) if journal_path else None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = {}            # (userName, title) -> (seq, stars)
+        self._user_versions = {}      # userName -> nº de mudanças nas notas pendentes
+        self._seq = 0
+        self._applied = 0
+        self._stopping = threading.Event()
+        self._thread = None
+        self.batches = 0
+        self.applied = 0
+        self.failed = 0
+
+    def start(self):
+        if self.journal:
+            self.replay()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+        return self
+
+    def replay(self):
+        """Apply the journaled ratings that were never committed."""
+        entries = self.journal.pending()
+        if entries:
+            self._seq = max(entry['seq'] for entry in entries)
+            self._apply(entries)
+            print(f"Replayed {len(entries)} journaled ratings")
+        self.journal.compact()
+        return len(entries)
+
+    def submit(self, user_name: str, music_title: str, stars: int, timeout: float = None):
+        # Valida antes de confirmar: depois do ack a nota não pode mais ser recusada
+        if int(stars) not in STAR_VALUES:
+            raise Exception("Rating must be between 1 and 5.")
+        if not self.repo.can_rate(user_name, music_title):
+            raise Exception("User, music, or genre not found.")
+        if not self._slots.acquire(timeout=timeout):
+            raise Exception("Too many pending ratings, please try again.")
+        with self._lock:
+            self._seq += 1
+            entry = {'seq': self._seq, 'userName': user_name, 'title': music_title, 'stars': int(stars)}
+            if self.journal:
+                self.journal.append(entry)
+            self._pending[(user_name, music_title)] = (entry['seq'], entry['stars'])
+            self._user_versions[user_name] = self._user_versions.get(user_name, 0) + 1
+            # Na fila em ordem de seq: cada lote aplicado é um prefixo contínuo do journal
+            self._queue.put(entry)
+        return True
+
+    def pending_rating(self, user_name: str, music_title: str):
+        pending = self._pending.get((user_name, music_title))
+        return pending[1] if pending else None
+
+    def pending_ratings(self, user_name: str):
+        return {title: stars for (name, title), (_, stars) in list(self._pending.items()) if name == user_name}
+
+    def version(self, user_name: str):
+        """Changes whenever the user's pending ratings do, before the batch is applied."""
+        return self._user_versions.get(user_name, 0)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def flush(self):
+        """Block until every submitted rating has been applied."""
+        self._queue.join()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self.journal:
+            self.journal.close()
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=self.poll_interval)]
+            except queue.Empty:
+                continue
+            # Group commit: tudo o que chegou enquanto o lote anterior era aplicado
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._apply(batch)
+            except Exception as e:
+                print("Error applying ratings:", e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                    self._slots.release()
+
+    def _apply(self, batch):
+        latest = {}
+        for entry in batch:
+            latest[(entry['userName'], entry['title'])] = entry
+        failed = []
+        try:
+            self.repo.add_ratings(self._records(latest.values()))
+        except Exception as e:
+            print("Error applying ratings, retrying one by one:", e)
+            # Uma nota ruim não derruba o lote: as outras são aplicadas sozinhas
+            for entry in latest.values():
+                try:
+                    self.repo.add_ratings(self._records([entry]))
+                except Exception as e:
+                    print(f"Dropping rating of {entry['userName']} for {entry['title']}:", e)
+                    failed.append(entry)
+        self.batches += 1
+        self.applied += len(batch) - len(failed)
+        self.failed += len(failed)
+
+        last = max(entry['seq'] for entry in batch)
+        with self._lock:
+            for key, entry in latest.items():
+                if self._pending.get(key, (None,))[0] == entry['seq']:
+                    del self._pending[key]
+            for entry in failed:
+                # A nota some da página de quem a enviou
+                self._user_versions[entry['userName']] = self._user_versions.get(entry['userName'], 0) + 1
+            self._applied = last
+            if self.journal:
+                self.journal.mark_applied(self._applied)
+                if self._applied == self._seq:
+                    self.journal.compact()
+
+    @staticmethod
+    def _records(entries):
+        return [{'userName': e['userName'], 'title': e['title'], 'stars': e['stars']} for e in entries]
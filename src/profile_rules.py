@@ -0,0 +1,24 @@
+import argparse
+import json
+import os
+from application.ontology_service import OntologyService
+from infrastructure.rule_profiler import format_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile each SWRL recommendation rule with the native engine.")
+    parser.add_argument('--ontology', default=os.path.join(os.path.dirname(__file__), '../data/data.rdf'))
+    parser.add_argument('--backend', default='rdfxml', choices=['rdfxml', 'sqlite'])
+    parser.add_argument('--repeat', type=int, default=1, help="report the fastest of N runs")
+    parser.add_argument('--json', action='store_true', help="print the structured report as JSON")
+    args = parser.parse_args()
+
+    service = OntologyService(args.ontology, backend=args.backend, reasoner='native')
+    service.load_ontology()
+    report = min((service.profile_reasoning() for _ in range(max(args.repeat, 1))),
+                 key=lambda report: report['total_seconds'])
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import pytest
+import app as web
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '../../../data/data.rdf')
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../src'))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # create_app() troca o Startup do módulo; o monkeypatch devolve o original
+    monkeypatch.setattr(web, 'startup', web.startup)
+    monkeypatch.setattr(web, 'service', web.service)
+    web.app.config['TESTING'] = True
+    return web.app.test_client()
+
+
+@pytest.fixture
+def blocked_boot(monkeypatch):
+    release = threading.Event()
+
+    def boot(startup):
+        with startup.phase('load'):
+            release.wait(10)
+        return None
+    monkeypatch.setattr(web, 'boot', boot)
+    yield release
+    release.set()
+
+
+def test_import_does_not_boot():
+    """Test that importing the app neither starts the boot nor imports owlready2."""
+    code = ("import sys; import app; "
+            "assert 'owlready2' not in sys.modules; "
+            "assert not app.startup.ready() and app.startup.started is None; "
+            "assert app.service is None")
+    result = subprocess.run([sys.executable, '-c', code], cwd=SRC_DIR, capture_output=True, timeout=60)
+    assert result.returncode == 0, result.stderr.decode()
+
+
+def test_not_ready_before_create_app(client):
+    """Test that without the entry point the app only answers liveness checks."""
+    assert client.get('/healthz').status_code == 200
+    assert client.get('/readyz').status_code == 503
+    assert client.get('/login').status_code == 503
+
+
+def test_routes_wait_for_boot(client, blocked_boot):
+    """Test that routes answer 503 while booting and 200 once the boot finishes."""
+    web.create_app()
+    assert client.get('/healthz').status_code == 200
+    response = client.get('/readyz')
+    assert response.status_code == 503
+    assert response.get_json()['status'] == 'starting'
+    response = client.get('/login')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+    blocked_boot.set()
+    assert web.startup.wait(10)
+    response = client.get('/readyz')
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'ready'
+    assert 'load' in response.get_json()['phases']
+    assert client.get('/login').status_code == 200
+
+
+def test_failed_boot_is_not_ready(client, monkeypatch):
+    """Test that a failed boot keeps answering 503 with its error."""
+    def boot(startup):
+        raise Exception("ontology not found")
+    monkeypatch.setattr(web, 'boot', boot)
+    web.create_app()
+    assert not web.startup.wait(10)
+    response = client.get('/readyz')
+    assert response.status_code == 503
+    assert response.get_json() | {'elapsed_seconds': 0} == {
+        'status': 'failed', 'elapsed_seconds': 0, 'phases': {}, 'error': 'ontology not found'}
+    assert client.get('/login').status_code == 503
+
+
+@pytest.fixture
+def booted(client, tmp_path, monkeypatch):
+    """Fixture with the app booted on an isolated quadstore copy of data.rdf, logged in as alice."""
+    path = str(tmp_path / 'data.rdf')
+    shutil.copy(DATA_FILE, path)
+    monkeypatch.setattr(web, 'ontology_path', path)
+    monkeypatch.setenv('ONTOLOGY_BACKEND', 'sqlite')
+    monkeypatch.setenv('ONTOLOGY_REASONER', 'incremental')
+    for name in ('ONTOLOGY_SNAPSHOT', 'ONTOLOGY_BACKGROUND_REASONING', 'ONTOLOGY_WRITE_BEHIND'):
+        monkeypatch.delenv(name, raising=False)
+    web.create_app()
+    assert web.startup.wait(60)
+    service = web.service
+    service.register_user('alice', '1990', 'alice@example.com')
+    service.register_user('bob', '1991', 'bob@example.com')
+    service.register_user('carol', '1992', 'carol@example.com')
+    service.add_music('Cache Rock 1', '2020', 'Cache Singer', 'Cache Rock')
+    service.add_music('Cache Rock 2', '2021', 'Cache Singer', 'Cache Rock')
+    service.add_music('Cache Pop', '2021', 'Cache Singer', 'Cache Pop')
+    service.add_rating('alice', 'Cache Rock 1', 'Cache Rock', 5)
+    service.add_rating('bob', 'Cache Rock 2', 'Cache Rock', 5)
+    web.pages.clear()
+    with client.session_transaction() as session:
+        session['user'] = 'alice'
+    yield service
+    service.close()
+    web.pages.clear()
+
+
+@pytest.mark.parametrize('url', ['/list_musics', '/recommendations'])
+def test_unchanged_page_is_not_modified(client, booted, url):
+    """Test that revalidating with the page's ETag answers 304 and repeats are served from the cache."""
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert etag.startswith('W/') and first.headers['Cache-Control'] == 'private, no-cache'
+    assert len(web.pages) == 1
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    response = client.get(url)
+    assert response.status_code == 200 and response.data == first.data
+
+
+def test_own_rating_changes_etag(client, booted):
+    """Test that the user's own rating changes their ETag."""
+    etag = client.get('/list_musics').headers['ETag']
+    client.post('/rate', data={'submit_rating': 'Cache Pop', 'rating_Cache Pop': '3', 'genre_Cache Pop': 'Cache Pop'})
+    # A página com a mensagem pendente é renderizada sem cache
+    assert b'Rating added for Cache Pop' in client.get('/list_musics').data
+
+    response = client.get('/list_musics', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_rating_in_a_shared_genre_changes_etag(client, booted):
+    """Test that a rating by a user sharing a genre changes the ETag, and an unrelated one does not."""
+    etag = client.get('/recommendations').headers['ETag']
+    booted.add_rating('carol', 'Cache Pop', 'Cache Pop', 5)
+    assert client.get('/recommendations', headers={'If-None-Match': etag}).status_code == 304
+
+    booted.add_rating('bob', 'Cache Rock 1', 'Cache Rock', 4)
+    response = client.get('/recommendations', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_external_write_changes_etag(client, booted):
+    """Test that a write by another process to the store serves fresh pages instead of a 304 or a cached one."""
+    first = client.get('/list_musics')
+    etag = first.headers['ETag']
+    assert b'External Song' not in first.data
+
+    code = ("from infrastructure.ontology_repository import OntologyRepository; "
+            "repo = OntologyRepository(%r, backend='sqlite', reasoner='incremental'); repo.load(); "
+            "repo.add_music('External Song', '2022', 'Cache Singer', 'Cache Rock')"
+            % booted.repo.path)
+    result = subprocess.run([sys.executable, '-c', code], cwd=SRC_DIR, capture_output=True, timeout=60)
+    assert result.returncode == 0, result.stderr.decode()
+
+    response = client.get('/list_musics', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert b'External Song' in response.data
+    assert b'External Song' in client.get('/list_musics').data
+
+
+def test_bad_cursor_page_is_not_cached(client, booted):
+    """Test that the page flashing an invalid cursor is neither cached nor tagged."""
+    for _ in range(2):
+        response = client.get('/list_musics?cursor=bad')
+        assert response.status_code == 200
+        assert b'Invalid cursor' in response.data
+        assert 'ETag' not in response.headers
+        assert len(web.pages) == 0
+
+
+def test_metrics_endpoint(client, monkeypatch):
+    """Test that /metrics renders the request histograms when metrics are enabled."""
+    web.metrics.clear()
+    monkeypatch.setattr(web.metrics, 'enabled', True)
+    assert client.get('/healthz').status_code == 200
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'text/plain; version=0.0.4; charset=utf-8'
+    text = response.get_data(as_text=True)
+    assert 'http_request_seconds_count{endpoint="healthz",method="GET",status="200"} 1' in text
+    web.metrics.clear()
+
+
+def test_metrics_endpoint_disabled(client, monkeypatch):
+    """Test that /metrics is not found while metrics are disabled."""
+    monkeypatch.setattr(web.metrics, 'enabled', False)
+    response = client.get('/metrics')
+    assert response.status_code == 404
+    assert response.get_data(as_text=True) == 'Metrics are disabled.'
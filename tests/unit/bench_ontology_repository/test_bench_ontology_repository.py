@@ -0,0 +1,33 @@
+from benchmarks.bench_ontology_repository import bench_size, compare
+
+
+def _report(**sizes):
+    return {'results': {size: {op: {'median_ms': ms, 'min_ms': ms, 'runs': 1} for op, ms in ops.items()}
+                        for size, ops in sizes.items()}}
+
+
+def test_bench_size_times_every_operation(tmp_path):
+    """Test that a benchmark run times every repository operation."""
+    spec = dict(users=5, musics=30, ratings=40, genres=3)
+    results = bench_size('tiny', spec, str(tmp_path), repeat=1, reasoner='native')
+    for op in ('load[sqlite]', 'load[rdfxml]', 'save[sqlite]', 'save[rdfxml]', 'add_user', 'add_music', 'add_rating', 'get_user_rating',
+               'list_musics[title]', 'list_musics[year,search]', 'list_musics[singer,search_user]',
+               'list_recommended_musics[cold]'):
+        assert results[op]['median_ms'] >= 0
+
+
+def test_compare_flags_slowdowns():
+    """Test that an operation slower than the tolerance is reported, and noise is not."""
+    baseline = _report(small={'load': 10.0, 'get_user_rating': 0.1})
+    current = _report(small={'load': 30.0, 'get_user_rating': 0.5})
+    regressions = compare(current, baseline, tolerance=2.0)
+    assert [(r['operation'], r['kind']) for r in regressions] == [('load', 'time')]
+    assert compare(baseline, baseline) == []
+
+
+def test_compare_flags_scaling():
+    """Test that an operation growing faster with size than in the baseline is reported."""
+    baseline = _report(small={'list_musics': 1.0}, large={'list_musics': 2.0})
+    current = _report(small={'list_musics': 0.5}, large={'list_musics': 3.5})
+    regressions = compare(current, baseline, tolerance=2.0)
+    assert [(r['size'], r['kind']) for r in regressions] == [('small->large', 'scaling')]
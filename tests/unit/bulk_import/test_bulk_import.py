@@ -0,0 +1,57 @@
+import json
+import os
+import shutil
+import pytest
+from application.bulk_import import read_records
+from application.ontology_service import OntologyService
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '../../../data')
+
+
+@pytest.fixture
+def files(tmp_path):
+    users = tmp_path / 'users.csv'
+    users.write_text("userName,birthYear,email\nbulk1,1990,bulk1@example.com\nbulk2,1991,bulk2@example.com\n")
+    musics = tmp_path / 'musics.jsonl'
+    musics.write_text("\n".join(json.dumps(m) for m in [
+        {'title': 'Bulk Rock 1', 'year': '2001', 'singer': 'Bulk Singer', 'genre': 'Bulk Rock'},
+        {'title': 'Bulk Rock 2', 'year': '2002', 'singer': 'Bulk Singer', 'genre': 'Bulk Rock'},
+        {'title': 'Bulk Pop', 'year': '2003', 'singer': 'Other Singer', 'genre': 'Bulk Pop'},
+    ]) + "\n")
+    ratings = tmp_path / 'ratings.csv'
+    ratings.write_text("userName,title,stars\nbulk1,Bulk Rock 1,5\nbulk2,Bulk Pop,4\nbulk1,Bulk Pop,2\nghost,Bulk Pop,5\n")
+    return str(users), str(musics), str(ratings)
+
+
+def test_read_records(files):
+    """Test streaming records from CSV and JSON Lines files."""
+    users, musics, _ = files
+    assert next(read_records(users)) == {'userName': 'bulk1', 'birthYear': '1990', 'email': 'bulk1@example.com'}
+    assert [m['title'] for m in read_records(musics)] == ['Bulk Rock 1', 'Bulk Rock 2', 'Bulk Pop']
+    with pytest.raises(ValueError):
+        list(read_records('records.xml'))
+
+
+def test_bulk_import_reasons_and_saves_once(files, tmp_path, monkeypatch):
+    """Test that a bulk import creates every record with a single reasoning pass and save."""
+    path = str(tmp_path / 'data.rdf')
+    shutil.copy(os.path.join(DATA_DIR, 'data.rdf'), path)
+    service = OntologyService(path, backend='sqlite', reasoner='native')
+    service.load_ontology()
+
+    calls = []
+    reason, save = service.repo.reason, service.repo.save
+    monkeypatch.setattr(service.repo, 'reason', lambda: calls.append('reason') or reason())
+    monkeypatch.setattr(service.repo, 'save', lambda: calls.append('save') or save())
+
+    users, musics, ratings = files
+    report = service.bulk_import(users_path=users, musics_path=musics, ratings_path=ratings)
+    assert calls == ['reason', 'save']
+    assert (report['users'], report['musics'], report['ratings'], report['skipped']) == (2, 3, 3, 1)
+    assert report['rows_per_second'] > 0
+
+    assert service.get_user_rating('bulk1', 'Bulk Pop') == 2
+    assert service.repo.get_user_preferences('bulk1') == ['Bulk Rock']
+    titles = {m['title'] for m in service.list_recommended_musics('bulk1', limit=10)}
+    assert titles == {'Bulk Rock 1', 'Bulk Rock 2'}
+    assert [m['title'] for m in service.list_musics(search='bulk rock 2')] == ['Bulk Rock 2']
@@ -0,0 +1,86 @@
+from itertools import count
+from types import SimpleNamespace
+import pytest
+from src.infrastructure.catalog_index import CatalogIndex, music_sort_key
+
+_storids = count(1)
+
+
+def _music(title, year, singer):
+    return SimpleNamespace(storid=next(_storids), title=[title], hasYear=[year],
+                           hasSinger=[SimpleNamespace(singerName=[singer])])
+
+
+@pytest.fixture
+def catalog():
+    musics = [
+        _music('Yesterday', '1965', 'The Beatles'),
+        _music('Imagine', '1971', 'John Lennon'),
+        _music('Hotel California', '1976', 'Eagles'),
+        _music('Bohemian Rhapsody', '1975', 'Queen'),
+        _music('Stairway to Heaven', '1971', 'Led Zeppelin'),
+    ]
+    index = CatalogIndex()
+    index.rebuild(musics)
+    return index, musics
+
+
+@pytest.mark.parametrize('order_by', ['title', 'year', 'singer'])
+@pytest.mark.parametrize('descending', [False, True])
+def test_first_page_matches_full_sort(catalog, order_by, descending):
+    """Test that reading the head of the index equals sorting the whole catalog."""
+    index, musics = catalog
+    expected = sorted(musics, key=lambda m: (music_sort_key(m, order_by), m.storid), reverse=descending)
+    assert index.first(order_by, 3, descending) == expected[:3]
+    assert index.first(order_by, 100, descending) == expected
+
+
+@pytest.mark.parametrize('descending', [False, True])
+def test_top_k_of_filtered_candidates(catalog, descending):
+    """Test the heap-based page over a filtered subset."""
+    index, musics = catalog
+    candidates = [m for m in musics if m.hasYear[0] < '1976']
+    expected = sorted(candidates, key=lambda m: (m.title[0], m.storid), reverse=descending)
+    assert index.top_k(candidates, 'title', 2, descending) == expected[:2]
+
+
+def test_add_inserts_and_repositions(catalog):
+    """Test that new songs are inserted in place and updated songs are moved."""
+    index, musics = catalog
+    new = _music('Across the Universe', '1970', 'The Beatles')
+    index.add(new)
+    assert index.first('title', 1) == [new]
+    assert len(index) == 6
+
+    new.title = ['Zombie']
+    index.add(new)
+    assert index.first('title', 1, descending=True) == [new]
+    assert index.first('title', 100).count(new) == 1
+
+
+def test_unsupported_order_keeps_catalog_order(catalog):
+    """Test that an unknown order_by returns songs in catalog order."""
+    index, musics = catalog
+    assert index.first('genre', 10) == musics
+    assert index.first('title', 0) == []
+
+
+@pytest.mark.parametrize('order_by', ['title', 'year', 'singer', 'unknown'])
+@pytest.mark.parametrize('descending', [False, True])
+def test_pages_after_cursor(catalog, order_by, descending):
+    """Test that chaining pages from the last entry's sort key walks the whole order once."""
+    index, musics = catalog
+    expected = index.first(order_by, 100, descending)
+    pages, after = [], None
+    while True:
+        page = index.first(order_by, 2, descending, after)
+        if not page:
+            break
+        pages.extend(page)
+        after = index.sort_key(page[-1], order_by)
+    assert pages == expected
+
+    candidates = musics[1:]
+    first = index.top_k(candidates, order_by, 2, descending)
+    rest = index.top_k(candidates, order_by, 100, descending, index.sort_key(first[-1], order_by))
+    assert first + rest == index.top_k(candidates, order_by, 100, descending)
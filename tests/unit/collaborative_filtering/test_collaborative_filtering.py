@@ -0,0 +1,98 @@
+import os
+import random
+import shutil
+from math import sqrt
+from types import SimpleNamespace
+import pytest
+from src.infrastructure.collaborative_filtering import NeighborIndex
+from src.infrastructure.ontology_repository import OntologyRepository
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '../../../data/data.rdf')
+
+
+def _rating(user, music, stars):
+    return SimpleNamespace(givenBy=[user], ratesSong=[music], stars=[stars])
+
+
+def _neighbors(index):
+    return {user: [(round(score, 9), other) for score, other in neighbors]
+            for user, neighbors in index.neighbors.items()}
+
+
+def test_cosine_similarity_and_ranking():
+    """Test cosine neighbors and that recommendations are ranked and skip rated songs."""
+    index = NeighborIndex(k=2)
+    index.rebuild([
+        _rating('alice', 's1', 5), _rating('alice', 's2', 4),
+        _rating('bob', 's1', 5), _rating('bob', 's2', 4), _rating('bob', 's3', 5), _rating('bob', 's4', 2),
+        _rating('carol', 's1', 1), _rating('carol', 's5', 5),
+    ])
+
+    expected = (5 * 5 + 4 * 4) / (sqrt(5 * 5 + 4 * 4) * sqrt(5 * 5 + 4 * 4 + 5 * 5 + 2 * 2))
+    assert index.neighbors['alice'][0] == (pytest.approx(expected), 'bob')
+    assert [other for _, other in index.neighbors['alice']] == ['bob', 'carol']
+    # s4 tem nota 2 e s1/s2 já foram avaliadas
+    assert index.recommend('alice') == ['s3', 's5']
+    assert index.recommend('alice', limit=1) == ['s3']
+    assert index.recommend('nobody') == []
+
+
+def test_jaccard_similarity():
+    """Test Jaccard similarity over the sets of rated songs."""
+    index = NeighborIndex(k=5, similarity='jaccard')
+    index.rebuild([_rating('alice', 's1', 5), _rating('alice', 's2', 1),
+                   _rating('bob', 's2', 3), _rating('bob', 's3', 4)])
+    assert index.neighbors['alice'] == [(pytest.approx(1 / 3), 'bob')]
+
+    with pytest.raises(ValueError):
+        NeighborIndex(similarity='pearson')
+
+
+def test_neighbors_are_bounded_by_k():
+    """Test that every user keeps at most K neighbors, even when all users co-rate a song."""
+    index = NeighborIndex(k=3)
+    index.rebuild([_rating(f'user{i}', 'hit', 5) for i in range(20)])
+    assert all(len(neighbors) == 3 for neighbors in index.neighbors.values())
+
+
+def test_incremental_update_matches_rebuild():
+    """Test that a sequence of inserts and updates keeps the same neighbors as a rebuild."""
+    rng = random.Random(11)
+    ratings = {}
+    index = NeighborIndex(k=4)
+    index.rebuild([])
+    for _ in range(400):
+        key = (f'user{rng.randrange(25)}', f'song{rng.randrange(40)}')
+        rating = ratings.setdefault(key, _rating(key[0], key[1], 0))
+        rating.stars = [rng.randint(1, 5)]
+        affected = index.update(rating)
+        assert key[0] in affected
+
+    rebuilt = NeighborIndex(k=4)
+    rebuilt.rebuild(ratings.values())
+    # Empates podem escolher vizinhos diferentes, então comparamos as similaridades
+    for user in rebuilt.vectors:
+        assert sorted(s for s, _ in _neighbors(index)[user]) == sorted(s for s, _ in _neighbors(rebuilt)[user])
+
+
+def test_repository_collaborative_recommender(tmp_path):
+    """Test ranked recommendations from neighbors through the repository, updated on add_rating."""
+    path = str(tmp_path / 'data.rdf')
+    shutil.copy(DATA_FILE, path)
+    repo = OntologyRepository(path, backend='sqlite', reasoner='incremental', recommender='collaborative', neighbors=5)
+    repo.load()
+
+    repo.add_user('cf_alice', 1990, 'alice@example.com')
+    repo.add_user('cf_bob', 1990, 'bob@example.com')
+    for title in ('CF Song 1', 'CF Song 2', 'CF Song 3'):
+        repo.add_music(title, '2020', 'CF Singer', 'CF Genre')
+    repo.add_rating('cf_alice', 'CF Song 1', 'CF Genre', 5)
+    repo.add_rating('cf_bob', 'CF Song 1', 'CF Genre', 5)
+    assert repo.list_recommended_musics('cf_alice') == []
+
+    # Nota nova do vizinho invalida a lista em cache de cf_alice
+    repo.add_rating('cf_bob', 'CF Song 2', 'CF Genre', 5)
+    assert [m['title'] for m in repo.list_recommended_musics('cf_alice')] == ['CF Song 2']
+
+    with pytest.raises(ValueError):
+        OntologyRepository(path, recommender='popular')
@@ -0,0 +1,65 @@
+import os
+from owlready2 import World
+from data.extract_first_n_rdf_entities import extract_entities, extract_first_n_entities
+from src.infrastructure.ontology_repository import OntologyRepository
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '../../../data/data.rdf')
+
+
+def _load(path):
+    return World().get_ontology(path).load()
+
+
+def _class_names(onto):
+    return [{c.name for c in individual.is_a} for individual in onto.individuals()]
+
+
+def test_first_n_entities_keeps_schema(tmp_path):
+    """Test that the first N individuals are kept together with every schema declaration."""
+    output = str(tmp_path / 'first.rdf')
+    assert extract_first_n_entities(DATA_FILE, output, 5) == 5
+
+    onto = _load(output)
+    source = _load(DATA_FILE)
+    assert len(list(onto.individuals())) == 5
+    assert {c.name for c in onto.classes()} == {c.name for c in source.classes()}
+    assert len(list(onto.rules())) == len(list(source.rules()))
+
+    repo = OntologyRepository(output, backend='sqlite', db_path=str(tmp_path / 'first.sqlite3'))
+    assert hasattr(repo.load(), 'Music')
+
+
+def test_class_filter(tmp_path):
+    """Test extracting only individuals of the selected classes."""
+    output = str(tmp_path / 'ratings.rdf')
+    count = extract_entities(DATA_FILE, output, classes=['Rating'])
+    classes = _class_names(_load(output))
+    assert count == len(classes) > 0
+    assert all(names == {'Rating'} for names in classes)
+
+
+def test_random_sample_is_seeded(tmp_path):
+    """Test that sampling returns N individuals and is reproducible with a seed."""
+    first, second = str(tmp_path / 'a.rdf'), str(tmp_path / 'b.rdf')
+    assert extract_entities(DATA_FILE, first, sample=8, seed=42, classes=['Music', 'Rating']) == 8
+    extract_entities(DATA_FILE, second, sample=8, seed=42, classes=['Music', 'Rating'])
+    with open(first) as a, open(second) as b:
+        assert a.read() == b.read()
+    assert all(names & {'Music', 'Rating'} for names in _class_names(_load(first)))
+
+
+def test_multiple_entities_on_one_line(tmp_path):
+    """Test that entity boundaries come from the XML structure, not from line breaks."""
+    source = tmp_path / 'compact.rdf'
+    source.write_text(
+        '<?xml version="1.0"?><rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" '
+        'xmlns:owl="http://www.w3.org/2002/07/owl#" xmlns="http://example.org/music#" xml:base="http://example.org/music">'
+        '<owl:Ontology rdf:about="http://example.org/music"/><owl:Class rdf:about="#Music"/>'
+        '<owl:NamedIndividual rdf:about="#a"><rdf:type rdf:resource="#Music"/></owl:NamedIndividual>'
+        '<owl:NamedIndividual rdf:about="#b"><rdf:type rdf:resource="#Music"/></owl:NamedIndividual>'
+        '<Music rdf:about="#c"/></rdf:RDF>'
+    )
+    output = str(tmp_path / 'out.rdf')
+    assert extract_entities(str(source), output, n_entities=2) == 2
+    assert sorted(i.name for i in _load(output).individuals()) == ['a', 'b']
+    assert extract_entities(str(source), output, classes=['Music']) == 3
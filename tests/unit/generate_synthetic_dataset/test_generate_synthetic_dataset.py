@@ -0,0 +1,80 @@
+import os
+from collections import Counter
+import pytest
+from owlready2 import World
+from data.generate_synthetic_dataset import SyntheticDataset, generate_dataset, import_quadstore
+from src.infrastructure.ontology_repository import OntologyRepository
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '../../../data/data.rdf')
+SIZES = dict(users=30, musics=200, ratings=600, genres=5, seed=7)
+
+
+def _generate(tmp_path, name='synthetic.rdf', **sizes):
+    output = str(tmp_path / name)
+    counts = generate_dataset(output, schema_path=DATA_FILE, **{**SIZES, **sizes})
+    return output, counts
+
+
+def test_generate_sizes_and_schema(tmp_path):
+    """Test that the generated ontology has the requested sizes and the full schema."""
+    output, counts = _generate(tmp_path)
+    assert counts == {'users': 30, 'musics': 200, 'ratings': 600, 'genres': 5, 'singers': 20}
+
+    onto = World().get_ontology(output).load()
+    source = World().get_ontology(DATA_FILE).load()
+    assert {c.name for c in onto.classes()} == {c.name for c in source.classes()}
+    assert len(list(onto.rules())) == len(list(source.rules()))
+    assert len(onto.Rating.instances()) == 600
+
+    pairs = set()
+    for rating in onto.Rating.instances():
+        pairs.add((rating.givenBy[0], rating.ratesSong[0]))
+        assert rating.ratesGenre == rating.ratesSong[0].hasGenre
+        assert 1 <= rating.stars[0] <= 5
+    assert len(pairs) == 600
+
+
+def test_generate_is_seeded(tmp_path):
+    """Test that the same seed produces the same file and another seed does not."""
+    first, _ = _generate(tmp_path, 'first.rdf')
+    second, _ = _generate(tmp_path, 'second.rdf')
+    other, _ = _generate(tmp_path, 'other.rdf', seed=8)
+    with open(first) as f1, open(second) as f2, open(other) as f3:
+        text = f1.read()
+        assert text == f2.read()
+        assert text != f3.read()
+
+
+def test_popularity_is_skewed():
+    """Test that a few songs collect most of the ratings (Zipf popularity)."""
+    dataset = SyntheticDataset(users=200, musics=1000, ratings=5000, seed=1)
+    songs = Counter(text.split('<ratesSong rdf:resource="')[1].split('"')[0]
+                    for text in dataset.individuals() if 'rdf:resource="#Rating"' in text)
+    top = sum(count for _, count in songs.most_common(100))
+    assert top > 0.5 * sum(songs.values())
+
+
+def test_invalid_sizes():
+    """Test that impossible sizes are rejected."""
+    with pytest.raises(ValueError):
+        SyntheticDataset(users=2, musics=2, ratings=5)
+    with pytest.raises(ValueError):
+        SyntheticDataset(users=0)
+
+
+def test_generated_dataset_in_repository(tmp_path):
+    """Test loading the generated dataset through the repository and the quadstore."""
+    output, _ = _generate(tmp_path)
+    db_path = str(tmp_path / 'synthetic.sqlite3')
+    import_quadstore(output, db_path)
+
+    repo = OntologyRepository(output, backend='sqlite', db_path=db_path, reasoner='native')
+    repo.load()
+    assert len(repo.catalog_index) == 200
+    assert len(repo.rating_index) == 600
+    assert repo.get_user('user1')
+
+    rating = next(iter(repo.onto.Rating.instances()))
+    user_name = rating.givenBy[0].userName[0]
+    assert repo.get_user_rating(user_name, rating.ratesSong[0].title[0]) == rating.stars[0]
+    assert repo.list_recommended_musics(user_name, limit=5) is not None
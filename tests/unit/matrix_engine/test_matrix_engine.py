@@ -0,0 +1,81 @@
+import os
+import shutil
+import pytest
+from owlready2 import World
+from data.generate_synthetic_dataset import generate_dataset
+from src.infrastructure.rule_engine import RuleEngine
+from src.infrastructure.ontology_repository import OntologyRepository
+
+pytest.importorskip('numpy')
+pytest.importorskip('scipy.sparse')
+from src.infrastructure.matrix_engine import MatrixEngine
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '../../../data')
+
+
+def _load(path):
+    return World().get_ontology(path).load()
+
+
+def _closure(engine):
+    preferences = {(u.iri, g.iri) for u, genres in engine.preferences.items() for g in genres}
+    recommendations = {(u.iri, m.iri) for u, musics in engine.recommendations.items() for m in musics}
+    return preferences, recommendations
+
+
+@pytest.fixture(params=['data.rdf', 'synthetic'])
+def ontology_path(request, tmp_path):
+    path = os.path.join(DATA_DIR, 'data.rdf')
+    if request.param == 'synthetic':
+        path = str(tmp_path / 'synthetic.rdf')
+        generate_dataset(path, schema_path=os.path.join(DATA_DIR, 'data.rdf'),
+                         users=40, musics=300, ratings=800, genres=8, seed=3)
+    return path
+
+
+def test_matrix_engine_matches_rule_engine(ontology_path):
+    """Test that the sparse matrix products derive the same closure as the rule engine."""
+    expected = _closure(RuleEngine(_load(ontology_path)).run())
+    engine = MatrixEngine(_load(ontology_path)).run()
+    assert expected[0]
+    assert _closure(engine) == expected
+
+
+def test_matrices_shape(ontology_path):
+    """Test the exported star, incidence and recommendation matrices."""
+    engine = MatrixEngine(_load(ontology_path)).run()
+    users, musics, genres = len(engine.user_index), len(engine.music_index), len(engine.genre_index)
+    assert engine.stars.shape == (users, musics)
+    assert engine.song_genres.shape == (musics, genres)
+    assert engine.preference_matrix.shape == (users, genres)
+    assert engine.recommendation_matrix.shape == (users, musics)
+    assert set(engine.stars.data) <= {1, 2, 3, 4, 5}
+    assert engine.recommendation_matrix.nnz == sum(len(m) for m in engine.recommendations.values())
+
+
+def test_materialize_writes_closure(ontology_path):
+    """Test that the batched result is written back as hasPreference and RecommendedMusic."""
+    onto = _load(ontology_path)
+    engine = MatrixEngine(onto).run().materialize()
+    users = onto.User.instances()
+    written = ({(u.iri, g.iri) for u in users for g in u.hasPreference},
+               {(u.iri, m.iri) for u in users for m in u.RecommendedMusic})
+    assert written == _closure(engine)
+
+
+def test_repository_with_matrix_reasoner(tmp_path):
+    """Test that the matrix reasoner gives the same recommendations as the native one."""
+    results = {}
+    for reasoner in ('native', 'matrix'):
+        path = str(tmp_path / f'{reasoner}.rdf')
+        shutil.copy(os.path.join(DATA_DIR, 'data.rdf'), path)
+        repo = OntologyRepository(path, backend='sqlite', reasoner=reasoner)
+        repo.load()
+        repo.add_user('matrixuser', 1990, 'matrix@example.com')
+        repo.add_music('Matrix Rock 1', '2020', 'Matrix Singer', 'Matrix Rock')
+        repo.add_music('Matrix Rock 2', '2021', 'Matrix Singer', 'Matrix Rock')
+        repo.add_rating('matrixuser', 'Matrix Rock 1', 'Matrix Rock', 5)
+        results[reasoner] = (repo.get_user_preferences('matrixuser'),
+                             {m['title'] for m in repo.list_recommended_musics('matrixuser', limit=1000)})
+    assert results['matrix'] == results['native']
+    assert results['matrix'][0] == ['Matrix Rock']
@@ -0,0 +1,80 @@
+import os
+import shutil
+import pytest
+from infrastructure.metrics import Metrics, metrics as registry
+from infrastructure.ontology_repository import OntologyRepository
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '../../../data/data.rdf')
+
+
+@pytest.fixture
+def enabled_registry():
+    registry.clear()
+    registry.enabled = True
+    yield registry
+    registry.enabled = False
+    registry.clear()
+
+
+def test_disabled_metrics_record_nothing():
+    """Test that a disabled registry ignores counters, timers and histograms."""
+    metrics = Metrics()
+
+    @metrics.timed('calls_seconds')
+    def call():
+        return 42
+
+    assert call() == 42
+    metrics.inc('calls_total')
+    metrics.observe('calls_seconds', 0.1)
+    with metrics.timer('calls_seconds'):
+        pass
+    assert metrics.render() == '\n'
+
+
+def test_histogram_buckets():
+    """Test cumulative buckets, including an observation above the last bucket."""
+    metrics = Metrics(enabled=True, buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 0.5, 2.0):
+        metrics.observe('op_seconds', seconds, op='save')
+    lines = metrics.render().splitlines()
+    assert lines[0] == '# TYPE op_seconds histogram'
+    assert 'op_seconds_bucket{op="save",le="0.1"} 1' in lines
+    assert 'op_seconds_bucket{op="save",le="1.0"} 3' in lines
+    assert 'op_seconds_bucket{op="save",le="+Inf"} 4' in lines
+    assert 'op_seconds_sum{op="save"} 3.05' in lines
+    assert 'op_seconds_count{op="save"} 4' in lines
+
+
+def test_counters_gauges_and_labels():
+    """Test counters, gauges with and without labels, and label escaping."""
+    metrics = Metrics(enabled=True)
+    metrics.inc('errors_total', route='/rate "x"')
+    metrics.inc('errors_total', 2, route='/rate "x"')
+    metrics.gauge('songs', lambda: 108)
+    metrics.gauge('entities', lambda: {'users': 4, 'ratings': 9}, label='kind')
+    metrics.gauge('broken', lambda: 1 / 0)
+    lines = metrics.render().splitlines()
+    assert 'errors_total{route="/rate \\"x\\""} 3' in lines
+    assert 'songs 108' in lines
+    assert lines.index('entities{kind="ratings"} 9') < lines.index('entities{kind="users"} 4')
+    assert not any(line.startswith('broken') for line in lines)
+
+
+def test_repository_methods_are_timed(enabled_registry, tmp_path):
+    """Test that repository methods and reasoning are observed, and the size gauges."""
+    path = str(tmp_path / 'data.rdf')
+    shutil.copy(DATA_FILE, path)
+    repo = OntologyRepository(path, backend='sqlite', reasoner='native')
+    repo.load()
+    repo.list_recommended_musics('Outro')
+    enabled_registry.gauge('ontology_entities', repo.stats, label='kind')
+    text = enabled_registry.render()
+    for method in ('load', 'reason', 'list_recommended_musics'):
+        assert f'ontology_repository_seconds_count{{method="{method}"}} 1' in text
+    assert 'ontology_reasoning_seconds_count{reasoner="native",scope="full"} 1' in text
+    stats = repo.stats()
+    assert stats['users'] == len(list(repo._instances('User')))
+    assert stats['songs'] == len(repo.catalog_index)
+    assert f'ontology_entities{{kind="recommendations"}} {stats["recommendations"]}' in text
+    repo.world.close()
@@ -210,6 +210,7 @@ def test_list_musics_with_real_data(sample_ontology):
         assert all('genre' in m for m in musics)
         assert all('singer' in m for m in musics)
         assert all('already_rated' in m for m in musics)
+        assert all('user_rating' in m for m in musics)
 
 def test_search_with_real_data(sample_ontology):
     """Test search functionality with real data."""
@@ -314,3 +315,341 @@ def test_add_test_data_to_file(sample_ontology):
     except Exception as e:
         print(f"❌ Erro ao adicionar dados de teste: {e}")
         raise
+
+def test_ontology_stays_resident_between_calls(sample_ontology, monkeypatch):
+    """Test that repository calls reuse the loaded ontology until the file changes on disk."""
+    repo = OntologyRepository(sample_ontology)
+    repo.load()
+
+    reloads = []
+    monkeypatch.setattr(repo, 'reload', lambda: reloads.append(True) or repo.onto)
+
+    repo.add_user('testuser', 1990, 'test@example.com')
+    assert repo.get_user('testuser') is not None
+    assert reloads == []
+
+    stat = os.stat(sample_ontology)
+    os.utime(sample_ontology, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    repo.get_user('testuser')
+    assert reloads == [True]
+
+def test_sqlite_backend_commits_without_rewriting_rdf(sample_ontology, tmp_path):
+    """Test that the SQLite quadstore backend persists writes without touching the RDF file."""
+    db_path = str(tmp_path / 'data.sqlite3')
+    repo = OntologyRepository(sample_ontology, backend='sqlite', db_path=db_path)
+    onto = repo.load()
+    assert hasattr(onto, 'User')
+    assert repo.list_musics(limit=1)
+
+    rdf_mtime = os.path.getmtime(sample_ontology)
+    repo.add_user('sqliteuser', 1990, 'sqlite@example.com')
+    assert os.path.getmtime(sample_ontology) == rdf_mtime
+
+    repo2 = OntologyRepository(sample_ontology, backend='sqlite', db_path=db_path)
+    repo2.load()
+    user = repo2.get_user('sqliteuser', 'sqlite@example.com')
+    assert user is not None
+    assert user.birthYear[0] == 1990
+
+def test_sqlite_backend_export_and_import(sample_ontology, tmp_path):
+    """Test exporting the quadstore back to RDF/XML and importing it into a new quadstore."""
+    repo = OntologyRepository(sample_ontology, backend='sqlite', db_path=str(tmp_path / 'a.sqlite3'))
+    repo.load()
+    repo.add_music('Quadstore Song', '2024', 'Quadstore Singer', 'Rock')
+
+    exported = repo.export_rdf(str(tmp_path / 'export.rdf'))
+    assert os.path.getsize(exported) > 0
+
+    repo2 = OntologyRepository(exported, backend='sqlite', db_path=str(tmp_path / 'b.sqlite3'))
+    repo2.load()
+    titles = [m['title'] for m in repo2.list_musics(limit=1000)]
+    assert 'Quadstore Song' in titles
+
+def test_unknown_backend():
+    """Test that an unknown storage backend is rejected."""
+    with pytest.raises(ValueError):
+        OntologyRepository('nonexistent_file.rdf', backend='postgres')
+
+@pytest.fixture
+def native_repo(tmp_path):
+    """Fixture with an isolated quadstore copy of data.rdf using the incremental native reasoner."""
+    path = str(tmp_path / 'data.rdf')
+    shutil.copy(os.path.join(os.path.dirname(__file__), '../../../data/data.rdf'), path)
+    repo = OntologyRepository(path, backend='sqlite', reasoner='incremental')
+    repo.load()
+    repo.add_user('alice', 1990, 'alice@example.com')
+    repo.add_user('bob', 1991, 'bob@example.com')
+    repo.add_music('Cache Rock 1', '2020', 'Cache Singer', 'Cache Rock')
+    repo.add_music('Cache Rock 2', '2021', 'Cache Singer', 'Cache Rock')
+    repo.add_music('Cache Pop', '2021', 'Cache Singer', 'Cache Pop')
+    repo.add_rating('alice', 'Cache Rock 1', 'Cache Rock', 5)
+    repo.add_rating('bob', 'Cache Rock 2', 'Cache Rock', 5)
+    return repo
+
+def test_view_versions(native_repo):
+    """Test that writes change the versions of the users whose pages they affect, and reads do not."""
+    native_repo.add_user('carol', 1992, 'carol@example.com')
+    versions = {name: native_repo.view_version(name) for name in ('alice', 'bob', 'carol')}
+    native_repo.list_musics(user_name='alice')
+    native_repo.list_recommended_musics('alice')
+    assert {name: native_repo.view_version(name) for name in versions} == versions
+
+    # alice e bob dividem Cache Rock; carol não é afetada
+    native_repo.add_rating('alice', 'Cache Rock 2', 'Cache Rock', 4)
+    assert native_repo.view_version('alice') != versions['alice']
+    assert native_repo.view_version('bob') != versions['bob']
+    assert native_repo.view_version('carol') == versions['carol']
+
+    versions = {name: native_repo.view_version(name) for name in versions}
+    native_repo.add_music('Cache Jazz', '2022', 'Cache Singer', 'Cache Jazz')
+    assert all(native_repo.view_version(name) != version for name, version in versions.items())
+
+    # Versões derivadas dos dados: quem carrega o mesmo banco concorda, e a escrita de um muda a do outro
+    other = OntologyRepository(native_repo.path, backend='sqlite', reasoner='incremental')
+    third = OntologyRepository(native_repo.path, backend='sqlite', reasoner='incremental')
+    assert other.view_version('alice') == third.view_version('alice')
+    version = native_repo.view_version('alice')
+    other.add_music('Cache Blues', '2022', 'Cache Singer', 'Cache Jazz')
+    assert native_repo.view_version('alice') != version
+    assert 'Cache Blues' in [music['title'] for music in native_repo.list_musics()]
+
+def test_recommendations_are_cached(native_repo, monkeypatch):
+    """Test that repeated recommendation requests are served from the cache."""
+    first = native_repo.list_recommended_musics('alice', limit=10)
+    assert 'alice' in native_repo.recommendations
+
+    monkeypatch.setattr(native_repo, 'reason', lambda: pytest.fail("reasoning on a cache hit"))
+    monkeypatch.setattr(native_repo, '_build_music_row', lambda music: pytest.fail("hydration on a cache hit"))
+    assert native_repo.list_recommended_musics('alice', limit=10) == first
+
+def test_recommendation_cache_invalidation(native_repo):
+    """Test that only the users whose recommendations can change are invalidated."""
+    native_repo.add_user('carol', 1992, 'carol@example.com')
+    native_repo.add_rating('carol', 'Cache Pop', 'Cache Pop', 5)
+    for name in ('alice', 'bob', 'carol'):
+        native_repo.list_recommended_musics(name)
+
+    native_repo.add_rating('carol', 'Cache Pop', 'Cache Pop', 3)
+    assert 'carol' not in native_repo.recommendations
+    assert 'alice' in native_repo.recommendations
+
+    native_repo.list_recommended_musics('carol')
+    native_repo.add_rating('bob', 'Cache Rock 1', 'Cache Rock', 4)
+    assert 'alice' not in native_repo.recommendations
+    assert 'bob' not in native_repo.recommendations
+    assert 'carol' in native_repo.recommendations
+
+    native_repo.list_recommended_musics('alice')
+    native_repo.add_music('Cache Rock 3', '2022', 'Cache Singer', 'Cache Rock')
+    assert 'alice' not in native_repo.recommendations
+    assert 'carol' in native_repo.recommendations
+    titles = [m['title'] for m in native_repo.list_recommended_musics('alice', limit=10)]
+    assert 'Cache Rock 3' in titles
+
+def test_add_ratings_invalidates_only_affected_users(native_repo, monkeypatch):
+    """Test that a batch of ratings reasons incrementally and bumps only the affected users."""
+    native_repo.add_user('carol', 1992, 'carol@example.com')
+    versions = {name: native_repo.view_version(name) for name in ('alice', 'bob', 'carol')}
+    catalog_version = native_repo.catalog_version
+    monkeypatch.setattr(native_repo, 'reason', lambda: pytest.fail("full reasoning for a batch"))
+
+    assert native_repo.add_ratings([{'userName': 'alice', 'title': 'Cache Rock 2', 'stars': 4},
+                                    {'userName': 'alice', 'title': 'Cache Pop', 'stars': 2}]) == 2
+    assert native_repo.get_user_ratings('alice', ['Cache Rock 2', 'Cache Pop']) == {'Cache Rock 2': 4, 'Cache Pop': 2}
+    assert native_repo.catalog_version == catalog_version
+    assert native_repo.view_version('alice') != versions['alice']
+    assert native_repo.view_version('bob') != versions['bob']
+    assert native_repo.view_version('carol') == versions['carol']
+
+    assert native_repo.can_rate('carol', 'Cache Pop')
+    assert not native_repo.can_rate('carol', 'nonexistent')
+    assert not native_repo.can_rate('nobody', 'Cache Pop')
+    with pytest.raises(Exception, match="User, music, or genre not found"):
+        native_repo.add_ratings([{'userName': 'carol', 'title': 'Cache Pop', 'stars': 5},
+                                 {'userName': 'carol', 'title': 'nonexistent', 'stars': 5}])
+    assert native_repo.get_user_rating('carol', 'Cache Pop') is None
+
+def test_stars_outside_range_are_rejected(native_repo):
+    """Test that ratings outside 1-5, which the SWRL rules would not match, never reach the ontology."""
+    for stars in (0, 6):
+        with pytest.raises(Exception, match="Rating must be between 1 and 5."):
+            native_repo.add_rating('alice', 'Cache Pop', 'Cache Pop', stars)
+    with pytest.raises(Exception, match="Rating must be between 1 and 5."):
+        native_repo.add_ratings([{'userName': 'alice', 'title': 'Cache Pop', 'stars': 4},
+                                 {'userName': 'bob', 'title': 'Cache Pop', 'stars': 9}])
+    counts = native_repo.bulk_load(ratings=[{'userName': 'bob', 'title': 'Cache Pop', 'stars': 7}])
+    assert (counts['ratings'], counts['skipped']) == (0, 1)
+    assert native_repo.get_user_ratings('alice', ['Cache Pop']) == {'Cache Pop': None}
+    assert native_repo.get_user_ratings('bob', ['Cache Pop']) == {'Cache Pop': None}
+    assert native_repo.get_user_preferences('alice') == ['Cache Rock']
+
+def test_rating_index_tracks_ratings(native_repo):
+    """Test that the (user, music) rating index stays consistent with add_rating."""
+    user = native_repo.get_user('alice')
+    music = native_repo.onto.search_one(title='Cache Rock 1')
+    rating = native_repo.rating_index.get(user, music)
+    assert rating is not None
+    assert rating.stars == [5]
+
+    native_repo.add_rating('alice', 'Cache Rock 1', 'Cache Rock', 3)
+    assert native_repo.rating_index.get(user, music) is rating
+    assert native_repo.get_user_rating('alice', 'Cache Rock 1') == 3
+
+    rated = {m['title']: m['already_rated'] for m in native_repo.list_musics(limit=1000, search='Cache', user_name='alice')}
+    assert rated == {'Cache Rock 1': True, 'Cache Rock 2': False, 'Cache Pop': False}
+
+    native_repo.reload()
+    assert native_repo.rating_index.get(native_repo.get_user('alice'), native_repo.onto.search_one(title='Cache Rock 1')) is not None
+
+def test_bulk_user_ratings(native_repo):
+    """Test fetching a user's stars for many songs in one call."""
+    ratings = native_repo.get_user_ratings('alice', ['Cache Rock 1', 'Cache Rock 2', 'nonexistent'])
+    assert ratings == {'Cache Rock 1': 5, 'Cache Rock 2': None, 'nonexistent': None}
+    assert native_repo.get_user_ratings('nonexistent', ['Cache Rock 1']) == {'Cache Rock 1': None}
+
+    musics = native_repo.list_musics(limit=1000, search='Cache Rock', user_name='alice')
+    assert {m['title']: m['user_rating'] for m in musics} == {'Cache Rock 1': 5, 'Cache Rock 2': None}
+
+@pytest.mark.parametrize('order_by', ['title', 'year', 'singer'])
+@pytest.mark.parametrize('order_dir', ['asc', 'desc'])
+def test_list_musics_ordering_matches_full_sort(native_repo, order_by, order_dir):
+    """Test that index-backed listing returns the same order as sorting the whole catalog."""
+    native_repo.add_music('Aaa First Song', '1900', 'Aaa Singer', 'Cache Rock')
+    key = {'title': 'title', 'year': 'year', 'singer': 'singer'}[order_by]
+
+    everything = native_repo.list_musics(limit=100000, order_by=order_by, order_dir=order_dir)
+    keys = [m[key] for m in everything]
+    assert keys == sorted(keys, reverse=(order_dir == 'desc'))
+    assert len(everything) == len(list(native_repo._instances('Music')))
+
+    page = native_repo.list_musics(limit=5, order_by=order_by, order_dir=order_dir)
+    assert [m[key] for m in page] == keys[:5]
+
+    filtered = native_repo.list_musics(limit=2, search='cache', order_by=order_by, order_dir=order_dir)
+    filtered_keys = [m[key] for m in filtered]
+    assert len(filtered) == 2
+    assert filtered_keys == sorted(filtered_keys, reverse=(order_dir == 'desc'))
+
+@pytest.mark.parametrize('order_by', ['title', 'year', 'singer'])
+@pytest.mark.parametrize('order_dir', ['asc', 'desc'])
+@pytest.mark.parametrize('search', ['', 'cache'])
+def test_list_musics_cursor_pages(native_repo, order_by, order_dir, search):
+    """Test that following each page's last cursor returns the full listing once, in order."""
+    for i in range(5):
+        native_repo.add_music(f'Cache Tie {i}', '2000', 'Cache Singer', 'Cache Rock')
+    everything = native_repo.list_musics(limit=100000, search=search, order_by=order_by, order_dir=order_dir)
+    pages, cursor = [], None
+    while True:
+        page = native_repo.list_musics(limit=3, search=search, order_by=order_by, order_dir=order_dir, cursor=cursor)
+        if not page:
+            break
+        pages.extend(page)
+        cursor = page[-1]['cursor']
+    assert pages == everything
+
+    with pytest.raises(ValueError):
+        native_repo.list_musics(order_by='year' if order_by != 'year' else 'title', order_dir=order_dir,
+                                cursor=everything[0]['cursor'])
+    with pytest.raises(ValueError):
+        native_repo.list_musics(cursor='not a cursor')
+
+def test_recommendation_cursor_pages(native_repo):
+    """Test cursor pages over recommendations, with and without search."""
+    for i in range(5):
+        native_repo.add_music(f'Cache Rock Page {i}', '2022', 'Cache Singer', 'Cache Rock')
+    for search in ('', 'page'):
+        everything = native_repo.list_recommended_musics('alice', limit=1000, search=search)
+        pages, cursor = [], None
+        while True:
+            page = native_repo.list_recommended_musics('alice', limit=2, search=search, cursor=cursor)
+            if not page:
+                break
+            pages.extend(page)
+            cursor = page[-1]['cursor']
+        assert pages == everything
+
+    # A lista mudou entre as páginas: o cursor retoma depois da mesma música
+    first = native_repo.list_recommended_musics('alice', limit=2)
+    native_repo.recommendations.put('alice', list(reversed(native_repo.recommendations.get('alice'))))
+    rest = native_repo.list_recommended_musics('alice', limit=1000, cursor=first[-1]['cursor'])
+    reordered = native_repo.list_recommended_musics('alice', limit=1000)
+    titles = [m['title'] for m in reordered]
+    assert [m['title'] for m in rest] == titles[titles.index(first[-1]['title']) + 1:]
+
+def test_search_recommendations(native_repo):
+    """Test that recommendation search uses the same substring semantics as the catalog."""
+    titles = [m['title'] for m in native_repo.list_recommended_musics('alice', limit=10, search='ROCK 2')]
+    assert titles == ['Cache Rock 2']
+    assert native_repo.list_recommended_musics('alice', limit=10, search='pop') == []
+
+    native_repo.add_music('Cache Rock Zeta', '2022', 'Cache Singer', 'Cache Rock')
+    catalog = [m['title'] for m in native_repo.list_musics(limit=10, search='zeta')]
+    recommended = [m['title'] for m in native_repo.list_recommended_musics('alice', limit=10, search='zeta')]
+    assert catalog == recommended == ['Cache Rock Zeta']
+
+def test_recommendations_offset_and_lazy_hydration(native_repo, monkeypatch):
+    """Test that offset/limit are applied before hydration and only consumed rows are built."""
+    for i in range(5):
+        native_repo.add_music(f'Cache Rock Page {i}', '2022', 'Cache Singer', 'Cache Rock')
+    everything = native_repo.list_recommended_musics('alice', limit=1000)
+    assert native_repo.list_recommended_musics('alice', limit=2, offset=3) == everything[3:5]
+    assert native_repo.list_recommended_musics('alice', limit=2, search='page', offset=1) == \
+        [m for m in everything if 'page' in m['title'].lower()][1:3]
+
+    native_repo._rows.clear()
+    built = []
+    build = native_repo._build_music_row
+    monkeypatch.setattr(native_repo, '_build_music_row', lambda music: built.append(music) or build(music))
+    rows = native_repo.iter_recommended_musics('alice', offset=2)
+    assert built == []
+    assert next(rows) == everything[2]
+    assert len(built) == 1
+
+def test_iterated_rows_are_read_under_the_lock(native_repo, monkeypatch):
+    """Test that the recommendation generator hydrates each row under the read lock, releasing it between rows."""
+    native_repo._rows.clear()
+    locked = []
+    build = native_repo._build_music_row
+    monkeypatch.setattr(native_repo, '_build_music_row',
+                        lambda music: locked.append(native_repo.lock.reading()) or build(music))
+    rows = native_repo.iter_recommended_musics('alice')
+    first = next(rows)
+    # Com o gerador parado, uma escrita na mesma thread não fica esperando o lock
+    native_repo.add_music('Cache Rock 3', '2022', 'Cache Singer', 'Cache Rock')
+    titles = [first['title']] + [row['title'] for row in rows]
+    assert sorted(titles) == ['Cache Rock 1', 'Cache Rock 2']
+    assert locked and all(locked)
+
+def test_concurrent_reads_and_writes(native_repo):
+    """Test that threads rating and listing at the same time see consistent results."""
+    import threading
+    for i in range(10):
+        native_repo.add_music(f'Concurrent Song {i}', '2023', 'Cache Singer', 'Cache Rock')
+    errors = []
+
+    def rater(user_name):
+        try:
+            for i in range(10):
+                native_repo.add_rating(user_name, f'Concurrent Song {i}', 'Cache Rock', 1 + i % 5)
+        except Exception as e:
+            errors.append(e)
+
+    def reader():
+        try:
+            for _ in range(30):
+                assert len(native_repo.list_musics(limit=5, search='concurrent', user_name='alice')) == 5
+                native_repo.list_recommended_musics('bob', limit=5)
+                native_repo.get_user_rating('alice', 'Concurrent Song 0')
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=rater, args=(name,)) for name in ('alice', 'bob')]
+    threads += [threading.Thread(target=reader) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+
+    assert errors == []
+    assert native_repo.get_user_ratings('alice', [f'Concurrent Song {i}' for i in range(10)]) == \
+        {f'Concurrent Song {i}': 1 + i % 5 for i in range(10)}
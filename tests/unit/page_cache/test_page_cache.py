@@ -0,0 +1,24 @@
+from src.application.page_cache import PageCache
+
+
+def test_page_cache_lru():
+    """Test hits, misses and least-recently-used eviction."""
+    cache = PageCache(max_pages=2)
+    cache.put('etag-a', '<html>a</html>')
+    cache.put('etag-b', '<html>b</html>')
+    assert cache.get('etag-a') == '<html>a</html>'
+    cache.put('etag-c', '<html>c</html>')
+
+    assert cache.get('etag-b') is None
+    assert cache.get('etag-c') == '<html>c</html>'
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_disabled_page_cache():
+    """Test that a zero-sized cache stores nothing."""
+    cache = PageCache(max_pages=0)
+    cache.put('etag', '<html></html>')
+    assert cache.get('etag') is None
+    cache.clear()
+    assert len(cache) == 0
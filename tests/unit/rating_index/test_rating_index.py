@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+from src.infrastructure.rating_index import RatingIndex
+
+
+def _rating(user, music, stars=5):
+    return SimpleNamespace(givenBy=[user], ratesSong=[music], stars=[stars])
+
+
+def test_rebuild_and_lookup():
+    """Test O(1) lookup by (user, music) and the adjacency lists."""
+    r1 = _rating('alice', 'song1')
+    r2 = _rating('alice', 'song2')
+    r3 = _rating('bob', 'song1')
+    index = RatingIndex()
+    index.rebuild([r1, r2, r3])
+
+    assert index.get('alice', 'song1') is r1
+    assert index.get('bob', 'song2') is None
+    assert index.get('carol', 'song1') is None
+    assert index.user_ratings('alice') == [r1, r2]
+    assert index.music_ratings('song1') == [r1, r3]
+    assert len(index) == 3
+
+
+def test_add_keeps_index_consistent():
+    """Test that adding a rating updates every view of the index."""
+    index = RatingIndex()
+    index.rebuild([_rating('alice', 'song1')])
+    rating = _rating('bob', 'song1')
+    index.add(rating)
+
+    assert index.get('bob', 'song1') is rating
+    assert rating in index.music_ratings('song1')
+    assert index.user_ratings('bob') == [rating]
+
+
+def test_incomplete_ratings_are_ignored():
+    """Test that ratings without user or song are not indexed."""
+    index = RatingIndex()
+    index.rebuild([SimpleNamespace(givenBy=[], ratesSong=['song1'])])
+    assert len(index) == 0
@@ -0,0 +1,104 @@
+import os
+import shutil
+import subprocess
+import sys
+import pytest
+from owlready2 import World
+from infrastructure.reasoning_scheduler import infer_snapshot
+from infrastructure.rule_engine import RuleEngine
+from application.ontology_service import OntologyService
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '../../../data/data.rdf')
+SRC_DIR = os.path.join(os.path.dirname(__file__), '../../../src')
+
+# Um entry point que sobe o serviço no import, como o app.py fazia
+BOOT_ON_IMPORT = '''
+import sys
+sys.path.insert(0, {src!r})
+from application.ontology_service import OntologyService
+
+with open({boots!r}, 'a') as f:
+    f.write('boot\\n')
+service = OntologyService({path!r}, backend='sqlite', reasoner='native')
+service.load_ontology()
+scheduler = service.enable_background_reasoning(debounce=0.05, max_delay=1.0)
+service.register_user('bg_user', '1990', 'bg@example.com')
+service.add_music('Background Rock 1', '2020', 'BG Singer', 'BG Rock')
+service.add_rating('bg_user', 'Background Rock 1', 'BG Rock', 5)
+assert scheduler.wait_idle(60)
+assert scheduler.runs >= 1
+service.close()
+'''
+
+
+@pytest.fixture
+def service(tmp_path):
+    path = str(tmp_path / 'data.rdf')
+    shutil.copy(DATA_FILE, path)
+    service = OntologyService(path, backend='sqlite', reasoner='native')
+    service.load_ontology()
+    service.register_user('bg_user', '1990', 'bg@example.com')
+    service.add_music('Background Rock 1', '2020', 'BG Singer', 'BG Rock')
+    service.add_music('Background Rock 2', '2021', 'BG Singer', 'BG Rock')
+    yield service
+    service.close()
+
+
+def test_infer_snapshot_matches_rule_engine():
+    """Test that the worker function returns the rule engine closure as IRIs."""
+    preferences, recommendations = infer_snapshot(DATA_FILE, 'native')
+    engine = RuleEngine(World().get_ontology(DATA_FILE).load()).run()
+    assert {u: set(g) for u, g in preferences.items()} == \
+        {u.iri: {g.iri for g in genres} for u, genres in engine.preferences.items() if genres}
+    assert {u: set(m) for u, m in recommendations.items()} == \
+        {u.iri: {m.iri for m in musics} for u, musics in engine.recommendations.items() if musics}
+
+
+def test_background_reasoning_swaps_in_inference(service, monkeypatch):
+    """Test that ratings do not reason inline and the worker's inference is swapped in."""
+    scheduler = service.enable_background_reasoning(debounce=0.05, max_delay=1.0)
+    assert scheduler.wait_idle(60)
+    monkeypatch.setattr(service.repo, 'reason', lambda: pytest.fail("inline reasoning"))
+
+    service.add_rating('bg_user', 'Background Rock 1', 'BG Rock', 5)
+    assert service.reasoning_staleness()['pending_changes'] >= 1
+    assert service.list_recommended_musics('bg_user') == []
+
+    assert scheduler.wait_idle(60)
+    staleness = service.reasoning_staleness()
+    assert staleness['pending_changes'] == 0 and staleness['stale_seconds'] == 0.0
+    titles = {m['title'] for m in service.list_recommended_musics('bg_user')}
+    assert titles == {'Background Rock 1', 'Background Rock 2'}
+    assert service.repo.get_user_preferences('bg_user') == ['BG Rock']
+
+
+def test_changes_are_debounced(service):
+    """Test that a burst of writes is covered by a single background run."""
+    scheduler = service.enable_background_reasoning(debounce=0.5, max_delay=10.0)
+    assert scheduler.wait_idle(60)
+    runs = scheduler.runs
+
+    for stars in (1, 2, 3, 4, 5):
+        service.add_rating('bg_user', 'Background Rock 2', 'BG Rock', stars)
+    assert scheduler.wait_idle(60)
+    assert scheduler.runs == runs + 1
+    assert service.repo.get_user_preferences('bg_user') == ['BG Rock']
+
+
+def test_without_scheduler_staleness_is_none(service):
+    """Test that inline reasoning reports no staleness."""
+    assert service.reasoning_staleness() is None
+
+
+def test_worker_does_not_reimport_main(tmp_path):
+    """Test that the worker does not boot another service from a module that boots on import."""
+    path = str(tmp_path / 'data.rdf')
+    shutil.copy(DATA_FILE, path)
+    boots = str(tmp_path / 'boots.txt')
+    script = tmp_path / 'boot_on_import.py'
+    script.write_text(BOOT_ON_IMPORT.format(src=os.path.abspath(SRC_DIR), boots=boots, path=path))
+
+    result = subprocess.run([sys.executable, str(script)], cwd=str(tmp_path), capture_output=True, timeout=120)
+    assert result.returncode == 0, result.stderr.decode()
+    with open(boots) as f:
+        assert f.read().splitlines() == ['boot']
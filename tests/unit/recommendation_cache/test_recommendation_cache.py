@@ -0,0 +1,42 @@
+from src.infrastructure.recommendation_cache import RecommendationCache
+
+
+def test_get_and_put():
+    """Test that stored recommendations are returned and misses are counted."""
+    cache = RecommendationCache(max_users=2)
+    assert cache.get('alice') is None
+    cache.put('alice', [{'title': 'Song'}])
+    assert cache.get('alice') == [{'title': 'Song'}]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_eviction():
+    """Test that the least recently used user is evicted when the cache is full."""
+    cache = RecommendationCache(max_users=2)
+    cache.put('alice', [])
+    cache.put('bob', [])
+    cache.get('alice')
+    cache.put('carol', [])
+    assert 'alice' in cache
+    assert 'bob' not in cache
+    assert 'carol' in cache
+    assert len(cache) == 2
+
+
+def test_invalidate_and_clear():
+    """Test invalidating specific users and clearing the whole cache."""
+    cache = RecommendationCache()
+    cache.put('alice', [])
+    cache.put('bob', [])
+    cache.invalidate(['alice', 'nobody'])
+    assert 'alice' not in cache
+    assert 'bob' in cache
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_disabled_cache():
+    """Test that a cache with no capacity never stores anything."""
+    cache = RecommendationCache(max_users=0)
+    cache.put('alice', [])
+    assert cache.get('alice') is None
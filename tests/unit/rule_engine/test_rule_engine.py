@@ -0,0 +1,203 @@
+import os
+import shutil
+import pytest
+from owlready2 import World, sync_reasoner_pellet
+from src.infrastructure.rule_engine import RuleEngine
+from src.infrastructure.ontology_repository import OntologyRepository
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '../../../data')
+
+
+def _instances(onto, class_name):
+    cls = next((c for c in onto.classes() if c.name == class_name), None)
+    return list(cls.instances()) if cls else []
+
+
+def _reference_closure(onto):
+    """Evaluate the rules literally, with nested loops over every atom of each body."""
+    ratings = _instances(onto, 'Rating')
+    users = _instances(onto, 'User')
+    musics = _instances(onto, 'Music')
+
+    preferences = set()
+    for r in ratings:
+        for s in r.stars:
+            if s in (4, 5):
+                for u in r.givenBy:
+                    for g in r.ratesGenre:
+                        preferences.add((u, g))
+
+    recommendations = set()
+    for u, g in preferences:
+        if u in users:
+            for m in musics:
+                if g in m.hasGenre:
+                    recommendations.add((u, m))
+    for u1, g in preferences:
+        for u2, g2 in preferences:
+            if g2 != g:
+                continue
+            for r in ratings:
+                if u2 in r.givenBy and any(s in (4, 5) for s in r.stars):
+                    for m in r.ratesSong:
+                        recommendations.add((u1, m))
+    return preferences, recommendations
+
+
+def _engine_closure(engine):
+    preferences = {(u, g) for u, genres in engine.preferences.items() for g in genres}
+    recommendations = {(u, m) for u, musics in engine.recommendations.items() for m in musics}
+    return preferences, recommendations
+
+
+def _ontology_closure(onto):
+    users = _instances(onto, 'User')
+    preferences = {(u, g) for u in users for g in u.hasPreference}
+    recommendations = {(u, m) for u in users for m in u.RecommendedMusic}
+    return preferences, recommendations
+
+
+def _names(pairs):
+    return {(a.iri, b.iri) for a, b in pairs}
+
+
+@pytest.fixture(params=['data.rdf', 'data-test.rdf'])
+def ontology_path(request):
+    path = os.path.join(DATA_DIR, request.param)
+    if not os.path.exists(path):
+        pytest.skip(f"Arquivo não encontrado: {path}")
+    return path
+
+
+def _load(path):
+    return World().get_ontology(path).load()
+
+
+def test_engine_matches_reference_closure(ontology_path):
+    """Test that semi-naive evaluation derives the same facts as the literal rule bodies."""
+    onto = _load(ontology_path)
+    engine = RuleEngine(onto).run()
+
+    preferences, recommendations = _reference_closure(onto)
+    assert preferences
+    assert _engine_closure(engine) == (preferences, recommendations)
+
+
+def test_materialize_writes_closure_to_ontology(ontology_path):
+    """Test that materialize() writes hasPreference and RecommendedMusic back to the ontology."""
+    onto = _load(ontology_path)
+    engine = RuleEngine(onto).run().materialize()
+
+    assert _ontology_closure(onto) == _engine_closure(engine)
+    assert list(onto.world.get_ontology('http://inferrences/').get_triples())
+
+
+@pytest.mark.skipif(shutil.which('java') is None, reason="Pellet requires Java")
+def test_engine_matches_pellet(ontology_path):
+    """Test that the native engine derives the same closure as Pellet."""
+    native = _load(ontology_path)
+    RuleEngine(native).run().materialize()
+
+    pellet = _load(ontology_path)
+    sync_reasoner_pellet([pellet], infer_property_values=True, infer_data_property_values=True)
+
+    native_preferences, native_recommendations = _ontology_closure(native)
+    pellet_preferences, pellet_recommendations = _ontology_closure(pellet)
+    assert _names(native_preferences) == _names(pellet_preferences)
+    assert _names(native_recommendations) == _names(pellet_recommendations)
+
+
+def test_rerun_retracts_stale_facts(ontology_path):
+    """Test that a full run after a downgrade removes preferences that lost support."""
+    onto = _load(ontology_path)
+    engine = RuleEngine(onto).run().materialize()
+
+    user, genres = next((u, g) for u, g in engine.preferences.items() if g)
+    for rating in _instances(onto, 'Rating'):
+        if user in rating.givenBy:
+            rating.stars = [2]
+
+    engine.run().materialize()
+    assert list(user.hasPreference) == []
+    assert _ontology_closure(onto) == _reference_closure(onto)
+
+
+def _new_rating(onto, user, music, stars):
+    with onto:
+        rating = onto.Rating(f"{user.name}_{music.name}_delta_rating")
+        rating.givenBy = [user]
+        rating.ratesSong = [music]
+        rating.ratesGenre = list(music.hasGenre)
+        rating.stars = [stars]
+    return rating
+
+
+def test_update_rating_matches_full_run(ontology_path):
+    """Test that delta maintenance on insert, upgrade and downgrade matches a full evaluation."""
+    onto = _load(ontology_path)
+    engine = RuleEngine(onto).run().materialize()
+
+    with onto:
+        user = onto.User('delta_user')
+        user.userName = ['delta_user']
+    music = next(m for m in _instances(onto, 'Music') if m.hasGenre)
+
+    rating = _new_rating(onto, user, music, 5)
+    affected = engine.update_rating(rating)
+    assert user in affected
+    assert set(music.hasGenre) <= set(user.hasPreference)
+    assert _engine_closure(engine) == _reference_closure(onto)
+    assert _ontology_closure(onto) == _reference_closure(onto)
+
+    rating.stars = [4]
+    assert engine.update_rating(rating) == set()
+
+    rating.stars = [2]
+    affected = engine.update_rating(rating)
+    assert user in affected
+    assert list(user.hasPreference) == []
+    assert _engine_closure(engine) == _reference_closure(onto)
+    assert _ontology_closure(onto) == _reference_closure(onto)
+
+
+def test_update_music_matches_full_run(ontology_path):
+    """Test that adding or re-genring a song only refreshes users preferring the genres involved."""
+    onto = _load(ontology_path)
+    engine = RuleEngine(onto).run().materialize()
+
+    genre = next(g for g, users in engine.genre_users.items() if users)
+    with onto:
+        music = onto.Music('delta_music')
+        music.title = ['Delta Music']
+        music.hasGenre = [genre]
+    assert engine.update_music(music) == engine.genre_users[genre]
+    assert _ontology_closure(onto) == _reference_closure(onto)
+
+    with onto:
+        music.hasGenre = [onto.Genre('delta_genre')]
+    engine.update_music(music)
+    assert _engine_closure(engine) == _reference_closure(onto)
+    assert _ontology_closure(onto) == _reference_closure(onto)
+
+
+@pytest.mark.parametrize('reasoner', ['native', 'incremental'])
+def test_repository_with_native_reasoner(tmp_path, reasoner):
+    """Test add_rating and recommendations through the repository using the native engine."""
+    path = str(tmp_path / 'data.rdf')
+    shutil.copy(os.path.join(DATA_DIR, 'data.rdf'), path)
+    repo = OntologyRepository(path, backend='sqlite', reasoner=reasoner)
+    repo.load()
+
+    repo.add_user('nativeuser', 1990, 'native@example.com')
+    repo.add_music('Native Rock 1', '2020', 'Native Singer', 'Native Rock')
+    repo.add_music('Native Rock 2', '2021', 'Native Singer', 'Native Rock')
+    repo.add_music('Native Pop', '2021', 'Native Singer', 'Native Pop')
+    repo.add_rating('nativeuser', 'Native Rock 1', 'Native Rock', 5)
+
+    assert repo.get_user_preferences('nativeuser') == ['Native Rock']
+    titles = {m['title'] for m in repo.list_recommended_musics('nativeuser', limit=10)}
+    assert titles == {'Native Rock 1', 'Native Rock 2'}
+
+    repo.add_rating('nativeuser', 'Native Rock 1', 'Native Rock', 2)
+    assert repo.get_user_preferences('nativeuser') == []
+    assert repo.list_recommended_musics('nativeuser', limit=10) == []
@@ -0,0 +1,78 @@
+import os
+import shutil
+import pytest
+from owlready2 import World
+from infrastructure.rule_engine import RuleEngine
+from infrastructure.rule_profiler import RuleProfiler, format_report
+from infrastructure.ontology_repository import OntologyRepository
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '../../../data')
+
+
+@pytest.fixture(params=['data.rdf', 'data-test.rdf'])
+def onto(request):
+    path = os.path.join(DATA_DIR, request.param)
+    if not os.path.exists(path):
+        pytest.skip(f"Arquivo não encontrado: {path}")
+    return World().get_ontology(path).load()
+
+
+def _instances(onto, class_name):
+    cls = next((c for c in onto.classes() if c.name == class_name), None)
+    return list(cls.instances()) if cls else []
+
+
+def _reference_matches(onto):
+    """Count the body bindings of each rule with nested loops over its atoms."""
+    ratings = [(u, m, g, s) for r in _instances(onto, 'Rating')
+               for u in r.givenBy for m in r.ratesSong for g in r.ratesGenre for s in r.stars]
+    preferences = {(u, g) for u, _, g, s in ratings if s in (4, 5)}
+    matches = {
+        'rule1a': sum(1 for *_, s in ratings if s == 4),
+        'rule1b': sum(1 for *_, s in ratings if s == 5),
+        'rule2': sum(1 for u, g in preferences for m in _instances(onto, 'Music') if g in m.hasGenre),
+    }
+    for rule, stars in (('rule3a', 4), ('rule3b', 5)):
+        matches[rule] = sum(1 for u1, g in preferences for u2, g2 in preferences if g2 == g
+                            for r2, _, _, s in ratings if r2 == u2 and s == stars)
+    return matches
+
+
+def test_profiler_matches_engine_closure(onto):
+    """Test that profiling derives the same closure as the rule engine."""
+    profiler = RuleProfiler(onto).run()
+    engine = RuleEngine(onto).run()
+    assert {u: g for u, g in profiler.preferences.items() if g} == {u: g for u, g in engine.preferences.items() if g}
+    assert {u: m for u, m in profiler.recommendations.items() if m} == \
+        {u: m for u, m in engine.recommendations.items() if m}
+
+
+def test_profiler_counts(onto):
+    """Test the per-rule match counts and that new facts add up to the closure."""
+    report = RuleProfiler(onto).run().report()
+    rules = {rule['rule']: rule for rule in report['rules']}
+    assert list(rules) == ['rule1a', 'rule1b', 'rule2', 'rule3a', 'rule3b']
+    assert {name: rule['matches'] for name, rule in rules.items()} == _reference_matches(onto)
+    for rule in rules.values():
+        assert rule['new_facts'] <= rule['firings'] <= rule['matches']
+        assert rule['seconds'] >= 0
+    assert rules['rule1a']['new_facts'] + rules['rule1b']['new_facts'] == report['facts']['hasPreference']
+    assert sum(rules[name]['new_facts'] for name in ('rule2', 'rule3a', 'rule3b')) == \
+        report['facts']['RecommendedMusic']
+    assert 'rule3b' in format_report(report)
+
+
+def test_repository_profile_mode(tmp_path):
+    """Test that profile_rules keeps the last report and profile_reasoning returns one on demand."""
+    path = str(tmp_path / 'data.rdf')
+    shutil.copy(os.path.join(DATA_DIR, 'data.rdf'), path)
+    repo = OntologyRepository(path, backend='sqlite', reasoner='incremental', profile_rules=True)
+    repo.load()
+    assert isinstance(repo.rule_engine, RuleProfiler)
+    assert repo.rule_profile['facts']['hasPreference'] > 0
+    recommended = {m['title'] for m in repo.list_recommended_musics('Outro', limit=1000)}
+
+    report = repo.profile_reasoning()
+    assert report['facts'] == repo.rule_profile['facts']
+    assert {m['title'] for m in repo.list_recommended_musics('Outro', limit=1000)} == recommended
+    repo.world.close()
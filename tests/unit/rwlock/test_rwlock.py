@@ -0,0 +1,93 @@
+import threading
+import time
+import pytest
+from src.infrastructure.rwlock import ReadWriteLock
+
+
+def _start(target):
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_readers_share_the_lock():
+    """Test that several readers hold the lock at the same time."""
+    lock = ReadWriteLock()
+    inside = threading.Barrier(3, timeout=2)
+
+    def reader():
+        with lock.read():
+            inside.wait()
+
+    threads = [_start(reader) for _ in range(3)]
+    for thread in threads:
+        thread.join(2)
+    assert not any(thread.is_alive() for thread in threads)
+
+
+def test_writer_excludes_readers_and_writers():
+    """Test that a writer runs alone."""
+    lock = ReadWriteLock()
+    active = []
+    overlaps = []
+
+    def worker(mode):
+        for _ in range(50):
+            with getattr(lock, mode)():
+                active.append(mode)
+                if 'write' in active and len(active) > 1:
+                    overlaps.append(list(active))
+                time.sleep(0.0001)
+                active.remove(mode)
+
+    threads = [_start(lambda m=mode: worker(m)) for mode in ('read', 'read', 'write', 'write')]
+    for thread in threads:
+        thread.join(10)
+    assert overlaps == []
+
+
+def test_waiting_writer_blocks_new_readers():
+    """Test that a waiting writer goes before readers that arrive after it."""
+    lock = ReadWriteLock()
+    order = []
+    first_reader = threading.Event()
+    release = threading.Event()
+
+    def reader(name, hold=None):
+        with lock.read():
+            if hold:
+                first_reader.set()
+                release.wait(2)
+            order.append(name)
+
+    def writer():
+        with lock.write():
+            order.append('writer')
+
+    threads = [_start(lambda: reader('first', hold=True))]
+    first_reader.wait(2)
+    threads.append(_start(writer))
+    time.sleep(0.05)
+    threads.append(_start(lambda: reader('late')))
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+    assert order == ['first', 'writer', 'late']
+
+
+def test_reentrancy_and_upgrade():
+    """Test nested acquisitions and that a reader cannot upgrade to a writer."""
+    lock = ReadWriteLock()
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                assert lock.writing()
+                assert not lock.reading()
+    with lock.read():
+        with lock.read():
+            assert lock.reading()
+        with pytest.raises(RuntimeError):
+            with lock.write():
+                pass
+    assert not lock.reading() and not lock.writing()
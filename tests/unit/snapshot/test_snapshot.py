@@ -0,0 +1,148 @@
+import os
+import shutil
+import pytest
+from src.infrastructure.ontology_repository import OntologyRepository
+from src.infrastructure.snapshot import Snapshot, read_source
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '../../../data/data.rdf')
+QUERIES = [
+    dict(limit=limit, search=search, order_by=order_by, order_dir=order_dir, user_name=user_name)
+    for limit in (5, 1000)
+    for search in ('', 'snap', 'o')
+    for order_by in ('title', 'year', 'singer', 'unknown')
+    for order_dir in ('asc', 'desc')
+    for user_name in (None, 'snap_user')
+]
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    path = str(tmp_path / 'data.rdf')
+    shutil.copy(DATA_FILE, path)
+    return path
+
+
+@pytest.fixture
+def warm(data_path):
+    repo = OntologyRepository(data_path, backend='sqlite', reasoner='native')
+    repo.load()
+    repo.add_user('snap_user', 1990, 'snap@example.com')
+    repo.add_music('Snap Song 1', '2001', 'Snap Singer', 'Snap Genre')
+    repo.add_music('Snap Song 2', '1999', 'Snap Singer', 'Snap Genre')
+    repo.add_music('Snap Song 3', '2001', 'Other Singer', 'Snap Genre')
+    repo.add_rating('snap_user', 'Snap Song 1', 'Snap Genre', 5)
+    repo.add_rating('snap_user', 'Snap Song 2', 'Snap Genre', 2)
+    repo.write_snapshot()
+    yield repo
+    repo.world.close()
+
+
+def _cold(data_path):
+    repo = OntologyRepository(data_path, backend='sqlite', reasoner='native')
+    assert repo.open_snapshot()
+    return repo
+
+
+def test_snapshot_reads_match_ontology(warm, data_path):
+    """Test that reads served from the snapshot equal the owlready2 results, without loading it."""
+    cold = _cold(data_path)
+    for query in QUERIES:
+        assert cold.list_musics(**query) == warm.list_musics(**query), query
+    assert cold.get_user_rating('snap_user', 'Snap Song 1') == 5
+    assert cold.get_user_rating('snap_user', 'Snap Song 3') is None
+    assert cold.get_user_rating('nobody', 'Snap Song 1') is None
+    assert cold.get_user_ratings('snap_user', ['Snap Song 1', 'Snap Song 2', 'Missing']) == \
+        {'Snap Song 1': 5, 'Snap Song 2': 2, 'Missing': None}
+    assert cold.get_user_preferences('snap_user') == warm.get_user_preferences('snap_user') == ['Snap Genre']
+    assert cold.get_user('snap_user', 'snap@example.com').userName == ['snap_user']
+    assert cold.get_user('snap_user', 'wrong@example.com') is None
+    assert cold.get_user('nobody') is None
+    assert cold.onto is None
+
+
+@pytest.mark.parametrize('order_by', ['title', 'year', 'singer', 'unknown'])
+@pytest.mark.parametrize('order_dir', ['asc', 'desc'])
+def test_snapshot_cursor_pages(warm, data_path, order_by, order_dir):
+    """Test that cursors from the snapshot page through the same order as the ontology."""
+    cold = _cold(data_path)
+    for search in ('', 'snap'):
+        everything = warm.list_musics(limit=1000, search=search, order_by=order_by, order_dir=order_dir)
+        pages, cursor = [], None
+        while True:
+            page = cold.list_musics(limit=7, search=search, order_by=order_by, order_dir=order_dir, cursor=cursor)
+            if not page:
+                break
+            pages.extend(page)
+            cursor = page[-1]['cursor']
+        assert pages == everything
+    assert cold.onto is None
+
+
+def test_snapshot_recommendations(warm, data_path):
+    """Test that recommendations, search and offset are served from the snapshot."""
+    cold = _cold(data_path)
+    expected = warm.list_recommended_musics('snap_user', limit=1000)
+    recommended = cold.list_recommended_musics('snap_user', limit=1000)
+    assert sorted(r['title'] for r in recommended) == sorted(r['title'] for r in expected)
+    assert {'Snap Song 2', 'Snap Song 3'} <= {r['title'] for r in recommended}
+    assert cold.list_recommended_musics('snap_user', limit=2, offset=1) == recommended[1:3]
+    assert [r['title'] for r in cold.iter_recommended_musics('snap_user', search='SNAP SONG')] == \
+        [r['title'] for r in recommended if 'snap song' in r['title'].lower()]
+    assert cold.list_recommended_musics('nobody') == []
+    assert cold.onto is None
+
+
+def test_write_hydrates_ontology(warm, data_path):
+    """Test that the first write loads the ontology and drops the snapshot."""
+    cold = _cold(data_path)
+    cold.add_rating('snap_user', 'Snap Song 3', 'Snap Genre', 4)
+    assert cold.onto is not None and cold.snapshot is None
+    assert cold.get_user_rating('snap_user', 'Snap Song 3') == 4
+    assert cold.get_user_rating('snap_user', 'Snap Song 1') == 5
+    cold.world.close()
+
+
+def test_stale_snapshot_is_ignored(warm, data_path):
+    """Test that a snapshot written before the source changed is not opened."""
+    warm.add_user('late_user', 2000, 'late@example.com')
+    repo = OntologyRepository(data_path, backend='sqlite', reasoner='native')
+    assert not repo.open_snapshot()
+    assert repo.snapshot is None
+
+
+def test_snapshot_file(warm, tmp_path):
+    """Test the snapshot header and string table."""
+    path = warm.write_snapshot(str(tmp_path / 'other.snapshot'))
+    assert read_source(path) == warm._source_stamp()
+    snapshot = Snapshot(path)
+    try:
+        assert snapshot.song_count == len(list(warm.catalog_index))
+        song = snapshot.song_id('Snap Song 1')
+        assert snapshot.song_row(song) == {'title': 'Snap Song 1', 'year': '2001',
+                                           'genre': 'Snap Genre', 'singer': 'Snap Singer'}
+        assert snapshot.string(-1) is None
+    finally:
+        snapshot.close()
+    with open(path, 'r+b') as f:
+        f.write(b'XXXX')
+    with pytest.raises(ValueError):
+        Snapshot(path)
+
+
+def test_snapshot_search_uses_trigram_postings(warm, tmp_path, monkeypatch):
+    """Test that search matches the in-memory title index and decodes only candidate titles."""
+    path = warm.write_snapshot(str(tmp_path / 'search.snapshot'))
+    snapshot = Snapshot(path)
+    try:
+        storids = list(snapshot.song_storid)
+        for query in ('snap', 'SNAP SONG', 'ng 2', 'o', '', 'zzz', 'Snap Song 9'):
+            assert {storids[i] for i in snapshot.search(query)} == warm.title_index.matches(query), query
+
+        decoded = []
+        string = snapshot.string
+        monkeypatch.setattr(snapshot, 'string', lambda sid: decoded.append(sid) or string(sid))
+        found = snapshot.search('snap song')
+        assert len(decoded) == len(found) < snapshot.song_count
+        assert {snapshot.song_row(i)['title'] for i in found} == {'Snap Song 1', 'Snap Song 2', 'Snap Song 3'}
+    finally:
+        snapshot.close()
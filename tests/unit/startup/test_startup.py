@@ -0,0 +1,39 @@
+import threading
+from src.application.startup import Startup
+
+
+def test_startup_runs_boot_in_background():
+    """Test that start() returns before the boot finishes and records each phase."""
+    release = threading.Event()
+
+    def boot(startup):
+        with startup.phase('import'):
+            pass
+        with startup.phase('load'):
+            release.wait(5)
+        return 'service'
+
+    startup = Startup().start(boot)
+    assert not startup.ready()
+    assert startup.status()['status'] == 'starting'
+    release.set()
+    assert startup.wait(5)
+    status = startup.status()
+    assert status['status'] == 'ready'
+    assert list(status['phases']) == ['import', 'load']
+    assert status['elapsed_seconds'] >= sum(status['phases'].values())
+    assert startup.result == 'service'
+
+
+def test_startup_failure():
+    """Test that a failing boot is reported and never becomes ready."""
+    def boot(startup):
+        with startup.phase('load'):
+            raise Exception("Ontology file not found.")
+
+    startup = Startup().start(boot)
+    assert not startup.wait(5)
+    status = startup.status()
+    assert status['status'] == 'failed'
+    assert status['error'] == "Ontology file not found."
+    assert 'load' in status['phases']
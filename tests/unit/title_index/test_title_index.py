@@ -0,0 +1,42 @@
+from itertools import count
+from types import SimpleNamespace
+import pytest
+from src.infrastructure.title_index import TitleIndex
+
+_storids = count(1)
+
+TITLES = ['Bohemian Rhapsody', 'Hotel California', 'Rock and Roll', 'ROCKET MAN',
+          'Jailhouse Rock', 'Imagine', 'Rhapsody in Blue', 'Yesterday', '']
+
+
+def _music(title):
+    return SimpleNamespace(storid=next(_storids), title=[title] if title else [])
+
+
+@pytest.fixture
+def index():
+    index = TitleIndex()
+    index.musics = [_music(t) for t in TITLES]
+    index.rebuild(index.musics)
+    return index
+
+
+@pytest.mark.parametrize('query', ['rock', 'ROCK', 'rhapsody', 'o', 'ro', 'ay', 'hotel cal',
+                                   'rhapsody in blue!', 'xyz', 'ket m'])
+def test_matches_substring_semantics(index, query):
+    """Test that the trigram index matches exactly like a case-insensitive substring scan."""
+    expected = {m.storid for m in index.musics if m.title and query.lower() in m.title[0].lower()}
+    assert index.matches(query) == expected
+
+
+def test_add_updates_postings(index):
+    """Test that new and renamed songs are found under their current title only."""
+    music = _music('Smoke on the Water')
+    index.add(music)
+    assert index.search('water') == [music]
+
+    music.title = ['Paranoid']
+    index.add(music)
+    assert index.search('water') == []
+    assert index.search('PARANO') == [music]
+    assert len(index) == len(TITLES) + 1
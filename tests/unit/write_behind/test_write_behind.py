@@ -0,0 +1,202 @@
+import os
+import shutil
+import threading
+import time
+import pytest
+from infrastructure.write_behind import RatingJournal, WriteBehindQueue
+from application.ontology_service import OntologyService
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '../../../data/data.rdf')
+
+
+class FakeRepository:
+    """Records add_ratings batches; can hold the worker inside a batch."""
+
+    def __init__(self, unknown=(), broken=()):
+        self.batches = []
+        self.unknown = set(unknown)   # títulos que can_rate recusa
+        self.broken = set(broken)     # títulos que add_ratings não consegue aplicar
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def can_rate(self, user_name, music_title):
+        return music_title not in self.unknown
+
+    def add_ratings(self, ratings):
+        self.entered.set()
+        self.release.wait(5)
+        ratings = list(ratings)
+        if any(r['title'] in self.broken for r in ratings):
+            raise Exception("database is locked")
+        self.batches.append(ratings)
+        return len(ratings)
+
+
+def test_ratings_are_applied_in_batches():
+    """Test that ratings submitted while a batch is applied are committed together."""
+    repo = FakeRepository()
+    repo.release.clear()
+    writes = WriteBehindQueue(repo).start()
+    writes.submit('alice', 'song 0', 5)
+    repo.entered.wait(5)
+    for i in range(1, 6):
+        writes.submit('alice', f'song {i}', 4)
+    repo.release.set()
+    writes.flush()
+    writes.stop()
+
+    assert [len(batch) for batch in repo.batches] == [1, 5]
+    assert writes.batches == 2 and writes.applied == 6
+
+
+def test_backpressure_and_read_your_writes():
+    """Test that a full queue rejects new ratings and pending ones are readable."""
+    repo = FakeRepository()
+    repo.release.clear()
+    writes = WriteBehindQueue(repo, max_pending=2).start()
+    writes.submit('alice', 'song 1', 5)
+    writes.submit('alice', 'song 2', 3)
+    with pytest.raises(Exception, match="Too many pending ratings"):
+        writes.submit('alice', 'song 3', 1, timeout=0.05)
+
+    assert writes.pending_rating('alice', 'song 2') == 3
+    assert writes.pending_ratings('alice') == {'song 1': 5, 'song 2': 3}
+    assert writes.pending_rating('bob', 'song 1') is None
+    assert writes.version('alice') == 2 and writes.version('bob') == 0
+
+    repo.release.set()
+    writes.flush()
+    writes.stop()
+    assert writes.pending_ratings('alice') == {}
+
+
+def test_last_rating_of_a_batch_wins():
+    """Test that re-rating a song inside one batch applies only the latest value."""
+    repo = FakeRepository()
+    writes = WriteBehindQueue(repo)
+    for stars in (1, 2, 5):
+        writes.submit('alice', 'song', stars)
+    writes.start()
+    writes.flush()
+    writes.stop()
+    assert repo.batches == [[{'userName': 'alice', 'title': 'song', 'stars': 5}]]
+
+
+def test_unknown_song_is_rejected_on_submit():
+    """Test that a rating the repository would reject is refused before it is acknowledged."""
+    writes = WriteBehindQueue(FakeRepository(unknown={'missing'}))
+    with pytest.raises(Exception, match="User, music, or genre not found"):
+        writes.submit('alice', 'missing', 5)
+    with pytest.raises(Exception, match="Rating must be between 1 and 5."):
+        writes.submit('alice', 'song', 6)
+    assert len(writes) == 0 and writes.version('alice') == 0
+
+
+def test_failed_rating_is_dropped(tmp_path):
+    """Test that a rating failing on its own is dropped while the rest of its batch applies."""
+    journal = str(tmp_path / 'ratings.jsonl')
+    repo = FakeRepository(broken={'song 2'})
+    repo.release.clear()
+    writes = WriteBehindQueue(repo, journal_path=journal).start()
+    writes.submit('alice', 'song 1', 5)
+    repo.entered.wait(5)
+    writes.submit('alice', 'song 2', 5)
+    writes.submit('alice', 'song 3', 5)
+    repo.release.set()
+    writes.flush()
+    assert repo.batches == [[{'userName': 'alice', 'title': 'song 1', 'stars': 5}],
+                            [{'userName': 'alice', 'title': 'song 3', 'stars': 5}]]
+    assert writes.failed == 1 and writes.applied == 2
+    assert writes.pending_ratings('alice') == {}
+    # A página de quem enviou deixa de mostrar a nota descartada
+    assert writes.version('alice') == 4
+
+    # O journal continua avançando depois da falha
+    writes.submit('alice', 'song 4', 3)
+    writes.flush()
+    writes.stop()
+    assert repo.batches[-1] == [{'userName': 'alice', 'title': 'song 4', 'stars': 3}]
+    assert RatingJournal(journal).pending() == []
+    assert os.path.getsize(journal) == 0
+
+
+def test_journal_replays_unapplied_ratings(tmp_path):
+    """Test that ratings journaled but never applied are replayed on the next start."""
+    journal = str(tmp_path / 'ratings.jsonl')
+    crashed = WriteBehindQueue(FakeRepository(), journal_path=journal)
+    crashed.submit('alice', 'song 1', 5)
+    crashed.submit('bob', 'song 2', 4)
+    crashed.journal.close()
+
+    repo = FakeRepository()
+    writes = WriteBehindQueue(repo, journal_path=journal).start()
+    assert repo.batches == [[{'userName': 'alice', 'title': 'song 1', 'stars': 5},
+                             {'userName': 'bob', 'title': 'song 2', 'stars': 4}]]
+    assert RatingJournal(journal).pending() == []
+
+    writes.submit('alice', 'song 3', 2)
+    writes.flush()
+    writes.stop()
+    assert RatingJournal(journal).pending() == []
+    assert os.path.getsize(journal) == 0
+
+
+def test_service_write_behind(tmp_path):
+    """Test the asynchronous /rate path through the service on a real repository."""
+    path = str(tmp_path / 'data.rdf')
+    shutil.copy(DATA_FILE, path)
+    service = OntologyService(path, backend='sqlite', reasoner='incremental')
+    service.load_ontology()
+    service.register_user('wb_user', '1990', 'wb@example.com')
+    service.add_music('Write Behind Song', '2020', 'WB Singer', 'WB Genre')
+
+    writes = service.enable_write_behind(journal_path=str(tmp_path / 'ratings.jsonl'))
+    with pytest.raises(Exception, match="User, music, or genre not found"):
+        service.add_rating('wb_user', 'No Such Song', 'WB Genre', 5)
+    catalog_version = service.repo.catalog_version
+    assert service.add_rating('wb_user', 'Write Behind Song', 'WB Genre', 5, timeout=1)
+    assert service.get_user_rating('wb_user', 'Write Behind Song') == 5
+    row = service.list_musics(search='Write Behind', user_name='wb_user')[0]
+    assert row['already_rated'] and row['user_rating'] == 5
+
+    writes.flush()
+    assert service.repo.get_user_rating('wb_user', 'Write Behind Song') == 5
+    assert service.repo.get_user_preferences('wb_user') == ['WB Genre']
+    # O lote passa pelo caminho incremental: o catálogo dos outros usuários não muda
+    assert service.repo.catalog_version == catalog_version
+    service.close()
+
+
+def test_submit_does_not_wait_for_a_batch(tmp_path, monkeypatch):
+    """Test that submit returns promptly while a slow batch holds the repository write lock."""
+    path = str(tmp_path / 'data.rdf')
+    shutil.copy(DATA_FILE, path)
+    service = OntologyService(path, backend='sqlite', reasoner='incremental')
+    service.load_ontology()
+    service.register_user('wb_user', '1990', 'wb@example.com')
+    service.add_music('Slow Song 1', '2020', 'WB Singer', 'WB Genre')
+    service.add_music('Slow Song 2', '2021', 'WB Singer', 'WB Genre')
+
+    entered = threading.Event()
+    reason_rating = service.repo._reason_rating
+
+    def slow_reason_rating(rating):
+        entered.set()
+        time.sleep(2)
+        return reason_rating(rating)
+    monkeypatch.setattr(service.repo, '_reason_rating', slow_reason_rating)
+
+    writes = service.enable_write_behind()
+    service.add_rating('wb_user', 'Slow Song 1', 'WB Genre', 5, timeout=1)
+    assert entered.wait(5)
+    start = time.perf_counter()
+    assert service.add_rating('wb_user', 'Slow Song 2', 'WB Genre', 4, timeout=1)
+    with pytest.raises(Exception, match="User, music, or genre not found"):
+        service.add_rating('wb_user', 'No Such Song', 'WB Genre', 4, timeout=1)
+    assert time.perf_counter() - start < 0.5
+
+    writes.flush()
+    assert service.repo.get_user_ratings('wb_user', ['Slow Song 1', 'Slow Song 2']) == \
+        {'Slow Song 1': 5, 'Slow Song 2': 4}
+    service.close()